@@ -2,6 +2,7 @@ from datetime import timedelta
 from pathlib import Path
 import os
 from dotenv import load_dotenv
+from django.core.exceptions import ImproperlyConfigured
 
 DEBUG = os.environ.get('DEBUG', 'True') == 'True' 
 
@@ -62,6 +63,8 @@ if NGROK_DOMAIN_ENV:
 
 _prod_csrf_origins_str = os.environ.get('PROD_CSRF_TRUSTED_ORIGINS', '') # Ce sera géré par production.py
 PASSWORD_RESET_TIMEOUT_HOURS = 1
+# Conservation des tokens de réinitialisation expirés/utilisés avant purge (purge_expired_tokens)
+PASSWORD_RESET_TOKEN_RETENTION_DAYS = int(os.environ.get('PASSWORD_RESET_TOKEN_RETENTION_DAYS', 7))
 
 
 REST_FRAMEWORK = {
@@ -73,8 +76,19 @@ REST_FRAMEWORK = {
         # 'rest_framework_simplejwt.authentication.JWTAuthentication', # Keep Cookie auth
     ),
     # 'DEFAULT_THROTTLE_CLASSES': [ ... ], # Uncomment if needed
-    # 'DEFAULT_THROTTLE_RATES': { ... }
+    # Taux des throttles de LoginView (user_auth/throttling.py), fenêtres glissantes
+    'DEFAULT_THROTTLE_RATES': {
+        'login': os.environ.get('LOGIN_THROTTLE_RATE_IP', '20/min'),
+        'login_identifier': os.environ.get('LOGIN_THROTTLE_RATE_IDENTIFIER', '10/min'),
+        'password_reset': os.environ.get('PASSWORD_RESET_THROTTLE_RATE_IP', '20/hour'),
+        'password_reset_email': os.environ.get('PASSWORD_RESET_THROTTLE_RATE_EMAIL', '3/hour'),
+        'ai_stream': os.environ.get('AI_STREAM_THROTTLE_RATE', '30/min'),
+    },
+    # Adresse client lue dans X-Forwarded-For derrière N proxies (None = REMOTE_ADDR)
+    'NUM_PROXIES': int(os.environ['NUM_PROXIES']) if os.environ.get('NUM_PROXIES') else None,
 }
+# Cache stockant l'historique des tentatives de connexion (partagé en production via REDIS_URL)
+LOGIN_THROTTLE_CACHE_ALIAS = 'default'
 
 INSTALLED_APPS = [
     'django.contrib.sitemaps',
@@ -94,6 +108,7 @@ INSTALLED_APPS = [
     'dynamic_forms',
     'webpack_loader',
     'seo',
+    'notifications',
 ]
 
 MIDDLEWARE = [
@@ -148,6 +163,34 @@ AUTH_PASSWORD_VALIDATORS = [
     {'NAME': 'django.contrib.auth.password_validation.NumericPasswordValidator'},
 ]
 
+# --- Politique de hachage des mots de passe (user_auth/hashers.py) ---
+# Le premier hasher sert aux nouveaux hachages ; les autres restent acceptés et
+# les mots de passe concernés sont re-hachés en tâche de fond à la connexion.
+# 'argon2' utilise argon2-cffi, bcrypt (ancien hachage accepté) le paquet bcrypt : tous deux dans
+# requirements.txt. Mesurer avant de changer : manage.py bench_password_hashers
+PASSWORD_HASHER = os.environ.get('PASSWORD_HASHER', 'pbkdf2')
+_PASSWORD_HASHER_CHOICES = {
+    'pbkdf2': 'django.contrib.auth.hashers.PBKDF2PasswordHasher',
+    'scrypt': 'django.contrib.auth.hashers.ScryptPasswordHasher',
+    'argon2': 'django.contrib.auth.hashers.Argon2PasswordHasher',
+}
+if PASSWORD_HASHER not in _PASSWORD_HASHER_CHOICES:
+    raise ImproperlyConfigured(
+        f"PASSWORD_HASHER={PASSWORD_HASHER!r} inconnu ; valeurs possibles : {', '.join(_PASSWORD_HASHER_CHOICES)}"
+    )
+PASSWORD_HASHERS = [_PASSWORD_HASHER_CHOICES[PASSWORD_HASHER]] + [
+    hasher for hasher in (
+        'django.contrib.auth.hashers.PBKDF2PasswordHasher',
+        'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+        'django.contrib.auth.hashers.ScryptPasswordHasher',
+        'django.contrib.auth.hashers.Argon2PasswordHasher',
+        'django.contrib.auth.hashers.BCryptSHA256PasswordHasher',
+    ) if hasher != _PASSWORD_HASHER_CHOICES[PASSWORD_HASHER]
+]
+
+# Pool de tâches de fond (core/background.py)
+BACKGROUND_TASKS_MAX_WORKERS = int(os.environ.get('BACKGROUND_TASKS_MAX_WORKERS', 4))
+
 LANGUAGE_CODE = 'fr-FR'
 TIME_ZONE = 'UTC'
 USE_I18N = True
@@ -157,6 +200,44 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 AUTH_USER_MODEL = 'user_auth.User'
 CSRF_HEADER_NAME = 'HTTP_X_CSRFTOKEN' # If using CSRF with AJAX
 
+# --- Cache ---
+# Un cache partagé (Redis) est nécessaire en production : les invalidations faites
+# par un worker (ex: cache utilisateur JWT) doivent être visibles par tous les autres.
+REDIS_URL = os.environ.get('REDIS_URL')
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
+# Cache des réponses IA (ia_manager/cache.py) : borné et évincé en LRU. Redis seulement
+# sur une instance dédiée (maxmemory + allkeys-lru) : l'instance par défaut ne doit rien
+# évincer (liste noire JWT). À défaut, LocMem, qui évince aussi les entrées les moins récentes.
+AI_RESPONSE_CACHE_TIMEOUT = int(os.environ.get('AI_RESPONSE_CACHE_TIMEOUT', 24 * 3600)) # secondes, 0 = désactivé
+AI_RESPONSE_CACHE_REDIS_URL = os.environ.get('AI_RESPONSE_CACHE_REDIS_URL')
+if AI_RESPONSE_CACHE_REDIS_URL:
+    CACHES['ai_responses'] = {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': AI_RESPONSE_CACHE_REDIS_URL,
+        'KEY_PREFIX': 'ai_responses',
+        'TIMEOUT': AI_RESPONSE_CACHE_TIMEOUT,
+    }
+else:
+    CACHES['ai_responses'] = {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'ai_responses',
+        'TIMEOUT': AI_RESPONSE_CACHE_TIMEOUT,
+        'OPTIONS': {'MAX_ENTRIES': int(os.environ.get('AI_RESPONSE_CACHE_MAX_ENTRIES', 1000))},
+    }
+
 # --- Email Configuration ---
 EMAIL_BACKEND = os.environ.get('EMAIL_BACKEND', 'django.core.mail.backends.console.EmailBackend')
 EMAIL_HOST = os.environ.get('EMAIL_HOST', '')
@@ -248,6 +329,8 @@ SEO_SETTINGS = {
     'DEFAULT_ROBOTS': 'index, follow',
     'DEFAULT_LOCALE': 'fr_SN',
     'DEFAULT_CURRENCY': 'XOF',
+    'SERVER_TIMING': os.environ.get('SEO_SERVER_TIMING', 'False') == 'True',
+    'SLOW_RENDER_THRESHOLD_MS': int(os.environ.get('SEO_SLOW_RENDER_THRESHOLD_MS', 200)),
     'JSONLD_DEFAULT_ORGANIZATION': {
         '@type': 'Organization',
         'name': os.environ.get('SEO_ORGANIZATION_NAME', 'Cicaw'),
@@ -299,7 +382,8 @@ SIMPLE_JWT = {
     'ROTATE_REFRESH_TOKENS': True,
     'BLACKLIST_AFTER_ROTATION': True,
     'UPDATE_LAST_LOGIN': True,
-    'ALGORITHM': 'HS256',
+    # RS256/ES256/EdDSA : clés lues dans JWT_JWKS_FILE (user_auth/jwks.py), SIGNING_KEY est alors ignoré
+    'ALGORITHM': os.environ.get('JWT_ALGORITHM', 'HS256'),
     'SIGNING_KEY': SECRET_KEY,
     'VERIFYING_KEY': None,
     'AUDIENCE': None,
@@ -313,9 +397,25 @@ SIMPLE_JWT = {
     'USER_AUTHENTICATION_RULE': 'rest_framework_simplejwt.authentication.default_user_authentication_rule',
     'AUTH_TOKEN_CLASSES': ('rest_framework_simplejwt.tokens.AccessToken',),
     'TOKEN_TYPE_CLAIM': 'token_type',
-    'TOKEN_USER_CLASS': 'rest_framework_simplejwt.models.TokenUser',
+    'TOKEN_USER_CLASS': 'user_auth.tokens.ProfileTokenUser', # vues sans état (CookieJWTStatelessAuthentication)
     'JTI_CLAIM': 'jti',
 
+    # --- Cache de résolution utilisateur (user_auth/cache.py) ---
+    'USER_CACHE_TIMEOUT': int(os.environ.get('JWT_USER_CACHE_TIMEOUT', 60)), # secondes, 0 = désactivé
+    'USER_CACHE_ALIAS': 'default',
+
+    # --- Clés asymétriques (user_auth/jwks.py) ---
+    'JWKS_FILE': os.environ.get('JWT_JWKS_FILE'),
+    'JWKS_RELOAD_INTERVAL': 60, # secondes entre deux vérifications de la date du fichier
+    'JWKS_CACHE_MAX_AGE': int(os.environ.get('JWT_JWKS_CACHE_MAX_AGE', 3600)), # Cache-Control de /.well-known/jwks.json
+
+    # --- Liste noire en cache (user_auth/blacklist.py) ---
+    # Le cache doit être partagé par tous les workers et sans éviction : actif par défaut avec Redis seulement
+    'BLACKLIST_CACHE_ENABLED': os.environ.get('JWT_BLACKLIST_CACHE', '1' if REDIS_URL else '0') == '1',
+    'BLACKLIST_CACHE_ALIAS': 'default',
+    'BLACKLIST_WRITE_BATCH_SIZE': int(os.environ.get('JWT_BLACKLIST_WRITE_BATCH_SIZE', 100)),
+    'BLACKLIST_WRITE_FLUSH_SECONDS': float(os.environ.get('JWT_BLACKLIST_WRITE_FLUSH_SECONDS', 2)),
+
     # --- Cookie Specific Settings ---
     'AUTH_COOKIE': 'access_token',
     'AUTH_COOKIE_REFRESH': 'refresh_token',
@@ -347,4 +447,89 @@ WEBPACK_LOADER = {
     }
 }
 
-DEFAULT_AI_PROVIDER = "gemini"
\ No newline at end of file
+DEFAULT_AI_PROVIDER = "gemini"
+GEMINI_BASE_URL = os.environ.get('GEMINI_BASE_URL') or None # proxy ou serveur de test ; None = API Google
+# Clients IA partagés par processus (ia_manager/clients.py)
+AI_HTTP_TIMEOUT_MS = int(os.environ.get('AI_HTTP_TIMEOUT_MS', 60_000))
+AI_HTTP_MAX_CONNECTIONS = int(os.environ.get('AI_HTTP_MAX_CONNECTIONS', 20))
+AI_HTTP_MAX_KEEPALIVE_CONNECTIONS = int(os.environ.get('AI_HTTP_MAX_KEEPALIVE_CONNECTIONS', 10))
+AI_HTTP_KEEPALIVE_EXPIRY = float(os.environ.get('AI_HTTP_KEEPALIVE_EXPIRY', 60)) # secondes
+# Appels simultanés maximum par fournisseur et par processus (ia_manager/concurrency.py)
+AI_PROVIDER_CONCURRENCY = {
+    'gemini': int(os.environ.get('AI_GEMINI_CONCURRENCY', 8)),
+    'fake': 64,
+}
+AI_FAKE_PROVIDER_LATENCY = float(os.environ.get('AI_FAKE_PROVIDER_LATENCY', 0)) # secondes, fournisseur 'fake'
+# Budgets par fournisseur, partagés entre workers via Redis (ia_manager/ratelimit.py)
+AI_PROVIDER_RATE_LIMITS = {
+    'gemini': {
+        'rpm': int(os.environ.get('AI_GEMINI_RPM', 1000)),
+        'tpm': int(os.environ.get('AI_GEMINI_TPM', 1_000_000)),
+        'burst_seconds': 10,
+    },
+}
+AI_RATE_LIMIT_CACHE_ALIAS = 'default'
+AI_RATE_LIMIT_MAX_WAIT = float(os.environ.get('AI_RATE_LIMIT_MAX_WAIT', 30)) # au-delà, la requête est rejetée
+AI_RATE_LIMIT_MAX_QUEUE = int(os.environ.get('AI_RATE_LIMIT_MAX_QUEUE', 100)) # appels en attente par processus
+AI_RETRY_MAX_ATTEMPTS = int(os.environ.get('AI_RETRY_MAX_ATTEMPTS', 4))
+AI_RETRY_BASE_DELAY = 1.0 # secondes, doublé à chaque tentative (gigue complète)
+AI_RETRY_MAX_DELAY = 30.0
+# Flux SSE ouverts simultanément par utilisateur, 0 = illimité (ia_manager/concurrency.py)
+AI_STREAM_MAX_PER_USER = int(os.environ.get('AI_STREAM_MAX_PER_USER', 2))
+# Journal des interactions IA, écrit par lots hors requête (ia_manager/interaction_log.py)
+AI_INTERACTION_LOG_BATCH_SIZE = int(os.environ.get('AI_INTERACTION_LOG_BATCH_SIZE', 100))
+AI_INTERACTION_LOG_FLUSH_SECONDS = float(os.environ.get('AI_INTERACTION_LOG_FLUSH_SECONDS', 2))
+AI_INTERACTION_LOG_MAX_BUFFER = 10_000 # lignes gardées en mémoire si la base est indisponible
+AI_INTERACTION_LOG_SAMPLE_RATE = float(os.environ.get('AI_INTERACTION_LOG_SAMPLE_RATE', 1.0)) # réponses réussies ; erreurs toujours journalisées
+AI_INTERACTION_LOG_MAX_CHARS = int(os.environ.get('AI_INTERACTION_LOG_MAX_CHARS', 10_000))
+AI_INTERACTION_LOG_METADATA = os.environ.get('AI_INTERACTION_LOG_METADATA', 'summary') # 'summary' ou 'full'
+# Prix par million de tokens, par modèle (coût estimé de /api/ia/usage/ ; sans prix, coût non calculé)
+AI_TOKEN_PRICES = {
+    'gemini-2.0-flash': {'prompt': 0.10, 'output': 0.40},
+    'fake-echo': {'prompt': 0, 'output': 0},
+}
+
+
+# --- Logging ---
+# Les vues et services journalisent via `logging.getLogger(__name__)` avec un formatage paresseux
+# (`logger.debug("... %s", valeur)`). Tous les enregistrements passent par `QueueListenerHandler` :
+# le thread de la requête ne fait qu'empiler, l'écriture sur stdout se fait dans un thread dédié.
+LOG_LEVEL = os.environ.get('LOG_LEVEL', 'INFO')
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'formatters': {
+        'verbose': {
+            'format': '{asctime} {levelname} {name} [{process}:{threadName}] {message}',
+            'style': '{',
+        },
+    },
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+            'formatter': 'verbose',
+        },
+        # Doit être trié après 'console' (voir core/log_handlers.py)
+        'queue': {
+            '()': 'core.log_handlers.QueueListenerHandler',
+            'handlers': ['cfg://handlers.console'],
+            'queue_size': int(os.environ.get('LOG_QUEUE_SIZE', 10000)),
+        },
+    },
+    'root': {
+        'handlers': ['queue'],
+        'level': 'WARNING',
+    },
+    'loggers': {
+        'django': {
+            'handlers': ['queue'],
+            'level': os.environ.get('DJANGO_LOG_LEVEL', 'INFO'),
+            'propagate': False,
+        },
+        **{
+            app: {'handlers': ['queue'], 'level': LOG_LEVEL, 'propagate': False}
+            for app in ('core', 'user_auth', 'dynamic_forms', 'ia_manager', 'seo')
+        },
+    },
+}
\ No newline at end of file
@@ -134,8 +134,7 @@ WEBPACK_LOADER['DEFAULT']['STATS_FILE'] = os.path.join(BASE_DIR, 'webpack-stats.
 #     }
 # }
 
-# Logging configuration (important for production)
-# LOGGING = { ... } # Ajoutez une configuration de logging robuste
+# Logging : configuré dans base.py (QueueListenerHandler). Niveau via LOG_LEVEL / DJANGO_LOG_LEVEL.
 
 if not all(active_keys_to_check.values()):
     missing_keys = [k for k, v in active_keys_to_check.items() if not v]
@@ -18,15 +18,18 @@ Including another URLconf
 from django.contrib import admin
 from django.urls import path, include, re_path
 from core.views import BasePageView
+from user_auth.jwks import jwks_view
 
 
 urlpatterns = [
     path('', include("core.urls")),
 
 
+    path('.well-known/jwks.json', jwks_view, name='jwks'),
     path('d-admin/', admin.site.urls),
     path('api/user-auth/', include("user_auth.urls")),
     path('dynamic-form/', include('dynamic_forms.urls')),
+    path('api/ia/', include('ia_manager.urls')),
 
     re_path(r'^(?:.*)/?$', BasePageView.as_view()),
 
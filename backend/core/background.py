@@ -0,0 +1,59 @@
+"""
+Exécution de petites tâches hors du chemin de la requête.
+
+Pool de threads partagé par le processus, sans broker : adapté aux tâches
+courtes et idempotentes (re-hachage d'un mot de passe, écriture différée...).
+Une tâche perdue (redémarrage du worker) ne doit avoir aucune conséquence
+fonctionnelle ; sinon passer par une table persistante.
+
+`BACKGROUND_TASKS_EAGER = True` exécute les tâches immédiatement dans le
+thread appelant (tests, scripts).
+"""
+import logging
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import close_old_connections, connections
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=getattr(settings, 'BACKGROUND_TASKS_MAX_WORKERS', 4),
+                    thread_name_prefix='background',
+                )
+    return _executor
+
+
+def _run(func, args, kwargs):
+    close_old_connections()
+    try:
+        return func(*args, **kwargs)
+    except Exception:
+        logger.exception("Tâche de fond %s en échec", getattr(func, '__qualname__', func))
+        raise
+    finally:
+        # Chaque thread a ses propres connexions : ne pas les laisser ouvertes
+        connections.close_all()
+
+
+def run_in_background(func, *args, **kwargs) -> Future:
+    """Soumet `func(*args, **kwargs)` au pool et retourne le Future associé."""
+    if getattr(settings, 'BACKGROUND_TASKS_EAGER', False):
+        future = Future()
+        try:
+            future.set_result(func(*args, **kwargs))
+        except Exception as exc:
+            logger.exception("Tâche de fond %s en échec", getattr(func, '__qualname__', func))
+            future.set_exception(exc)
+        return future
+    return _get_executor().submit(_run, func, args, kwargs)
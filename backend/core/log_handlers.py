@@ -0,0 +1,48 @@
+import atexit
+import logging
+import queue
+from logging.handlers import QueueHandler, QueueListener
+
+
+class QueueListenerHandler(QueueHandler):
+    """
+    Handler non bloquant : les threads de requête ne font que déposer
+    l'enregistrement dans une file en mémoire, un thread `QueueListener`
+    se charge de l'écriture réelle (stdout, fichier, mail...).
+
+    Utilisable depuis `settings.LOGGING` :
+
+        'queue': {
+            '()': 'core.log_handlers.QueueListenerHandler',
+            'handlers': ['cfg://handlers.console'],
+        }
+
+    Les handlers cibles doivent être déclarés sous un nom trié avant celui
+    de ce handler (dictConfig configure les handlers par ordre alphabétique).
+    """
+
+    def __init__(self, handlers, queue_size=10000, respect_handler_level=True):
+        super().__init__(queue.Queue(maxsize=queue_size))
+        # `handlers` est une ConvertingList : l'accès par index résout les références cfg://
+        targets = [handlers[i] for i in range(len(handlers))]
+        for target in targets:
+            if not isinstance(target, logging.Handler):
+                raise ValueError(f"QueueListenerHandler: handler cible non configuré ({target!r}).")
+        self.listener = QueueListener(self.queue, *targets, respect_handler_level=respect_handler_level)
+        self.listener.start()
+        atexit.register(self.stop_listener)
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            # Sous forte charge on perd un log plutôt que de bloquer la requête.
+            pass
+
+    def stop_listener(self):
+        if self.listener._thread is not None:
+            self.listener.stop()
+
+    def close(self):
+        self.stop_listener()
+        super().close()
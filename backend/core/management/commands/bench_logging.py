@@ -0,0 +1,93 @@
+import logging
+import sys
+import tempfile
+import time
+from contextlib import redirect_stdout
+
+from django.core.management.base import BaseCommand
+
+from core.log_handlers import QueueListenerHandler
+
+
+class Command(BaseCommand):
+    help = (
+        "Mesure le coût par appel des anciens diagnostics print() comparé au logging "
+        "paresseux filtré par niveau et au QueueListenerHandler non bloquant."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=20000)
+        parser.add_argument(
+            '--stream', choices=['file', 'stdout'], default='file',
+            help="Destination des écritures synchrones ('file' = fichier temporaire, 'stdout' = terminal).",
+        )
+        parser.add_argument(
+            '--flush-latency-us', type=int, default=0,
+            help="Latence simulée à chaque flush (pipe stdout saturé, driver de logs du conteneur...).",
+        )
+
+    def handle(self, *args, **options):
+        iterations = options['iterations']
+        errors = {'email': ['Cette adresse email est déjà utilisée.'], 'password2': ['Les mots de passe ne correspondent pas.']}
+
+        with tempfile.TemporaryFile('w+') as tmp:
+            stream = sys.stdout if options['stream'] == 'stdout' else tmp
+            if options['flush_latency_us']:
+                stream = _SlowStream(stream, options['flush_latency_us'] / 1e6)
+
+            def bench(label, func):
+                start = time.perf_counter()
+                for _ in range(iterations):
+                    func()
+                elapsed = time.perf_counter() - start
+                return label, elapsed / iterations * 1e6
+
+            results = []
+
+            # 1. Ancien comportement : print() synchrone avec f-string évaluée à chaque appel.
+            #    flush=True reproduit stdout non bufferisé (PYTHONUNBUFFERED=1 en conteneur).
+            with redirect_stdout(stream):
+                results.append(bench("print(f'...') synchrone", lambda: print(f"Validation errors in UserCreateView: {errors}", flush=True)))
+
+            # 2. Logger paresseux dont le niveau est filtré (DEBUG désactivé en production)
+            gated = self._isolated_logger('bench.gated', logging.INFO, logging.StreamHandler(stream))
+            results.append(bench("logger.debug filtré par niveau", lambda: gated.debug("Validation errors in %s: %s", 'UserCreateView', errors)))
+
+            # 3. Logger actif, StreamHandler synchrone
+            sync = self._isolated_logger('bench.sync', logging.DEBUG, logging.StreamHandler(stream))
+            results.append(bench("logger.warning StreamHandler synchrone", lambda: sync.warning("Validation errors in %s: %s", 'UserCreateView', errors)))
+
+            # 4. Logger actif, QueueListenerHandler (écriture déportée dans un thread)
+            queue_handler = QueueListenerHandler([logging.StreamHandler(stream)], queue_size=iterations + 1)
+            queued = self._isolated_logger('bench.queue', logging.DEBUG, queue_handler)
+            results.append(bench("logger.warning QueueListenerHandler", lambda: queued.warning("Validation errors in %s: %s", 'UserCreateView', errors)))
+            queue_handler.stop_listener()
+
+        baseline = results[0][1]
+        self.stdout.write(
+            f"{iterations} appels par scénario (flux : {options['stream']}, latence flush : {options['flush_latency_us']} µs)"
+        )
+        for label, per_call_us in results:
+            self.stdout.write(f"  {label:<42} {per_call_us:8.2f} µs/appel  (x{baseline / per_call_us:.1f})")
+
+    def _isolated_logger(self, name, level, handler):
+        logger = logging.getLogger(name)
+        logger.handlers = [handler]
+        logger.setLevel(level)
+        logger.propagate = False
+        return logger
+
+
+class _SlowStream:
+    """Enveloppe un flux et ajoute une latence à chaque flush (print et StreamHandler flushent)."""
+
+    def __init__(self, stream, latency):
+        self._stream = stream
+        self._latency = latency
+
+    def write(self, data):
+        return self._stream.write(data)
+
+    def flush(self):
+        time.sleep(self._latency)
+        self._stream.flush()
@@ -3,6 +3,7 @@ from django.http import Http404, HttpResponse
 from django.urls import reverse
 from seo.services import SEOOrchestrator
 from seo.data import PageContext
+from seo.config import seo_config
 from django.views import View
 import os
 from django.conf import settings
@@ -55,4 +56,7 @@ class BasePageView(View):
             'seo': seo_context_data,
         }
       
-        return render(request, "build/index.html", context)
+        response = render(request, "build/index.html", context)
+        if seo_config.server_timing_enabled and page_context.timings:
+            response['Server-Timing'] = page_context.timings.as_server_timing()
+        return response
@@ -3,6 +3,9 @@
 from rest_framework.metadata import SimpleMetadata
 from rest_framework import serializers
 from django.utils.encoding import smart_str # Pour l'encodage correct des noms d'affichage
+import logging
+
+logger = logging.getLogger(__name__)
 
 class DynamicFormMetadata(SimpleMetadata):
     """
@@ -146,7 +149,7 @@ class DynamicFormMetadata(SimpleMetadata):
                          choices.append({"value": None, "display_name": f"... ({queryset.count() - limit} autres)", "disabled": True})
                 except Exception as e:
                     # Logguer l'erreur si la récupération du queryset échoue
-                    print(f"Warning: Could not retrieve choices for related field '{name}': {e}")
+                    logger.warning("Could not retrieve choices for related field '%s': %s", name, e)
                     choices = [] # Fournir une liste vide en cas d'échec
 
             # Assigner les choix s'il y en a
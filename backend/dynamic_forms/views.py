@@ -1,12 +1,15 @@
 from rest_framework.views import APIView
 from rest_framework.response import Response
-from rest_framework import status
+from rest_framework import serializers, status
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.exceptions import NotFound, PermissionDenied, NotAuthenticated
 from django.core.exceptions import ImproperlyConfigured
 from django.shortcuts import get_object_or_404
 from django.http import Http404 
 from dynamic_forms.metadata import DynamicFormMetadata
+import logging
+
+logger = logging.getLogger(__name__)
 
 class DynamicFormView(APIView):
     """
@@ -76,7 +79,7 @@ class DynamicFormView(APIView):
         except Http404:
             raise NotFound("Instance non trouvée.") # Exception API standard
         except Exception as e:
-             print(f"Error during get_object lookup in {self.__class__.__name__}: {e}") # Log
+             logger.exception("Error during get_object lookup in %s: %s", self.__class__.__name__, e)
              raise NotFound("Erreur lors de la récupération de l'instance.") # Masquer les détails
 
         # Vérifier les permissions sur l'objet trouvé
@@ -106,7 +109,7 @@ class DynamicFormView(APIView):
                   instance = self.get_object()
              except (NotFound, PermissionDenied, NotAuthenticated) as e:
                   # Si l'objet n'est pas trouvé ou accessible pour GET/PUT/PATCH, lever l'erreur
-                  print(f"get_serializer: Cannot retrieve object for detail view/update: {e}")
+                  logger.debug("get_serializer: Cannot retrieve object for detail view/update: %s", e)
                   raise e # Relancer l'exception interceptée par DRF
 
         # Passer l'instance (ou None) au serializer
@@ -132,7 +135,7 @@ class DynamicFormView(APIView):
             return Response(metadata)
         except Exception as e:
             # Capturer les erreurs potentielles pendant la génération des métadonnées
-            print(f"Error generating metadata in GET {self.__class__.__name__}: {e}")
+            logger.exception("Error generating metadata in GET %s: %s", self.__class__.__name__, e)
             return Response(
                 {"error": "Erreur lors de la génération de la structure du formulaire."},
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
@@ -172,33 +175,42 @@ class DynamicFormView(APIView):
                 status_code = status.HTTP_201_CREATED if request.method == 'POST' else status.HTTP_200_OK
                 return Response(response_data, status=status_code)
 
+            except serializers.ValidationError as e:
+                 # Erreur de validation découverte à l'écriture (ex: contrainte unique
+                 # violée par une requête concurrente) : même réponse qu'un formulaire invalide
+                 return self._invalid_response(request, e.detail)
+
             except Exception as e:
                  # Gérer les erreurs DANS perform_action (ex: erreur base de données, logique métier)
-                 print(f"ERROR during perform_action in {self.__class__.__name__}: {e}") # Log important
+                 logger.exception("Error during perform_action in %s: %s", self.__class__.__name__, e)
                  return Response(
                     {"error": "Une erreur interne est survenue lors du traitement de votre demande.", "success": False},
                     status=status.HTTP_500_INTERNAL_SERVER_ERROR
                  )
         else:
              # --- ÉCHEC DE LA VALIDATION ---
-             print(f"Validation errors in {self.__class__.__name__}: {serializer.errors}") # Log
+             return self._invalid_response(request, serializer.errors)
 
-             # Générer la structure de base du formulaire pour la réponse
-             # (afin que le frontend puisse afficher le formulaire avec les erreurs)
-             try:
-                metadata_response = self.metadata_class().determine_metadata(request, self)
-             except Exception as e:
-                 # Si même la génération de métadonnées échoue ici, renvoyer juste les erreurs
-                 print(f"Error generating metadata during FAILED submission in {self.__class__.__name__}: {e}")
-                 metadata_response = {} # Partir d'un dict vide
+    def _invalid_response(self, request, errors):
+        """ Réponse 400 contenant la structure du formulaire et les erreurs de validation. """
+        logger.debug("Validation errors in %s: %s", self.__class__.__name__, errors)
+
+        # Générer la structure de base du formulaire pour la réponse
+        # (afin que le frontend puisse afficher le formulaire avec les erreurs)
+        try:
+            metadata_response = self.metadata_class().determine_metadata(request, self)
+        except Exception as e:
+            # Si même la génération de métadonnées échoue ici, renvoyer juste les erreurs
+            logger.exception("Error generating metadata during FAILED submission in %s: %s", self.__class__.__name__, e)
+            metadata_response = {} # Partir d'un dict vide
 
-             # Ajouter les informations d'échec et les erreurs de validation
-             metadata_response['success'] = False
-             metadata_response['message'] = "Le formulaire contient des erreurs. Veuillez corriger les champs indiqués."
-             # CORRECTION : Ajouter la clé 'errors' contenant TOUTES les erreurs
-             metadata_response['errors'] = serializer.errors
+        # Ajouter les informations d'échec et les erreurs de validation
+        metadata_response['success'] = False
+        metadata_response['message'] = "Le formulaire contient des erreurs. Veuillez corriger les champs indiqués."
+        # CORRECTION : Ajouter la clé 'errors' contenant TOUTES les erreurs
+        metadata_response['errors'] = errors
 
-             return Response(metadata_response, status=status.HTTP_400_BAD_REQUEST)
+        return Response(metadata_response, status=status.HTTP_400_BAD_REQUEST)
 
     def perform_action(self, serializer, request, *args, **kwargs):
         """
@@ -231,12 +243,12 @@ class DynamicFormView(APIView):
                    return serializer.validated_data
             except Exception as e:
                 # Capturer les erreurs potentielles de create/update (ex: contraintes DB)
-                print(f"Error DURING serializer.save() in {self.__class__.__name__}.perform_action: {e}")
+                logger.warning("Error DURING serializer.save() in %s.perform_action: %s", self.__class__.__name__, e)
                 # Relancer pour que _handle_submission retourne une erreur 500 ou 400 appropriée
                 raise e
 
         # 3. Fallback ultime : si aucune action n'a été effectuée
-        print(f"Warning: No specific action performed for {self.__class__.__name__}. Returning validated data.")
+        logger.warning("No specific action performed for %s. Returning validated data.", self.__class__.__name__)
         return serializer.validated_data
 
     def get_success_url(self, serializer):
@@ -1,33 +1,90 @@
 from django.contrib import admin
+from django.contrib.admin.widgets import AutocompleteSelect
+from django.db.models import TextField
+from django.db.models.functions import Cast, Substr
 from django.utils.html import format_html
 from django.utils.safestring import mark_safe
+from functools import lru_cache
 import json
+import uuid
 
-try:
-    from pygments import highlight
-    from pygments.lexers import JsonLexer
-    from pygments.formatters import HtmlFormatter
-    PYGMENTS_AVAILABLE = True
-except ImportError:
-    PYGMENTS_AVAILABLE = False
+from ia_manager.admin_utils import EstimatedCountPaginator, KeysetChangeList, UserAutocompleteFilter
+from ia_manager.core import AIManager
+from ia_manager.models import AIBatchJob, IAInteraction
 
-from ia_manager.models import IAInteraction
+# Au-delà, le JSON est affiché sans coloration : Pygments est lent sur les gros documents
+HIGHLIGHT_MAX_CHARS = 20_000
+PREVIEW_CHARS = 50
+
+
+@lru_cache(maxsize=None)
+def _pygments():
+    """Import différé : Pygments n'est chargé qu'à l'affichage de la première fiche."""
+    try:
+        from pygments import highlight
+        from pygments.lexers import JsonLexer
+        from pygments.formatters import HtmlFormatter
+    except ImportError:
+        return None
+    return highlight, JsonLexer, HtmlFormatter
+
+
+@lru_cache(maxsize=None)
+def _highlight_css(cssclass):
+    _, _, HtmlFormatter = _pygments()
+    return HtmlFormatter(style='friendly', cssclass=cssclass).get_style_defs(f'.{cssclass}')
+
+
+class ProviderFilter(admin.SimpleListFilter):
+    """Choix fixes (fournisseurs connus) : pas de SELECT DISTINCT sur toute la table."""
+    title = 'fournisseur'
+    parameter_name = 'provider'
+
+    def lookups(self, request, model_admin):
+        return [(name, name) for name in AIManager.PROVIDERS]
+
+    def queryset(self, request, queryset):
+        if self.value():
+            return queryset.filter(provider=self.value())
+        return queryset
+
+
+class IAInteractionChangeList(KeysetChangeList):
+    def get_queryset(self, request, *args, **kwargs):
+        # La liste n'affiche que le début des JSON : pas de lecture des colonnes complètes
+        return super().get_queryset(request, *args, **kwargs).defer(
+            'input_data', 'output_data', 'metadata'
+        ).annotate(
+            input_preview=Substr(Cast('input_data', TextField()), 1, PREVIEW_CHARS + 1),
+            output_preview=Substr(Cast('output_data', TextField()), 1, PREVIEW_CHARS + 1),
+        )
 
 
 @admin.register(IAInteraction)
 class IAInteractionAdmin(admin.ModelAdmin):
     list_display = ('id', 'user_display', 'created_at', 'model_name', 'has_error', 'short_input_preview', 'short_output_preview') # Changé: timestamp -> created_at
-    list_filter = ('model_name', 'created_at', 'user') # Changé: timestamp -> created_at
-    search_fields = ('id__iexact', 'user__username', 'user__email', 'model_name', 'input_data__icontains', 'output_data__icontains', 'error__icontains')
+    list_filter = (ProviderFilter, 'cache_hit', 'created_at', UserAutocompleteFilter) # Changé: timestamp -> created_at
+    list_select_related = ('user',)
+    # Index trigramme sous PostgreSQL (migration 0005) ; un UUID est cherché par égalité sur l'id
+    search_fields = ('input_data__icontains', 'output_data__icontains', 'error__icontains')
+    search_help_text = "Texte des entrées, sorties ou erreurs, ou identifiant exact de l'interaction."
+    autocomplete_fields = ('user',)
     # Ajout de 'created_at' et 'updated_at' aux readonly_fields
-    readonly_fields = ('id', 'created_at', 'updated_at', 'formatted_input_data', 'formatted_output_data', 'formatted_metadata')
+    readonly_fields = ('id', 'created_at', 'updated_at', 'formatted_input_data', 'formatted_output_data', 'formatted_metadata',
+                       'provider', 'prompt_tokens', 'output_tokens', 'latency_ms', 'cache_hit')
     ordering = ('-created_at',) # Correspond au Meta.ordering, mais explicite ici
+    # Pas de COUNT(*) sur la table entière (voir ia_manager/admin_utils.py)
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
 
     fieldsets = (
         (None, {
             # Changé: timestamp -> created_at. Ajout de updated_at
             'fields': ('id', 'user', 'created_at', 'updated_at', 'model_name')
         }),
+        ('Consommation', {
+            'fields': ('provider', 'prompt_tokens', 'output_tokens', 'latency_ms', 'cache_hit'),
+        }),
         ('Données d\'Entrée', {
             'fields': ('formatted_input_data',),
         }),
@@ -45,6 +102,21 @@ class IAInteractionAdmin(admin.ModelAdmin):
     user_display.short_description = 'Utilisateur'
     user_display.admin_order_field = 'user'
 
+    def get_changelist(self, request, **kwargs):
+        return IAInteractionChangeList
+
+    @property
+    def media(self):
+        # Widget du filtre utilisateur sur la liste
+        return super().media + AutocompleteSelect(IAInteraction._meta.get_field('user'), self.admin_site).media
+
+    def get_search_results(self, request, queryset, search_term):
+        try:
+            pk = uuid.UUID(search_term.strip())
+        except ValueError:
+            return super().get_search_results(request, queryset, search_term)
+        return queryset.filter(pk=pk), False
+
     def has_error(self, obj):
         return bool(obj.error)
     has_error.boolean = True
@@ -56,12 +128,12 @@ class IAInteractionAdmin(admin.ModelAdmin):
         
         json_str = json.dumps(data, indent=2, ensure_ascii=False)
         
-        if PYGMENTS_AVAILABLE:
-            formatter = HtmlFormatter(style='friendly', cssclass=f'highlight-{field_name_for_style}')
-            html_code = highlight(json_str, JsonLexer(), formatter)
-            # Pour une meilleure performance, ajouter ces styles via Media class de ModelAdmin.
-            css = formatter.get_style_defs(f'.highlight-{field_name_for_style}')
-            return mark_safe(f"<style>{css}</style>{html_code}")
+        pygments = _pygments() if len(json_str) <= HIGHLIGHT_MAX_CHARS else None
+        if pygments:
+            highlight, JsonLexer, HtmlFormatter = pygments
+            cssclass = f'highlight-{field_name_for_style}'
+            html_code = highlight(json_str, JsonLexer(), HtmlFormatter(style='friendly', cssclass=cssclass))
+            return mark_safe(f"<style>{_highlight_css(cssclass)}</style>{html_code}")
         else:
             return format_html('<pre>{}</pre>', json_str)
 
@@ -77,16 +149,33 @@ class IAInteractionAdmin(admin.ModelAdmin):
         return self._format_json_field(obj.metadata, "metadata")
     formatted_metadata.short_description = 'Métadonnées (Formatées)'
     
-    def short_preview(self, data, max_len=50):
-        if data is None:
+    def short_preview(self, obj, field_name, max_len=PREVIEW_CHARS):
+        # Sur la liste, début du JSON calculé par la base (voir IAInteractionChangeList)
+        if hasattr(obj, f'{field_name}_preview'):
+            s = getattr(obj, f'{field_name}_preview')
+        else:
+            data = getattr(obj, f'{field_name}_data')
+            s = json.dumps(data) if data is not None else None
+        if s is None:
             return "N/A"
-        s = json.dumps(data)
         return (s[:max_len] + '...') if len(s) > max_len else s
 
     def short_input_preview(self, obj):
-        return self.short_preview(obj.input_data)
+        return self.short_preview(obj, 'input')
     short_input_preview.short_description = 'Aperçu Entrée'
 
     def short_output_preview(self, obj):
-        return self.short_preview(obj.output_data)
-    short_output_preview.short_description = 'Aperçu Sortie'
\ No newline at end of file
+        return self.short_preview(obj, 'output')
+    short_output_preview.short_description = 'Aperçu Sortie'
+
+
+@admin.register(AIBatchJob)
+class AIBatchJobAdmin(admin.ModelAdmin):
+    list_display = ('id', '__str__', 'status', 'processed_count', 'failed_count', 'total_count', 'heartbeat_at')
+    list_filter = ('status', 'target_model')
+    # La progression n'est écrite que par la commande run_ai_batch_job
+    readonly_fields = (
+        'status', 'last_pk', 'total_count', 'processed_count', 'failed_count', 'last_error',
+        'created_at', 'started_at', 'heartbeat_at', 'finished_at',
+    )
+    raw_id_fields = ('created_by',)
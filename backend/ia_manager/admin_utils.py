@@ -0,0 +1,164 @@
+"""
+Briques d'admin pour les grandes tables (IAInteraction : des millions de lignes).
+
+- `EstimatedCountPaginator` : pas de COUNT(*) complet. Sans filtre, sous
+  PostgreSQL, l'estimation du planificateur (pg_class.reltuples) ; avec
+  filtre, un comptage borné à COUNT_LIMIT lignes.
+- `KeysetChangeList` : pagination par curseur (`?after=`) sur l'ordre par
+  défaut (-created_at, -pk) au lieu d'OFFSET, dont le coût croît avec le
+  numéro de page. Un tri choisi dans l'admin revient à la pagination
+  classique.
+- `UserAutocompleteFilter` : filtre utilisateur par recherche (widget
+  autocomplete de l'admin) au lieu d'une liste de tous les utilisateurs.
+"""
+import uuid
+from copy import copy
+from datetime import datetime
+
+from django import forms
+from django.contrib import admin
+from django.contrib.admin.options import IncorrectLookupParameters
+from django.contrib.admin.views.main import ORDER_VAR, ChangeList
+from django.contrib.admin.widgets import AutocompleteSelect
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import Q
+from django.utils.functional import cached_property
+
+# Au-delà, le nombre de résultats affiché est une borne inférieure
+COUNT_LIMIT = 10_000
+# En dessous, l'estimation du planificateur est trop imprécise : comptage exact
+ESTIMATE_THRESHOLD = 100_000
+CURSOR_VAR = 'after'
+
+
+def estimated_row_count(model):
+    """Estimation du nombre de lignes de la table (PostgreSQL), None si indisponible."""
+    connection = connections[model.objects.db]
+    if connection.vendor != 'postgresql':
+        return None
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass", [model._meta.db_table])
+        row = cursor.fetchone()
+    # -1 : table jamais analysée
+    return row[0] if row and row[0] >= 0 else None
+
+
+class EstimatedCountPaginator(Paginator):
+    # True si `count` est l'estimation du planificateur
+    estimated = False
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        if not queryset.query.where:
+            estimate = estimated_row_count(queryset.model)
+            if estimate is not None and estimate >= ESTIMATE_THRESHOLD:
+                self.estimated = True
+                return estimate
+        # COUNT(*) sur une sous-requête LIMIT : coût borné
+        return queryset.order_by()[:COUNT_LIMIT].count()
+
+
+class KeysetChangeList(ChangeList):
+    """
+    ChangeList paginée par curseur : `?after=<created_at>|<pk>` donne la page
+    qui suit cette ligne. Le modèle doit être ordonné par défaut sur
+    (-created_at, -pk).
+    """
+
+    count_limit = COUNT_LIMIT
+
+    def __init__(self, request, *args, **kwargs):
+        self.cursor = request.GET.get(CURSOR_VAR)
+        self.next_page_url = None
+        if self.cursor:
+            # Hors des paramètres de l'admin : les liens de filtre, tri et recherche repartent de la première page
+            request = copy(request)
+            request.GET = request.GET.copy()
+            del request.GET[CURSOR_VAR]
+        super().__init__(request, *args, **kwargs)
+
+    @property
+    def keyset(self) -> bool:
+        return ORDER_VAR not in self.params and not self.show_all
+
+    @property
+    def first_page_url(self) -> str:
+        return self.get_query_string()
+
+    @staticmethod
+    def encode_cursor(obj) -> str:
+        return f"{obj.created_at.isoformat()}|{obj.pk}"
+
+    @staticmethod
+    def decode_cursor(cursor: str):
+        try:
+            created_at, pk = cursor.split('|')
+            return datetime.fromisoformat(created_at), uuid.UUID(pk)
+        except ValueError as e:
+            raise IncorrectLookupParameters(f"Curseur invalide: {cursor}") from e
+
+    def get_results(self, request):
+        if not self.keyset:
+            return super().get_results(request)
+
+        queryset = self.queryset
+        if self.cursor:
+            created_at, pk = self.decode_cursor(self.cursor)
+            queryset = queryset.filter(Q(created_at__lt=created_at) | Q(created_at=created_at, pk__lt=pk))
+        # Une ligne de plus pour savoir s'il existe une page suivante
+        rows = list(queryset[:self.list_per_page + 1])
+        self.result_list = rows[:self.list_per_page]
+        if len(rows) > self.list_per_page:
+            self.next_page_url = self.get_query_string({CURSOR_VAR: self.encode_cursor(self.result_list[-1])})
+
+        self.paginator = self.model_admin.get_paginator(request, self.queryset, self.list_per_page)
+        self.result_count = self.paginator.count
+        self.show_full_result_count = False
+        self.full_result_count = None
+        self.show_admin_actions = True
+        self.can_show_all = False
+        self.multi_page = bool(self.cursor or self.next_page_url)
+
+
+class UserAutocompleteFilter(admin.ListFilter):
+    """Filtre `user` avec le widget autocomplete (recherche du UserAdmin)."""
+    title = 'utilisateur'
+    parameter_name = 'user__id__exact'
+    field_name = 'user'
+    template = 'admin/ia_manager/autocomplete_filter.html'
+
+    def __init__(self, request, params, model, model_admin):
+        super().__init__(request, params, model, model_admin)
+        self.value = params.pop(self.parameter_name, None)
+        field = model._meta.get_field(self.field_name)
+        # Le widget attend les choix d'un ModelChoiceField : seule la valeur sélectionnée est chargée
+        self.widget = forms.ModelChoiceField(
+            queryset=field.remote_field.model._default_manager.all(), required=False,
+            widget=AutocompleteSelect(field, model_admin.admin_site),
+        ).widget
+
+    def has_output(self):
+        return True
+
+    def expected_parameters(self):
+        return [self.parameter_name]
+
+    def queryset(self, request, queryset):
+        if not self.value:
+            return queryset
+        try:
+            return queryset.filter(**{self.parameter_name: self.value})
+        except (ValueError, TypeError) as e:
+            raise IncorrectLookupParameters(e) from e
+
+    def choices(self, changelist):
+        yield {
+            'selected': not self.value,
+            'query_string': changelist.get_query_string(remove=[self.parameter_name]),
+            'display': 'Tous',
+        }
+
+    def render_widget(self):
+        return self.widget.render(self.parameter_name, self.value, attrs={'id': f'filter_{self.field_name}'})
@@ -0,0 +1,142 @@
+"""
+Exécution des tâches IA par lots (`AIBatchJob`).
+
+Pour chaque lot de `batch_size` éléments (ordre des clés primaires, parcours
+par curseur sur `pk`, sans OFFSET) :
+
+1. les prompts sont rendus depuis le template ;
+2. `AIManager.process_many` les envoie au fournisseur, au plus
+   `concurrency` appels simultanés (sans dépasser AI_PROVIDER_CONCURRENCY) ;
+3. les réponses sont écrites par `bulk_update`, et le point de reprise mis à
+   jour, dans une seule transaction.
+
+Un arrêt brutal fait donc au pire refaire le lot en cours. Les éléments en
+échec sont comptés et laissés tels quels : relancer une tâche filtrée sur le
+champ résultat vide les reprend.
+"""
+import json
+import logging
+from datetime import timedelta
+
+from django.apps import apps
+from django.db import transaction
+from django.db.models import F, Q
+from django.template import Context, Template
+from django.utils import timezone
+
+from ia_manager.core import AIManager
+from ia_manager.models import AIBatchJob
+
+logger = logging.getLogger(__name__)
+
+# Une tâche « en cours » sans signe de vie depuis ce délai peut être reprise
+STALE_AFTER = timedelta(minutes=10)
+
+
+class BatchJobError(Exception):
+    pass
+
+
+def get_queryset(job: AIBatchJob):
+    model = apps.get_model(job.target_model)
+    return model._default_manager.filter(**job.filters).order_by('pk')
+
+
+def claim_job(job: AIBatchJob, force: bool = False) -> bool:
+    """Passe la tâche « en cours » si aucun autre processus ne la traite."""
+    now = timezone.now()
+    claimable = Q(status__in=[AIBatchJob.Status.PENDING, AIBatchJob.Status.FAILED]) | Q(
+        status=AIBatchJob.Status.RUNNING, heartbeat_at__lt=now - STALE_AFTER
+    )
+    queryset = AIBatchJob.objects.filter(pk=job.pk)
+    if not force:
+        queryset = queryset.filter(claimable)
+    claimed = queryset.update(status=AIBatchJob.Status.RUNNING, heartbeat_at=now, started_at=job.started_at or now)
+    if claimed:
+        job.refresh_from_db()
+    return bool(claimed)
+
+
+def _extract(job: AIBatchJob, response: str):
+    if not job.result_key:
+        return response
+    try:
+        return json.loads(response)[job.result_key]
+    except (ValueError, KeyError, TypeError) as e:
+        raise BatchJobError(f"Clé '{job.result_key}' absente de la réponse: {e}") from e
+
+
+def process_next_batch(job: AIBatchJob, manager: AIManager, template: Template) -> int:
+    """Traite le lot suivant le point de reprise ; retourne sa taille (0 = terminé)."""
+    queryset = get_queryset(job)
+    if job.last_pk:
+        queryset = queryset.filter(pk__gt=job.last_pk)
+    items = list(queryset[:job.batch_size])
+    if not items:
+        return 0
+
+    prompts = [template.render(Context({'item': item}, autoescape=False)) for item in items]
+    results = manager.process_many(
+        job.created_by, prompts, job.system_instruction or None,
+        max_workers=job.concurrency, **job.request_options
+    )
+
+    updated, failed, last_error = [], 0, ''
+    for item, result in zip(items, results):
+        try:
+            if not result.ok:
+                raise result.error
+            setattr(item, job.result_field, _extract(job, result.response))
+            updated.append(item)
+        except Exception as e:
+            failed += 1
+            last_error = f"{item.pk}: {e}"[:2000]
+
+    with transaction.atomic():
+        if updated:
+            type(items[0])._default_manager.bulk_update(updated, [job.result_field])
+        AIBatchJob.objects.filter(pk=job.pk).update(
+            last_pk=str(items[-1].pk),
+            processed_count=F('processed_count') + len(items),
+            failed_count=F('failed_count') + failed,
+            last_error=last_error or F('last_error'),
+            heartbeat_at=timezone.now(),
+        )
+    job.refresh_from_db()
+    return len(items)
+
+
+def run_job(job: AIBatchJob, max_batches=None, progress=None) -> AIBatchJob:
+    """Traite la tâche (déjà réservée par `claim_job`) jusqu'au bout ou `max_batches` lots."""
+    manager = AIManager(job.provider_name or None)
+    template = Template(job.prompt_template)
+    if job.total_count is None:
+        job.total_count = get_queryset(job).count()
+        AIBatchJob.objects.filter(pk=job.pk).update(total_count=job.total_count)
+
+    batches = 0
+    try:
+        while max_batches is None or batches < max_batches:
+            if not process_next_batch(job, manager, template):
+                AIBatchJob.objects.filter(pk=job.pk).update(
+                    status=AIBatchJob.Status.COMPLETED, finished_at=timezone.now()
+                )
+                break
+            batches += 1
+            if progress:
+                progress(job)
+    except BaseException as e:
+        # Y compris KeyboardInterrupt : la tâche redevient reprenable immédiatement
+        logger.exception("Tâche IA %s interrompue", job.pk)
+        AIBatchJob.objects.filter(pk=job.pk).update(
+            status=AIBatchJob.Status.FAILED, last_error=f"{type(e).__name__}: {e}"[:2000]
+        )
+        raise
+    else:
+        if max_batches is not None and batches >= max_batches:
+            # Arrêt volontaire : reprenable sans attendre STALE_AFTER
+            AIBatchJob.objects.filter(pk=job.pk, status=AIBatchJob.Status.RUNNING).update(
+                status=AIBatchJob.Status.PENDING
+            )
+    job.refresh_from_db()
+    return job
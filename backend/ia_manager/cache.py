@@ -0,0 +1,71 @@
+"""
+Cache des réponses IA, adressé par le contenu de la requête.
+
+Deux requêtes identiques (fournisseur, modèle, instruction système, prompt,
+type MIME...) donnent la même clé : un hash SHA-256 de la requête normalisée,
+où les paramètres omis sont remplacés par les valeurs par défaut du
+fournisseur. La seconde est servie depuis le cache `ai_responses` (durée de
+vie AI_RESPONSE_CACHE_TIMEOUT, taille bornée avec éviction LRU, voir
+CACHES dans les settings) sans appel au fournisseur.
+
+Seules les réponses réussies sont mises en cache. Un appel qui doit rester
+non déterministe passe `use_cache=False` à `AIManager.process_request`.
+"""
+import hashlib
+import inspect
+import json
+from typing import Optional
+
+from django.conf import settings
+from django.core.cache import caches
+from django.utils import timezone
+
+RESPONSE_CACHE_ALIAS = 'ai_responses'
+# Incrémenter pour invalider toutes les entrées (changement de format)
+CACHE_VERSION = 1
+
+
+def _cache():
+    return caches[RESPONSE_CACHE_ALIAS]
+
+
+def get_timeout() -> int:
+    return int(getattr(settings, 'AI_RESPONSE_CACHE_TIMEOUT', 0))
+
+
+def _normalise(value):
+    if isinstance(value, str):
+        return value.strip()
+    return value
+
+
+def make_key(provider_name: str, provider, prompt, system_instruction=None, **kwargs) -> str:
+    """Clé déterministe : paramètres liés à la signature du fournisseur, valeurs par défaut incluses."""
+    bound = inspect.signature(provider.generate_content).bind(prompt, system_instruction, **kwargs)
+    bound.apply_defaults()
+    request = {
+        'provider': provider_name,
+        'model_info': provider.get_model_info(),
+        **{name: _normalise(value) for name, value in bound.arguments.items()},
+    }
+    encoded = json.dumps(request, sort_keys=True, ensure_ascii=False, default=str)
+    return f"v{CACHE_VERSION}:{hashlib.sha256(encoded.encode()).hexdigest()}"
+
+
+def get_cached_response(key: str) -> Optional[dict]:
+    if get_timeout() <= 0:
+        return None
+    return _cache().get(key)
+
+
+def cache_response(key: str, response: dict) -> None:
+    """Garde la réponse traitée et les données de sortie, pas les métadonnées brutes du fournisseur."""
+    timeout = get_timeout()
+    if timeout <= 0:
+        return
+    _cache().set(key, {
+        'input_data': response.get('input_data'),
+        'output_data': response.get('output_data'),
+        'processed_response': response.get('processed_response'),
+        'cached_at': timezone.now().isoformat(),
+    }, timeout=timeout)
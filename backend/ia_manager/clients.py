@@ -0,0 +1,114 @@
+"""
+Clients des fournisseurs d'IA partagés par le processus.
+
+Créer un `genai.Client` par requête ouvre un nouveau pool de connexions
+HTTP (et donc une nouvelle poignée de main TLS) à chaque appel. Les clients
+sont ici créés une fois par processus et par (clé API, URL de base), puis
+réutilisés par tous les threads : httpx garde les connexions ouvertes
+(keep-alive) dans les limites définies par les réglages AI_HTTP_*.
+
+Le pool asynchrone (`client.aio`) est lié à la boucle d'événements où il a
+ouvert ses connexions : `get_async_gemini_client` garde un client par boucle
+(comme les sémaphores de ia_manager/concurrency.py), oublié avec elle.
+
+Après un fork (workers gunicorn lancés avec --preload) les connexions du
+parent ne doivent pas être partagées : les clients sont recréés dans chaque
+processus.
+"""
+import asyncio
+import atexit
+import logging
+import os
+import threading
+import weakref
+from typing import Dict, Optional, Tuple
+
+import httpx
+from django.conf import settings
+from google import genai
+from google.genai import types
+
+logger = logging.getLogger(__name__)
+
+ClientKey = Tuple[str, Optional[str]]
+
+_clients: Dict[ClientKey, genai.Client] = {}
+_async_clients: 'weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[ClientKey, genai.Client]]' = \
+    weakref.WeakKeyDictionary()
+_clients_pid = os.getpid()
+_lock = threading.Lock()
+
+
+def _http_limits() -> httpx.Limits:
+    return httpx.Limits(
+        max_connections=getattr(settings, 'AI_HTTP_MAX_CONNECTIONS', 20),
+        max_keepalive_connections=getattr(settings, 'AI_HTTP_MAX_KEEPALIVE_CONNECTIONS', 10),
+        keepalive_expiry=getattr(settings, 'AI_HTTP_KEEPALIVE_EXPIRY', 60),
+    )
+
+
+def _build_gemini_client(api_key: str, base_url: Optional[str]) -> genai.Client:
+    limits = _http_limits()
+    http_options = types.HttpOptions(
+        base_url=base_url,
+        timeout=getattr(settings, 'AI_HTTP_TIMEOUT_MS', 60_000),
+        client_args={'limits': limits},
+        async_client_args={'limits': limits},
+    )
+    return genai.Client(api_key=api_key, http_options=http_options)
+
+
+def _client_key(api_key: Optional[str]) -> ClientKey:
+    return (api_key or settings.GEMINI_API_KEY, getattr(settings, 'GEMINI_BASE_URL', None) or None)
+
+
+def _forget_parent_clients() -> None:
+    global _clients_pid
+    if _clients_pid != os.getpid():
+        # Processus enfant : ne pas réutiliser les sockets du parent
+        with _lock:
+            if _clients_pid != os.getpid():
+                _clients.clear()
+                _async_clients.clear()
+                _clients_pid = os.getpid()
+
+
+def get_gemini_client(api_key: Optional[str] = None) -> genai.Client:
+    """Client Gemini du processus pour cette clé API (créé au premier appel)."""
+    key = _client_key(api_key)
+    _forget_parent_clients()
+
+    client = _clients.get(key)
+    if client is None:
+        with _lock:
+            client = _clients.get(key)
+            if client is None:
+                client = _clients[key] = _build_gemini_client(*key)
+    return client
+
+
+def get_async_gemini_client(api_key: Optional[str] = None) -> genai.client.AsyncClient:
+    """Client Gemini asynchrone de la boucle courante pour cette clé API."""
+    key = _client_key(api_key)
+    _forget_parent_clients()
+
+    per_loop = _async_clients.setdefault(asyncio.get_running_loop(), {})
+    client = per_loop.get(key)
+    if client is None:
+        client = per_loop[key] = _build_gemini_client(*key)
+    return client.aio
+
+
+@atexit.register
+def close_clients() -> None:
+    """Ferme les pools de connexions (arrêt du processus, tests)."""
+    with _lock:
+        clients = list(_clients.values())
+        _clients.clear()
+        # Pools asynchrones : libérés avec le client (leur boucle n'est pas forcément active ici)
+        _async_clients.clear()
+    for client in clients:
+        try:
+            client.close()
+        except Exception:
+            logger.warning("Fermeture d'un client IA en échec", exc_info=True)
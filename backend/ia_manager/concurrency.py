@@ -0,0 +1,92 @@
+"""
+Limites de concurrence par fournisseur d'IA.
+
+`AI_PROVIDER_CONCURRENCY` fixe, par processus, le nombre maximal d'appels
+simultanés vers chaque fournisseur (défaut `DEFAULT_CONCURRENCY`). Les appels
+synchrones (threads) partagent un sémaphore par fournisseur ; les appels
+asynchrones un `asyncio.Semaphore` par boucle d'événements, car ceux-ci ne
+peuvent pas être partagés entre boucles. Un processus qui mélange les deux
+modes peut donc atteindre deux fois la limite.
+"""
+import asyncio
+import threading
+import weakref
+from typing import Dict
+
+from django.conf import settings
+from django.core.cache import caches
+
+DEFAULT_CONCURRENCY = 4
+DEFAULT_STREAMS_PER_USER = 2
+STREAM_SLOT_PREFIX = 'ia_manager:streams'
+STREAM_SLOT_TIMEOUT = 600  # secondes, bien au-delà d'un flux normal
+
+_thread_limits: Dict[str, threading.BoundedSemaphore] = {}
+_async_limits: 'weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[str, asyncio.Semaphore]]' = \
+    weakref.WeakKeyDictionary()
+_lock = threading.Lock()
+
+
+def get_concurrency(provider_name: str) -> int:
+    return int(getattr(settings, 'AI_PROVIDER_CONCURRENCY', {}).get(provider_name, DEFAULT_CONCURRENCY))
+
+
+def provider_limit(provider_name: str) -> threading.BoundedSemaphore:
+    """Sémaphore du processus pour les appels synchrones (`with provider_limit(...)`)."""
+    semaphore = _thread_limits.get(provider_name)
+    if semaphore is None:
+        with _lock:
+            semaphore = _thread_limits.setdefault(
+                provider_name, threading.BoundedSemaphore(get_concurrency(provider_name))
+            )
+    return semaphore
+
+
+def async_provider_limit(provider_name: str) -> asyncio.Semaphore:
+    """Sémaphore de la boucle courante (`async with async_provider_limit(...)`)."""
+    per_loop = _async_limits.setdefault(asyncio.get_running_loop(), {})
+    semaphore = per_loop.get(provider_name)
+    if semaphore is None:
+        semaphore = per_loop[provider_name] = asyncio.Semaphore(get_concurrency(provider_name))
+    return semaphore
+
+
+def reset_limits() -> None:
+    """Oublie les sémaphores (changement de AI_PROVIDER_CONCURRENCY, tests)."""
+    with _lock:
+        _thread_limits.clear()
+        _async_limits.clear()
+
+
+def _stream_slots():
+    return caches[getattr(settings, 'AI_RATE_LIMIT_CACHE_ALIAS', 'default')]
+
+
+def acquire_stream_slot(user_id) -> bool:
+    """Réserve une place de flux pour `user_id` ; False si la limite est atteinte (0 = illimité)."""
+    limit = getattr(settings, 'AI_STREAM_MAX_PER_USER', DEFAULT_STREAMS_PER_USER)
+    if not limit:
+        return True
+    cache = _stream_slots()
+    key = f'{STREAM_SLOT_PREFIX}:{user_id}'
+    cache.add(key, 0, timeout=STREAM_SLOT_TIMEOUT)
+    try:
+        count = cache.incr(key)
+    except ValueError:
+        # Expiré entre add() et incr()
+        cache.set(key, 1, timeout=STREAM_SLOT_TIMEOUT)
+        count = 1
+    if count > limit:
+        release_stream_slot(user_id)
+        return False
+    return True
+
+
+def release_stream_slot(user_id) -> None:
+    if not getattr(settings, 'AI_STREAM_MAX_PER_USER', DEFAULT_STREAMS_PER_USER):
+        return
+    try:
+        _stream_slots().decr(f'{STREAM_SLOT_PREFIX}:{user_id}')
+    except ValueError:
+        # Clé expirée : plus rien à libérer
+        pass
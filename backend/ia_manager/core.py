@@ -1,39 +1,202 @@
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import closing
+from typing import Any, Iterator, List, NamedTuple, Optional
+
+import asyncio
+import time
+from asgiref.sync import sync_to_async
 from django.conf import settings
-from ia_manager.models import IAInteraction
-from ia_manager.providers import GeminiProvider
+from django.db import connections
+from ia_manager.interaction_log import log_interaction
+from ia_manager.providers import FakeProvider, GeminiProvider
+from ia_manager import cache as response_cache
+from ia_manager.concurrency import async_provider_limit, get_concurrency, provider_limit
+from ia_manager.ratelimit import (
+    RateLimitExceeded, acall_with_limits, actual_tokens, call_with_limits, estimate_tokens, get_limiter,
+)
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def _elapsed_ms(started: Optional[float]) -> Optional[float]:
+    return (time.perf_counter() - started) * 1000 if started is not None else None
 
 
+class AIResult(NamedTuple):
+    """Résultat d'un élément de `process_many` : la réponse, ou l'erreur qui l'a remplacée."""
+    prompt: Any
+    response: Optional[str] = None
+    error: Optional[Exception] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
 
 class AIManager:
     """Gestionnaire principal d'IA"""
     
+    PROVIDERS = {
+        'gemini': GeminiProvider,
+        'fake': FakeProvider, # local, sans réseau (tests, benchmarks)
+        #'openai': OpenAIProvider,
+        # Ajouter d'autres fournisseurs ici
+    }
+
     def __init__(self, provider_name=None):
-        self.provider = self._get_provider(provider_name or settings.DEFAULT_AI_PROVIDER)
+        self.provider_name = provider_name or settings.DEFAULT_AI_PROVIDER
+        self.provider = self._get_provider(self.provider_name)
         
     def _get_provider(self, provider_name):
-        providers = {
-            'gemini': GeminiProvider,
-            #'openai': OpenAIProvider,
-            # Ajouter d'autres fournisseurs ici
-        }
-        return providers[provider_name]()
+        return self.PROVIDERS[provider_name]()
     
-    def process_request(self, user, prompt, system_instruction=None, **kwargs):
-        """Point d'entrée principal pour les requêtes IA"""
-        
+    def process_request(self, user, prompt, system_instruction=None, use_cache=True, **kwargs):
+        """
+        Point d'entrée principal pour les requêtes IA. Une requête identique
+        déjà traitée est servie depuis le cache (voir ia_manager/cache.py),
+        sauf avec `use_cache=False`.
+        """
+        started = time.perf_counter()
+        try:
+            cache_key, cached = self._cache_lookup(prompt, system_instruction, use_cache, kwargs)
+            if cached is not None:
+                return self._handle_cache_hit(user, cached, cache_key, started)
+
+            # Concurrence bornée, budget rpm/tpm et nouvelles tentatives (voir ia_manager/ratelimit.py)
+            with provider_limit(self.provider_name):
+                response_data = call_with_limits(
+                    self.provider_name,
+                    lambda: self.provider.generate_content(prompt, system_instruction, **kwargs),
+                    estimate_tokens(prompt, system_instruction),
+                )
+
+            return self._handle_provider_response(user, response_data, cache_key, started)
+
+        except Exception as e:
+            return self._handle_error(user, e, started)
+
+    async def aprocess_request(self, user, prompt, system_instruction=None, use_cache=True, **kwargs):
+        """Équivalent asynchrone de `process_request` ; l'accès base passe par sync_to_async."""
+        started = time.perf_counter()
+        try:
+            cache_key, cached = self._cache_lookup(prompt, system_instruction, use_cache, kwargs)
+            if cached is not None:
+                return await sync_to_async(self._handle_cache_hit)(user, cached, cache_key, started)
+
+            async with async_provider_limit(self.provider_name):
+                response_data = await acall_with_limits(
+                    self.provider_name,
+                    lambda: self.provider.agenerate_content(prompt, system_instruction, **kwargs),
+                    estimate_tokens(prompt, system_instruction),
+                )
+
+            return await sync_to_async(self._handle_provider_response)(user, response_data, cache_key, started)
+
+        except Exception as e:
+            return await sync_to_async(self._handle_error)(user, e, started)
+
+    def stream_request(self, user, prompt, system_instruction=None, use_cache=True, **kwargs) -> Iterator[str]:
+        """
+        Comme `process_request`, mais générateur des fragments de texte au fil
+        de leur réception. L'interaction (réponse assemblée) est journalisée
+        une seule fois, en fin de flux ; un flux abandonné par l'appelant
+        (`close()`) l'est avec le texte déjà reçu. Une erreur en cours de flux
+        lève AIProcessingError, sans nouvelle tentative : les fragments déjà
+        transmis ne peuvent pas être repris. Le flux occupe une place de
+        AI_PROVIDER_CONCURRENCY jusqu'à sa fin.
+        """
+        started = time.perf_counter()
+        received = []
         try:
-            response_data = self.provider.generate_content(prompt, system_instruction, **kwargs)
+            cache_key, cached = self._cache_lookup(prompt, system_instruction, use_cache, kwargs)
+            if cached is not None:
+                yield self._handle_cache_hit(user, cached, cache_key, started)
+                return
 
-            if not response_data or not response_data.get('processed_response'):
-                # Cela peut arriver si Gemini bloque la réponse pour des raisons de sécurité.
-                # Nous le traitons comme une erreur.
-                print(response_data)
-                raise ValueError("La réponse de l'IA est vide, potentiellement bloquée par les filtres de sécurité.")
+            with provider_limit(self.provider_name):
+                limiter = get_limiter(self.provider_name)
+                estimated = estimate_tokens(prompt, system_instruction)
+                limiter.acquire(estimated)
+                stream = self.provider.generate_content_stream(prompt, system_instruction, **kwargs)
+                with closing(stream):
+                    while True:
+                        try:
+                            chunk = next(stream)
+                        except StopIteration as stop:
+                            response_data = stop.value
+                            break
+                        received.append(chunk)
+                        yield chunk
+                limiter.reconcile(estimated, actual_tokens(response_data))
 
-            return self._handle_response(user, response_data)
+            self._handle_provider_response(user, response_data, cache_key, started)
 
+        except GeneratorExit:
+            if cached is None:  # un succès du cache est déjà journalisé
+                log_interaction(
+                    user=user,
+                    model_name=self.provider.get_model_info(),
+                    input_data={'prompt': str(prompt), 'system_instruction': system_instruction},
+                    output_data=''.join(received),
+                    error="Flux interrompu par l'appelant",
+                    provider=self.provider_name,
+                    latency_ms=_elapsed_ms(started),
+                )
+            raise
         except Exception as e:
-            return self._handle_error(user, e)
+            self._handle_error(user, e, started)
+
+    def process_many(self, user, prompts, system_instruction=None, max_workers=None, **kwargs) -> List[AIResult]:
+        """
+        Traite `prompts` en parallèle (pool de threads, au plus
+        AI_PROVIDER_CONCURRENCY appels simultanés vers le fournisseur).
+        Les résultats sont dans l'ordre des prompts ; une erreur n'interrompt
+        pas les autres éléments.
+        """
+        prompts = list(prompts)
+        if not prompts:
+            return []
+
+        def run(prompt):
+            try:
+                return AIResult(prompt, self.process_request(user, prompt, system_instruction, **kwargs))
+            except AIProcessingError as e:
+                return AIResult(prompt, error=e)
+            finally:
+                # Connexion ouverte par ce thread pour journaliser l'interaction
+                connections.close_all()
+
+        workers = min(max_workers or get_concurrency(self.provider_name), len(prompts))
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='ai') as pool:
+            return list(pool.map(run, prompts))
+
+    async def aprocess_many(self, user, prompts, system_instruction=None, **kwargs) -> List[AIResult]:
+        """Comme `process_many`, sur la boucle asyncio courante."""
+        async def run(prompt):
+            try:
+                return AIResult(prompt, await self.aprocess_request(user, prompt, system_instruction, **kwargs))
+            except AIProcessingError as e:
+                return AIResult(prompt, error=e)
+
+        return list(await asyncio.gather(*(run(prompt) for prompt in prompts)))
+
+    def _cache_lookup(self, prompt, system_instruction, use_cache, kwargs):
+        if not use_cache or response_cache.get_timeout() <= 0:
+            return None, None
+        cache_key = response_cache.make_key(self.provider_name, self.provider, prompt, system_instruction, **kwargs)
+        return cache_key, response_cache.get_cached_response(cache_key)
+
+    def _handle_provider_response(self, user, response_data, cache_key=None, started=None):
+        if not response_data or not response_data.get('processed_response'):
+            # Cela peut arriver si Gemini bloque la réponse pour des raisons de sécurité.
+            # Nous le traitons comme une erreur.
+            logger.warning("Réponse IA vide ou bloquée: %s", response_data)
+            raise ValueError("La réponse de l'IA est vide, potentiellement bloquée par les filtres de sécurité.")
+
+        if cache_key is not None:
+            response_cache.cache_response(cache_key, response_data)
+        return self._handle_response(user, response_data, started)
     
 
     
@@ -44,23 +207,47 @@ class AIManager:
     #             return base64.b64encode(image_file.read()).decode('utf-8')
         # return base64.b64encode(image_file.read()).decode('utf-8')
     
-    def _handle_response(self, user, response):
+    def _handle_response(self, user, response, started=None):
         # Logging de l'interaction
-        IAInteraction.objects.create(
+        log_interaction(
             user=user,
             model_name=self.provider.get_model_info(),
             input_data=response.get('input_data'),
             output_data=response.get('output_data'),
-            metadata=response.get('metadata')
+            metadata=response.get('metadata'),
+            provider=self.provider_name,
+            usage=response.get('usage'),
+            latency_ms=_elapsed_ms(started),
         )
         return response.get('processed_response')
     
-    def _handle_error(self, user, error):
+    def _handle_cache_hit(self, user, cached, cache_key, started=None):
+        # L'interaction reste tracée, marquée comme servie depuis le cache (aucun token consommé)
+        log_interaction(
+            user=user,
+            model_name=self.provider.get_model_info(),
+            input_data=cached.get('input_data'),
+            output_data=cached.get('output_data'),
+            metadata={'cache_hit': True, 'cache_key': cache_key, 'cached_at': cached.get('cached_at')},
+            provider=self.provider_name,
+            usage={'prompt_tokens': 0, 'output_tokens': 0},
+            latency_ms=_elapsed_ms(started),
+            cache_hit=True,
+        )
+        return cached.get('processed_response')
+
+    def _handle_error(self, user, error, started=None):
+        if isinstance(error, RateLimitExceeded):
+            # Rejet local, le fournisseur n'a pas été appelé : pas d'interaction à tracer
+            logger.warning("Requête IA rejetée: %s", error)
+            raise AIProcessingError(f"AI request failed: {str(error)}")
         # Logging des erreurs
-        IAInteraction.objects.create(
+        log_interaction(
             user=user,
             model_name=self.provider.get_model_info(),
-            error=str(error)
+            error=str(error),
+            provider=self.provider_name,
+            latency_ms=_elapsed_ms(started),
         )
         raise AIProcessingError(f"AI request failed: {str(error)}")
 
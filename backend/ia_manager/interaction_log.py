@@ -0,0 +1,182 @@
+"""
+Journalisation des interactions IA hors du chemin de la requête.
+
+`AIManager` n'écrit plus directement dans IAInteraction : `log_interaction`
+construit l'objet et le place dans un tampon du processus, écrit par
+`bulk_create` depuis le pool de tâches de fond dès que le tampon atteint
+AI_INTERACTION_LOG_BATCH_SIZE lignes ou que la plus ancienne attend depuis
+AI_INTERACTION_LOG_FLUSH_SECONDS (vérifié à chaque ajout et en fin de
+requête HTTP), ainsi qu'à l'arrêt du processus.
+
+- Échantillonnage : AI_INTERACTION_LOG_SAMPLE_RATE (0..1) s'applique aux
+  réponses réussies ; les erreurs sont toujours journalisées.
+- Taille : les chaînes de plus de AI_INTERACTION_LOG_MAX_CHARS caractères
+  sont tronquées, et avec AI_INTERACTION_LOG_METADATA = 'summary' seules
+  les métadonnées utiles (usage, version du modèle...) sont gardées au lieu
+  du dump complet de la réponse. Pas de compression applicative :
+  PostgreSQL compresse déjà les grandes valeurs (TOAST) et le JSON resterait
+  lisible dans l'admin.
+
+Une ligne en attente est perdue si le processus est tué brutalement : la
+journalisation est une trace, pas une donnée métier.
+"""
+import atexit
+import json
+import logging
+import random
+import threading
+import time
+from typing import List, Optional
+
+from django.conf import settings
+from django.core.signals import request_finished
+from django.utils import timezone
+
+from core.background import run_in_background
+from ia_manager.models import IAInteraction
+
+logger = logging.getLogger(__name__)
+
+TRUNCATION_MARKER = '… [tronqué]'
+# Clés gardées du dump de la réponse Gemini en mode 'summary'
+SUMMARY_METADATA_KEYS = ('usage_metadata', 'model_version', 'response_id', 'create_time', 'prompt_feedback')
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+def truncate(value, max_chars: int):
+    """Tronque récursivement les chaînes trop longues d'une valeur JSON."""
+    if isinstance(value, str):
+        return value if len(value) <= max_chars else value[:max_chars] + TRUNCATION_MARKER
+    if isinstance(value, dict):
+        return {key: truncate(item, max_chars) for key, item in value.items()}
+    if isinstance(value, list):
+        return [truncate(item, max_chars) for item in value]
+    return value
+
+
+def compact_metadata(metadata):
+    """Métadonnées réduites : le dump JSON complet de la réponse devient un petit dict."""
+    if _setting('AI_INTERACTION_LOG_METADATA', 'summary') != 'summary':
+        return metadata
+    if isinstance(metadata, str):
+        try:
+            metadata = json.loads(metadata)
+        except ValueError:
+            return metadata
+    if not isinstance(metadata, dict):
+        return metadata
+    summary = {key: metadata[key] for key in SUMMARY_METADATA_KEYS if metadata.get(key) is not None}
+    # Les clés propres à l'application (cache_hit...) sont toujours gardées
+    summary.update({key: value for key, value in metadata.items() if key not in SUMMARY_METADATA_KEYS
+                    and not isinstance(value, (dict, list))})
+    return summary
+
+
+class _InteractionBuffer:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pending: List[IAInteraction] = []
+        self._oldest: Optional[float] = None
+        self._flush_scheduled = False
+
+    def __len__(self):
+        return len(self._pending)
+
+    def _due(self) -> bool:
+        return bool(self._pending) and (
+            len(self._pending) >= _setting('AI_INTERACTION_LOG_BATCH_SIZE', 100)
+            or time.monotonic() - self._oldest >= _setting('AI_INTERACTION_LOG_FLUSH_SECONDS', 2.0)
+        )
+
+    def add(self, interaction: IAInteraction) -> None:
+        with self._lock:
+            self._pending.append(interaction)
+            if self._oldest is None:
+                self._oldest = time.monotonic()
+        self.schedule_flush_if_due()
+
+    def schedule_flush_if_due(self) -> None:
+        with self._lock:
+            if self._flush_scheduled or not self._due():
+                return
+            self._flush_scheduled = True
+        run_in_background(self.flush)
+
+    def drain(self) -> List[IAInteraction]:
+        with self._lock:
+            pending, self._pending = self._pending, []
+            self._oldest = None
+            self._flush_scheduled = False
+        return pending
+
+    def flush(self) -> int:
+        pending = self.drain()
+        if not pending:
+            return 0
+        try:
+            IAInteraction.objects.bulk_create(pending, batch_size=500)
+        except Exception:
+            # Base indisponible : on garde les lignes pour le prochain flush, dans la limite du tampon
+            with self._lock:
+                room = max(_setting('AI_INTERACTION_LOG_MAX_BUFFER', 10_000) - len(self._pending), 0)
+                dropped = max(len(pending) - room, 0)
+                self._pending[:0] = pending[dropped:]
+                self._oldest = self._oldest or time.monotonic()
+            if dropped:
+                logger.error("%s interaction(s) IA perdue(s) : tampon plein", dropped)
+            raise
+        return len(pending)
+
+
+_buffer = _InteractionBuffer()
+
+
+def log_interaction(*, user=None, model_name='', input_data=None, output_data=None, metadata=None, error=None,
+                    provider='', usage=None, latency_ms=None, cache_hit=False) -> Optional[IAInteraction]:
+    """
+    Met une interaction en file (retourne None si elle n'est pas échantillonnée).
+    `usage` est le dict {'prompt_tokens', 'output_tokens'} des fournisseurs.
+    """
+    if error is None and random.random() >= _setting('AI_INTERACTION_LOG_SAMPLE_RATE', 1.0):
+        return None
+    max_chars = _setting('AI_INTERACTION_LOG_MAX_CHARS', 10_000)
+    interaction = IAInteraction(
+        user=user,
+        model_name=model_name,
+        input_data=truncate(input_data, max_chars),
+        output_data=truncate(output_data, max_chars),
+        metadata=truncate(compact_metadata(metadata), max_chars) if metadata is not None else {},
+        error=truncate(error, max_chars),
+        provider=provider or '',
+        prompt_tokens=(usage or {}).get('prompt_tokens'),
+        output_tokens=(usage or {}).get('output_tokens'),
+        latency_ms=round(latency_ms) if latency_ms is not None else None,
+        cache_hit=cache_hit,
+        # Heure de l'appel, pas celle de l'écriture différée
+        created_at=timezone.now(),
+    )
+    _buffer.add(interaction)
+    return interaction
+
+
+def flush_interactions() -> int:
+    """Écrit immédiatement les interactions en attente ; retourne leur nombre."""
+    return _buffer.flush()
+
+
+def _flush_after_request(**kwargs):
+    _buffer.schedule_flush_if_due()
+
+
+request_finished.connect(_flush_after_request, dispatch_uid='ia_manager.interaction_log.flush_after_request')
+
+
+@atexit.register
+def _flush_at_exit():
+    try:
+        _buffer.flush()
+    except Exception:
+        logger.exception("Écriture des interactions IA en attente impossible à l'arrêt")
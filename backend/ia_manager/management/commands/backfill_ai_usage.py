@@ -0,0 +1,62 @@
+import json
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from ia_manager.models import IAInteraction
+
+# Fournisseur déduit du nom du modèle pour les interactions antérieures aux colonnes typées
+PROVIDER_PREFIXES = (('gemini', 'gemini'), ('fake', 'fake'))
+FIELDS = ['provider', 'prompt_tokens', 'output_tokens', 'cache_hit']
+
+
+def usage_from_metadata(interaction) -> None:
+    """Renseigne les colonnes typées de `interaction` depuis `metadata` (dump Gemini ou résumé)."""
+    metadata = interaction.metadata
+    if isinstance(metadata, str):
+        try:
+            metadata = json.loads(metadata)
+        except ValueError:
+            metadata = {}
+    if not isinstance(metadata, dict):
+        metadata = {}
+    usage = metadata.get('usage_metadata') or {}
+    interaction.provider = next(
+        (provider for prefix, provider in PROVIDER_PREFIXES if interaction.model_name.startswith(prefix)), ''
+    )
+    interaction.prompt_tokens = usage.get('prompt_token_count')
+    interaction.output_tokens = usage.get('candidates_token_count')
+    interaction.cache_hit = bool(metadata.get('cache_hit'))
+
+
+class Command(BaseCommand):
+    help = (
+        "Renseigne provider / tokens / cache_hit des interactions IA antérieures à la migration "
+        "0004, par lots sur la clé primaire (une transaction courte par lot). Reprenable avec --after."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--pause', type=float, default=0.0, help="Pause (secondes) entre deux lots.")
+        parser.add_argument('--after', help="Reprendre après cette clé primaire (affichée à chaque lot).")
+
+    def handle(self, *args, **options):
+        # Lignes jamais renseignées : le journal actuel écrit toujours le fournisseur
+        queryset = IAInteraction.objects.filter(provider='').only('pk', 'model_name', 'metadata').order_by('pk')
+        last_pk = options['after']
+        total = 0
+        while True:
+            batch = list((queryset.filter(pk__gt=last_pk) if last_pk else queryset)[:options['batch_size']])
+            if not batch:
+                break
+            for interaction in batch:
+                usage_from_metadata(interaction)
+            with transaction.atomic():
+                IAInteraction.objects.bulk_update(batch, FIELDS)
+            last_pk = batch[-1].pk
+            total += len(batch)
+            self.stdout.write(f"{total} interaction(s) traitée(s), dernière clé {last_pk}")
+            if options['pause']:
+                time.sleep(options['pause'])
+        self.stdout.write(f"Terminé : {total} interaction(s).")
@@ -0,0 +1,59 @@
+import asyncio
+import time
+
+from django.core.management.base import BaseCommand
+from django.test import override_settings
+from django.utils import timezone
+
+from ia_manager.concurrency import reset_limits
+from ia_manager.core import AIManager
+from ia_manager.models import IAInteraction
+from ia_manager.providers import FakeProvider
+
+
+class Command(BaseCommand):
+    help = (
+        "Mesure le débit de AIManager (séquentiel, process_many, aprocess_many) avec le "
+        "fournisseur local 'fake', sans réseau. Le cache de réponses est contourné."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=200)
+        parser.add_argument('--latency', type=float, default=0.05, help="Latence simulée par appel (secondes).")
+        parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 8, 32])
+        parser.add_argument('--keep', action='store_true', help="Conserver les IAInteraction créées.")
+
+    def handle(self, *args, **options):
+        count = options['requests']
+        manager = AIManager('fake')
+        manager.provider = FakeProvider(latency=options['latency'])
+        prompts = [f"prompt {i}" for i in range(count)]
+        started_at = timezone.now()
+
+        self.stdout.write(f"{count} requêtes, latence simulée {options['latency'] * 1000:.0f} ms")
+        sample = prompts[:max(1, min(count, 20))]
+        start = time.perf_counter()
+        for prompt in sample:
+            manager.process_request(None, prompt, use_cache=False)
+        self._report('séquentiel', len(sample), time.perf_counter() - start)
+
+        for concurrency in options['concurrency']:
+            reset_limits()
+            with override_settings(AI_PROVIDER_CONCURRENCY={'fake': concurrency}):
+                start = time.perf_counter()
+                results = manager.process_many(None, prompts, use_cache=False, max_workers=concurrency)
+                self._report(f'process_many x{concurrency}', count, time.perf_counter() - start, results)
+
+                start = time.perf_counter()
+                results = asyncio.run(manager.aprocess_many(None, prompts, use_cache=False))
+                self._report(f'aprocess_many x{concurrency}', count, time.perf_counter() - start, results)
+
+        reset_limits()
+        if not options['keep']:
+            IAInteraction.objects.filter(
+                model_name=manager.provider.get_model_info(), created_at__gte=started_at
+            ).delete()
+
+    def _report(self, label, count, elapsed, results=None):
+        errors = sum(1 for result in results or [] if not result.ok)
+        self.stdout.write(f"  {label:<20} {count / elapsed:8.1f} req/s  ({elapsed:.2f} s, {errors} erreur(s))")
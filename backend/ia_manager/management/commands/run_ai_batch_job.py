@@ -0,0 +1,81 @@
+import json
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from ia_manager.batch import claim_job, run_job
+from ia_manager.models import AIBatchJob
+
+
+class Command(BaseCommand):
+    help = (
+        "Crée et/ou exécute une tâche de génération IA par lots (AIBatchJob). "
+        "Relancer avec --job reprend au dernier lot enregistré."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--job', type=int, help="Tâche existante à exécuter ou reprendre.")
+        parser.add_argument('--model', help="Modèle cible 'app_label.ModelName' (création).")
+        parser.add_argument('--filter', default='{}', help="Filtres JSON appliqués au modèle cible.")
+        template = parser.add_mutually_exclusive_group()
+        template.add_argument('--template', help="Template Django du prompt ({{ item }}).")
+        template.add_argument('--template-file')
+        parser.add_argument('--system', default='', help="Instruction système.")
+        parser.add_argument('--result-field')
+        parser.add_argument('--result-key', default='', help="Clé à extraire d'une réponse JSON.")
+        parser.add_argument('--provider', default='')
+        parser.add_argument('--options', default='{}', help="Options JSON du fournisseur (model, response_mime_type...).")
+        parser.add_argument('--batch-size', type=int, default=100)
+        parser.add_argument('--concurrency', type=int)
+        parser.add_argument('--name', default='')
+        parser.add_argument('--user', type=int, help="Utilisateur auquel rattacher les interactions.")
+        parser.add_argument('--max-batches', type=int, help="S'arrêter après N lots (reprenable).")
+        parser.add_argument('--force', action='store_true', help="Reprendre une tâche marquée en cours.")
+
+    def handle(self, *args, **options):
+        job = self._get_job(options) if options['job'] else self._create_job(options)
+        if not claim_job(job, force=options['force']):
+            raise CommandError(f"La tâche {job.pk} est {job.get_status_display().lower()} (--force pour la reprendre).")
+
+        self.stdout.write(f"Tâche {job.pk} : {job.processed_count}/{job.total_count or '?'} déjà traité(s)")
+        job = run_job(job, max_batches=options['max_batches'], progress=self._progress)
+        self.stdout.write(self.style.SUCCESS(
+            f"Tâche {job.pk} {job.get_status_display().lower()} : {job.processed_count} traité(s), "
+            f"{job.failed_count} en échec."
+        ))
+
+    def _get_job(self, options):
+        try:
+            return AIBatchJob.objects.get(pk=options['job'])
+        except AIBatchJob.DoesNotExist:
+            raise CommandError(f"Tâche {options['job']} introuvable.")
+
+    def _create_job(self, options):
+        if not options['model'] or not options['result_field']:
+            raise CommandError("--model et --result-field sont requis pour créer une tâche.")
+        template = options['template']
+        if options['template_file']:
+            with open(options['template_file'], encoding='utf-8') as handle:
+                template = handle.read()
+        if not template:
+            raise CommandError("--template ou --template-file est requis pour créer une tâche.")
+
+        job = AIBatchJob.objects.create(
+            name=options['name'],
+            target_model=options['model'],
+            filters=json.loads(options['filter']),
+            prompt_template=template,
+            system_instruction=options['system'],
+            provider_name=options['provider'],
+            request_options=json.loads(options['options']),
+            result_field=options['result_field'],
+            result_key=options['result_key'],
+            batch_size=options['batch_size'],
+            concurrency=options['concurrency'],
+            created_by=get_user_model().objects.filter(pk=options['user']).first() if options['user'] else None,
+        )
+        self.stdout.write(f"Tâche {job.pk} créée.")
+        return job
+
+    def _progress(self, job):
+        self.stdout.write(f"  {job.processed_count}/{job.total_count} (échecs : {job.failed_count}, reprise après pk={job.last_pk})")
@@ -0,0 +1,49 @@
+# Generated by Django 4.2.4 on 2026-10-19 10:27
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('ia_manager', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AIBatchJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(blank=True, max_length=200)),
+                ('target_model', models.CharField(help_text="Modèle cible, au format 'app_label.ModelName'.", max_length=100)),
+                ('filters', models.JSONField(blank=True, default=dict, help_text='Arguments de .filter() sur le modèle cible.')),
+                ('prompt_template', models.TextField(help_text="Template Django, l'élément courant est disponible sous {{ item }}.")),
+                ('system_instruction', models.TextField(blank=True)),
+                ('provider_name', models.CharField(blank=True, help_text='Vide : DEFAULT_AI_PROVIDER.', max_length=50)),
+                ('request_options', models.JSONField(blank=True, default=dict, help_text='Arguments passés au fournisseur (model, response_mime_type...).')),
+                ('result_field', models.CharField(help_text='Champ du modèle cible qui reçoit la réponse.', max_length=100)),
+                ('result_key', models.CharField(blank=True, help_text='Si renseigné, clé extraite de la réponse JSON.', max_length=100)),
+                ('batch_size', models.PositiveIntegerField(default=100)),
+                ('concurrency', models.PositiveSmallIntegerField(blank=True, help_text='Vide : AI_PROVIDER_CONCURRENCY.', null=True)),
+                ('status', models.CharField(choices=[('pending', 'En attente'), ('running', 'En cours'), ('completed', 'Terminé'), ('failed', 'Interrompu')], default='pending', max_length=10)),
+                ('last_pk', models.CharField(blank=True, help_text='Dernière clé primaire traitée (point de reprise).', max_length=64)),
+                ('total_count', models.PositiveIntegerField(blank=True, null=True)),
+                ('processed_count', models.PositiveIntegerField(default=0)),
+                ('failed_count', models.PositiveIntegerField(default=0)),
+                ('last_error', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('started_at', models.DateTimeField(blank=True, null=True)),
+                ('heartbeat_at', models.DateTimeField(blank=True, null=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('created_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Tâche IA par lots',
+                'verbose_name_plural': 'Tâches IA par lots',
+                'ordering': ['-created_at'],
+            },
+        ),
+    ]
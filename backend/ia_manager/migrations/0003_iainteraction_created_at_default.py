@@ -0,0 +1,19 @@
+# Generated by Django 4.2.4 on 2026-10-19 10:32
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ia_manager', '0002_aibatchjob'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='iainteraction',
+            name='created_at',
+            field=models.DateTimeField(default=django.utils.timezone.now, editable=False),
+        ),
+    ]
@@ -0,0 +1,53 @@
+# Generated by Django 4.2.4 on 2026-10-19 10:38
+
+from django.db import migrations, models
+
+# Les lignes existantes sont renseignées hors migration, par lots :
+# `python manage.py backfill_ai_usage` (ia_manager/management/commands/backfill_ai_usage.py)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ia_manager', '0003_iainteraction_created_at_default'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='iainteraction',
+            name='cache_hit',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddField(
+            model_name='iainteraction',
+            name='latency_ms',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='iainteraction',
+            name='output_tokens',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='iainteraction',
+            name='prompt_tokens',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='iainteraction',
+            name='provider',
+            field=models.CharField(blank=True, max_length=50),
+        ),
+        migrations.AddIndex(
+            model_name='iainteraction',
+            index=models.Index(fields=['created_at'], name='iainteraction_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='iainteraction',
+            index=models.Index(fields=['provider', 'created_at'], name='iainteraction_provider_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='iainteraction',
+            index=models.Index(fields=['user', 'created_at'], name='iainteraction_user_idx'),
+        ),
+    ]
@@ -0,0 +1,42 @@
+from django.db import migrations
+
+# Index des recherches de l'admin (`champ__icontains`, soit UPPER(champ::text) LIKE ...).
+# PostgreSQL uniquement : ignorée sur les autres bases.
+TRIGRAM_INDEXES = {
+    'iainteraction_input_trgm': 'input_data',
+    'iainteraction_output_trgm': 'output_data',
+    'iainteraction_error_trgm': 'error',
+}
+
+
+def create_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    table = schema_editor.quote_name(apps.get_model('ia_manager', 'IAInteraction')._meta.db_table)
+    schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    for name, column in TRIGRAM_INDEXES.items():
+        # CONCURRENTLY : pas de verrou en écriture pendant la construction sur une grosse table
+        schema_editor.execute(
+            f'CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} ON {table} '
+            f'USING gin (UPPER({schema_editor.quote_name(column)}::text) gin_trgm_ops)'
+        )
+
+
+def drop_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for name in TRIGRAM_INDEXES:
+        schema_editor.execute(f'DROP INDEX CONCURRENTLY IF EXISTS {name}')
+
+
+class Migration(migrations.Migration):
+    # CREATE INDEX CONCURRENTLY ne peut pas s'exécuter dans une transaction
+    atomic = False
+
+    dependencies = [
+        ('ia_manager', '0004_iainteraction_usage_columns'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_trigram_indexes, drop_trigram_indexes),
+    ]
@@ -1,5 +1,6 @@
 import uuid
 from django.db import models
+from django.utils import timezone
 from user_auth.models import User
 
 class IAInteraction(models.Model): 
@@ -10,12 +11,74 @@ class IAInteraction(models.Model):
     output_data = models.JSONField(null=True, blank=True)
     metadata = models.JSONField(default=dict)
     error = models.TextField(null=True, blank=True)
-    created_at = models.DateTimeField(auto_now_add=True)
+    # Colonnes typées pour les agrégats (coût, latence) sans décoder `metadata`, voir ia_manager/usage.py
+    provider = models.CharField(max_length=50, blank=True)
+    prompt_tokens = models.PositiveIntegerField(null=True, blank=True)
+    output_tokens = models.PositiveIntegerField(null=True, blank=True)
+    latency_ms = models.PositiveIntegerField(null=True, blank=True)
+    cache_hit = models.BooleanField(default=False)
+    # Renseigné à l'appel et non à l'écriture, différée (voir ia_manager/interaction_log.py)
+    created_at = models.DateTimeField(default=timezone.now, editable=False)
     updated_at = models.DateTimeField(auto_now=True)
     class Meta:
         verbose_name = "Interaction IA"
         verbose_name_plural = "Interactions IA"
         ordering = ['-created_at']  # Pour trier par date de création décroissante
+        indexes = [
+            # Agrégats sur une période, globaux ou par fournisseur / utilisateur
+            models.Index(fields=['created_at'], name='iainteraction_created_idx'),
+            models.Index(fields=['provider', 'created_at'], name='iainteraction_provider_idx'),
+            models.Index(fields=['user', 'created_at'], name='iainteraction_user_idx'),
+        ]
+
+    def __str__(self):
+        return f"Interaction IA - {self.created_at.strftime('%Y-%m-%d %H:%M')}"
+
+class AIBatchJob(models.Model):
+    """
+    Génération IA sur tout un queryset (ex: descriptions SEO d'un catalogue).
+
+    Les éléments sont traités par lots, dans l'ordre des clés primaires ; le
+    résultat de chaque lot et le point de reprise (`last_pk`) sont écrits dans
+    la même transaction : après un arrêt, la commande `run_ai_batch_job`
+    reprend au premier lot non enregistré. Voir ia_manager/batch.py.
+    """
+
+    class Status(models.TextChoices):
+        PENDING = 'pending', 'En attente'
+        RUNNING = 'running', 'En cours'
+        COMPLETED = 'completed', 'Terminé'
+        FAILED = 'failed', 'Interrompu'
+
+    name = models.CharField(max_length=200, blank=True)
+    target_model = models.CharField(max_length=100, help_text="Modèle cible, au format 'app_label.ModelName'.")
+    filters = models.JSONField(default=dict, blank=True, help_text="Arguments de .filter() sur le modèle cible.")
+    prompt_template = models.TextField(help_text="Template Django, l'élément courant est disponible sous {{ item }}.")
+    system_instruction = models.TextField(blank=True)
+    provider_name = models.CharField(max_length=50, blank=True, help_text="Vide : DEFAULT_AI_PROVIDER.")
+    request_options = models.JSONField(default=dict, blank=True, help_text="Arguments passés au fournisseur (model, response_mime_type...).")
+    result_field = models.CharField(max_length=100, help_text="Champ du modèle cible qui reçoit la réponse.")
+    result_key = models.CharField(max_length=100, blank=True, help_text="Si renseigné, clé extraite de la réponse JSON.")
+    batch_size = models.PositiveIntegerField(default=100)
+    concurrency = models.PositiveSmallIntegerField(null=True, blank=True, help_text="Vide : AI_PROVIDER_CONCURRENCY.")
+
+    status = models.CharField(max_length=10, choices=Status.choices, default=Status.PENDING)
+    last_pk = models.CharField(max_length=64, blank=True, help_text="Dernière clé primaire traitée (point de reprise).")
+    total_count = models.PositiveIntegerField(null=True, blank=True)
+    processed_count = models.PositiveIntegerField(default=0)
+    failed_count = models.PositiveIntegerField(default=0)
+    last_error = models.TextField(blank=True)
+
+    created_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    heartbeat_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        verbose_name = "Tâche IA par lots"
+        verbose_name_plural = "Tâches IA par lots"
+        ordering = ['-created_at']
 
     def __str__(self):
-        return f"Interaction IA - {self.created_at.strftime('%Y-%m-%d %H:%M')}"
\ No newline at end of file
+        return self.name or f"{self.target_model} → {self.result_field}"
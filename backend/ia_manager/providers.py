@@ -1,12 +1,18 @@
 
+import asyncio
+import json
+import re
+import time
 from abc import ABC, abstractmethod
-from google import genai
+from contextlib import closing
 from google.genai import types
 from django.conf import settings
+from ia_manager.clients import get_async_gemini_client, get_gemini_client
 
 
 
 GEMINI_MODEL = "gemini-2.0-flash"
+FAKE_MODEL = "fake-echo"
 
 class AIProviderBase(ABC):
     """Interface de base pour les fournisseurs d'IA"""
@@ -14,6 +20,22 @@ class AIProviderBase(ABC):
     @abstractmethod
     def generate_content(self, prompt, system_instruction=None,  **kwargs):
         pass
+
+    async def agenerate_content(self, prompt, system_instruction=None, **kwargs):
+        """Version asynchrone ; par défaut l'appel synchrone est exécuté dans un thread."""
+        return await asyncio.to_thread(self.generate_content, prompt, system_instruction, **kwargs)
+
+    def generate_content_stream(self, prompt, system_instruction=None, **kwargs):
+        """
+        Générateur des fragments de texte de la réponse, au fil de leur
+        réception. Sa valeur de retour (`result = yield from ...`) est le
+        résultat complet, au format de `generate_content`. Par défaut, un seul
+        fragment : la réponse entière.
+        """
+        result = self.generate_content(prompt, system_instruction, **kwargs)
+        if result and result.get('processed_response'):
+            yield result['processed_response']
+        return result
     
     @abstractmethod
     def get_model_info(self):
@@ -21,31 +43,116 @@ class AIProviderBase(ABC):
     
 class GeminiProvider(AIProviderBase):
     def generate_content(self,  prompt, system_instruction=None,model=GEMINI_MODEL, response_mime_type="application/json"):
-        client = genai.Client(api_key=settings.GEMINI_API_KEY)
+        # Client partagé : connexions HTTP réutilisées d'un appel à l'autre
+        client = get_gemini_client()
 
         response = client.models.generate_content(
             model=model,
-            config=types.GenerateContentConfig(
-                system_instruction=system_instruction,
-                max_output_tokens=1024,
-                response_mime_type=response_mime_type
-                ),
+            config=self._config(system_instruction, response_mime_type),
+            contents=prompt,
+        )
+        return self._to_result(prompt, system_instruction, response)
+
+    async def agenerate_content(self, prompt, system_instruction=None, model=GEMINI_MODEL, response_mime_type="application/json"):
+        # Client asynchrone natif du SDK (un par boucle) : pas de thread bloqué pendant l'appel
+        response = await get_async_gemini_client().models.generate_content(
+            model=model,
+            config=self._config(system_instruction, response_mime_type),
             contents=prompt,
         )
+        return self._to_result(prompt, system_instruction, response)
+
+    def generate_content_stream(self, prompt, system_instruction=None, model=GEMINI_MODEL, response_mime_type="application/json"):
+        stream = get_gemini_client().models.generate_content_stream(
+            model=model,
+            config=self._config(system_instruction, response_mime_type),
+            contents=prompt,
+        )
+        texts, last = [], None
+        # Flux abandonné par l'appelant : la réponse HTTP est fermée aussitôt
+        with closing(stream):
+            for chunk in stream:
+                last = chunk
+                if chunk.text:
+                    texts.append(chunk.text)
+                    yield chunk.text
+        return self._to_result(prompt, system_instruction, last, text=''.join(texts))
+
+    @staticmethod
+    def _config(system_instruction, response_mime_type):
+        return types.GenerateContentConfig(
+            system_instruction=system_instruction,
+            max_output_tokens=1024,
+            response_mime_type=response_mime_type
+        )
 
-        
-        
+    @staticmethod
+    def _to_result(prompt, system_instruction, response, text=None):
+        # En flux, `response` est le dernier fragment (usage cumulé) et `text` le texte assemblé
+        text = response.text if text is None else text
+        usage = response.usage_metadata if response else None
         return {
             'input_data': {'prompt': str(prompt), 'system_instruction': system_instruction},
-            'output_data': response.text,
-            'metadata': response.model_dump_json(),
-            'processed_response': response.text
+            'output_data': text,
+            'metadata': response.model_dump_json() if response else '{}',
+            'processed_response': text,
+            'usage': {
+                'prompt_tokens': usage.prompt_token_count if usage else None,
+                'output_tokens': usage.candidates_token_count if usage else None,
+            },
         }
     
     def get_model_info(self):
         return GEMINI_MODEL
 
 
+class FakeProvider(AIProviderBase):
+    """
+    Fournisseur local, sans réseau, pour les tests et les benchmarks : renvoie
+    le prompt en écho après `latency` secondes (AI_FAKE_PROVIDER_LATENCY).
+    """
+
+    def __init__(self, latency=None):
+        self.latency = getattr(settings, 'AI_FAKE_PROVIDER_LATENCY', 0.0) if latency is None else latency
+
+    def generate_content(self, prompt, system_instruction=None, model=FAKE_MODEL, response_mime_type="application/json"):
+        if self.latency:
+            time.sleep(self.latency)
+        return self._to_result(prompt, system_instruction, model, response_mime_type)
+
+    async def agenerate_content(self, prompt, system_instruction=None, model=FAKE_MODEL, response_mime_type="application/json"):
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        return self._to_result(prompt, system_instruction, model, response_mime_type)
+
+    def generate_content_stream(self, prompt, system_instruction=None, model=FAKE_MODEL, response_mime_type="application/json"):
+        # Un fragment par mot, la latence répartie entre les fragments
+        result = self._to_result(prompt, system_instruction, model, response_mime_type)
+        chunks = re.findall(r'\s*\S+\s*', result['processed_response'])
+        for chunk in chunks:
+            if self.latency:
+                time.sleep(self.latency / len(chunks))
+            yield chunk
+        return result
+
+    @staticmethod
+    def _to_result(prompt, system_instruction, model, response_mime_type):
+        if response_mime_type == "application/json":
+            text = json.dumps({'echo': str(prompt)}, ensure_ascii=False)
+        else:
+            text = str(prompt)
+        return {
+            'input_data': {'prompt': str(prompt), 'system_instruction': system_instruction},
+            'output_data': text,
+            'metadata': json.dumps({'model_version': model}),
+            'processed_response': text,
+            'usage': {'prompt_tokens': len(str(prompt)) // 4 + 1, 'output_tokens': len(text) // 4 + 1},
+        }
+
+    def get_model_info(self):
+        return FAKE_MODEL
+
+
 
 
 
@@ -0,0 +1,304 @@
+"""
+Limitation de débit et nouvelles tentatives par fournisseur d'IA.
+
+Chaque appel consomme un jeton du seau « requêtes » et une estimation de
+tokens du seau « tokens » du fournisseur (AI_PROVIDER_RATE_LIMITS : rpm et
+tpm). Les seaux se remplissent en continu au débit autorisé, avec une
+capacité de `burst_seconds` secondes de débit :
+
+- avec Redis (cache AI_RATE_LIMIT_CACHE_ALIAS), les seaux sont partagés par
+  tous les workers : un script Lua lit, remplit et débite le seau de façon
+  atomique, à l'horloge du serveur Redis ;
+- sinon les seaux sont propres au processus.
+
+Un appel qui n'obtient pas ses jetons attend son tour ; il est rejeté
+(`RateLimitExceeded`, sans appel au fournisseur) si l'attente dépasserait
+AI_RATE_LIMIT_MAX_WAIT ou si AI_RATE_LIMIT_MAX_QUEUE appels attendent déjà
+dans le processus. Les erreurs transitoires (429, 5xx, réseau) sont
+retentées avec un délai exponentiel à gigue complète. Après l'appel, l'écart
+entre tokens estimés et tokens réellement consommés est régularisé.
+
+`get_metrics()` expose, par fournisseur, la file d'attente et les compteurs
+du processus.
+"""
+import asyncio
+import logging
+import random
+import threading
+import time
+from collections import defaultdict
+from typing import Callable, Dict, Optional
+
+import httpx
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.redis import RedisCache
+
+logger = logging.getLogger(__name__)
+
+RATE_LIMIT_PREFIX = 'ia_manager:ratelimit'
+DEFAULT_BURST_SECONDS = 10
+TRANSIENT_STATUS_CODES = {408, 429, 500, 502, 503, 504}
+METRIC_NAMES = ('waiting', 'peak_waiting', 'granted', 'shed', 'retries', 'throttled_seconds')
+
+_TOKEN_BUCKET_LUA = """
+local rate = tonumber(ARGV[1])
+local capacity = tonumber(ARGV[2])
+local cost = tonumber(ARGV[3])
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1]) or capacity
+local ts = tonumber(state[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+local wait = 0
+if tokens >= cost then
+  tokens = math.min(capacity, tokens - cost)
+else
+  wait = (cost - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'ts', now)
+redis.call('EXPIRE', KEYS[1], math.ceil(capacity / rate) + 1)
+return tostring(wait)
+"""
+
+
+class RateLimitExceeded(Exception):
+    """Appel rejeté localement : le budget du fournisseur est épuisé pour trop longtemps."""
+
+
+class LocalTokenBucket:
+    """Seaux à jetons du processus (sans Redis)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._state: Dict[str, tuple] = {}
+
+    def take(self, key: str, rate: float, capacity: float, cost: float) -> float:
+        """Débite `cost` jetons si possible ; sinon retourne l'attente nécessaire (secondes)."""
+        with self._lock:
+            now = time.monotonic()
+            tokens, ts = self._state.get(key, (capacity, now))
+            tokens = min(capacity, tokens + max(0.0, now - ts) * rate)
+            wait = 0.0
+            if tokens >= cost:
+                tokens = min(capacity, tokens - cost)
+            else:
+                wait = (cost - tokens) / rate
+            self._state[key] = (tokens, now)
+            return wait
+
+
+class RedisTokenBucket:
+    """Seaux à jetons partagés, un hash Redis par seau."""
+
+    def __init__(self, cache: RedisCache):
+        self._cache = cache
+        self._script = None
+
+    def take(self, key: str, rate: float, capacity: float, cost: float) -> float:
+        client = self._cache._cache.get_client(write=True)
+        if self._script is None:
+            self._script = client.register_script(_TOKEN_BUCKET_LUA)
+        return float(self._script(keys=[self._cache.make_key(key)], args=[rate, capacity, cost], client=client))
+
+
+class ProviderRateLimiter:
+    def __init__(self, provider_name: str, bucket):
+        self.provider_name = provider_name
+        self.bucket = bucket
+        self._lock = threading.Lock()
+        self.metrics = defaultdict(float, dict.fromkeys(METRIC_NAMES, 0))
+
+    @property
+    def limits(self) -> dict:
+        return getattr(settings, 'AI_PROVIDER_RATE_LIMITS', {}).get(self.provider_name, {})
+
+    def _buckets(self, estimated_tokens: int):
+        limits = self.limits
+        burst = limits.get('burst_seconds', DEFAULT_BURST_SECONDS)
+        for name, cost in (('rpm', 1), ('tpm', estimated_tokens)):
+            per_minute = limits.get(name)
+            if per_minute and cost:
+                rate = per_minute / 60
+                capacity = max(rate * burst, 1)
+                # Un coût supérieur à la capacité ne serait jamais satisfait
+                yield f"{RATE_LIMIT_PREFIX}:{self.provider_name}:{name}", rate, capacity, min(cost, capacity)
+
+    def _count(self, name: str, value: float = 1) -> None:
+        with self._lock:
+            self.metrics[name] += value
+
+    def _next_wait(self, estimated_tokens: int, deadline: float, granted: set) -> float:
+        """
+        Débite les seaux pas encore obtenus (`granted`) ; retourne 0 si tout est
+        accordé, sinon l'attente avant de réessayer.
+        """
+        for key, rate, capacity, cost in self._buckets(estimated_tokens):
+            if key in granted:
+                continue
+            wait = self.bucket.take(key, rate, capacity, cost)
+            if wait:
+                if time.monotonic() + wait > deadline:
+                    self._count('shed')
+                    raise RateLimitExceeded(
+                        f"Limite de débit {self.provider_name} atteinte (attente estimée {wait:.1f} s)"
+                    )
+                return wait
+            granted.add(key)
+        return 0.0
+
+    def _enter_queue(self) -> float:
+        max_queue = getattr(settings, 'AI_RATE_LIMIT_MAX_QUEUE', 100)
+        with self._lock:
+            if self.metrics['waiting'] >= max_queue:
+                self.metrics['shed'] += 1
+                raise RateLimitExceeded(f"File d'attente {self.provider_name} pleine ({max_queue} appels)")
+            self.metrics['waiting'] += 1
+            self.metrics['peak_waiting'] = max(self.metrics['peak_waiting'], self.metrics['waiting'])
+        return time.monotonic() + getattr(settings, 'AI_RATE_LIMIT_MAX_WAIT', 30)
+
+    def acquire(self, estimated_tokens: int = 0) -> None:
+        """Bloque jusqu'à obtention des jetons, ou lève RateLimitExceeded."""
+        if not self.limits:
+            return
+        deadline = self._enter_queue()
+        started = time.monotonic()
+        granted = set()
+        try:
+            while True:
+                wait = self._next_wait(estimated_tokens, deadline, granted)
+                if not wait:
+                    break
+                time.sleep(wait)
+            self._count('granted')
+        finally:
+            self._leave_queue(started)
+
+    async def aacquire(self, estimated_tokens: int = 0) -> None:
+        if not self.limits:
+            return
+        deadline = self._enter_queue()
+        started = time.monotonic()
+        granted = set()
+        try:
+            while True:
+                wait = self._next_wait(estimated_tokens, deadline, granted)
+                if not wait:
+                    break
+                await asyncio.sleep(wait)
+            self._count('granted')
+        finally:
+            self._leave_queue(started)
+
+    def _leave_queue(self, started: float) -> None:
+        with self._lock:
+            self.metrics['waiting'] -= 1
+            self.metrics['throttled_seconds'] += time.monotonic() - started
+
+    def reconcile(self, estimated_tokens: int, actual_tokens: Optional[int]) -> None:
+        """Régularise le seau « tokens » (coût négatif = restitution)."""
+        if actual_tokens is None or actual_tokens == estimated_tokens:
+            return
+        for key, rate, capacity, _ in self._buckets(1):
+            if key.endswith(':tpm'):
+                self.bucket.take(key, rate, capacity, actual_tokens - estimated_tokens)
+
+
+_limiters: Dict[str, ProviderRateLimiter] = {}
+_limiters_lock = threading.Lock()
+
+
+def _make_bucket():
+    cache = caches[getattr(settings, 'AI_RATE_LIMIT_CACHE_ALIAS', 'default')]
+    return RedisTokenBucket(cache) if isinstance(cache, RedisCache) else LocalTokenBucket()
+
+
+def get_limiter(provider_name: str) -> ProviderRateLimiter:
+    limiter = _limiters.get(provider_name)
+    if limiter is None:
+        with _limiters_lock:
+            limiter = _limiters.get(provider_name)
+            if limiter is None:
+                limiter = _limiters[provider_name] = ProviderRateLimiter(provider_name, _make_bucket())
+    return limiter
+
+
+def reset_limiters() -> None:
+    with _limiters_lock:
+        _limiters.clear()
+
+
+def get_metrics() -> Dict[str, dict]:
+    """Compteurs du processus par fournisseur : waiting (profondeur de file), peak_waiting, granted, shed, retries..."""
+    return {name: dict(limiter.metrics) for name, limiter in list(_limiters.items())}
+
+
+# --- Nouvelles tentatives --------------------------------------------------
+
+def is_transient(error: Exception) -> bool:
+    code = getattr(error, 'code', None) or getattr(error, 'status_code', None)
+    if isinstance(code, int):
+        return code in TRANSIENT_STATUS_CODES
+    return isinstance(error, (httpx.TransportError, TimeoutError, ConnectionError))
+
+
+def backoff_delay(attempt: int) -> float:
+    """Délai exponentiel à gigue complète : uniforme entre 0 et min(plafond, base * 2^(n-1))."""
+    base = getattr(settings, 'AI_RETRY_BASE_DELAY', 1.0)
+    cap = getattr(settings, 'AI_RETRY_MAX_DELAY', 30.0)
+    return random.uniform(0, min(cap, base * 2 ** (attempt - 1)))
+
+
+def estimate_tokens(prompt, system_instruction=None, max_output_tokens: int = 1024) -> int:
+    """Estimation grossière avant l'appel (~4 caractères par token), régularisée ensuite."""
+    return (len(str(prompt)) + len(system_instruction or '')) // 4 + max_output_tokens
+
+
+def actual_tokens(result) -> Optional[int]:
+    usage = (result or {}).get('usage') or {}
+    if usage.get('prompt_tokens') is None and usage.get('output_tokens') is None:
+        return None
+    return (usage.get('prompt_tokens') or 0) + (usage.get('output_tokens') or 0)
+
+
+def call_with_limits(provider_name: str, func: Callable, estimated_tokens: int):
+    """Appelle `func()` dans le budget du fournisseur, avec nouvelles tentatives."""
+    limiter = get_limiter(provider_name)
+    max_attempts = getattr(settings, 'AI_RETRY_MAX_ATTEMPTS', 4)
+    for attempt in range(1, max_attempts + 1):
+        limiter.acquire(estimated_tokens)
+        try:
+            result = func()
+        except Exception as e:
+            if attempt == max_attempts or not is_transient(e):
+                raise
+            limiter._count('retries')
+            delay = backoff_delay(attempt)
+            logger.warning("Erreur transitoire %s (tentative %s), nouvel essai dans %.1f s: %s",
+                           provider_name, attempt, delay, e)
+            time.sleep(delay)
+            continue
+        limiter.reconcile(estimated_tokens, actual_tokens(result))
+        return result
+
+
+async def acall_with_limits(provider_name: str, func: Callable, estimated_tokens: int):
+    """Version asynchrone de `call_with_limits` (`func` retourne une coroutine)."""
+    limiter = get_limiter(provider_name)
+    max_attempts = getattr(settings, 'AI_RETRY_MAX_ATTEMPTS', 4)
+    for attempt in range(1, max_attempts + 1):
+        await limiter.aacquire(estimated_tokens)
+        try:
+            result = await func()
+        except Exception as e:
+            if attempt == max_attempts or not is_transient(e):
+                raise
+            limiter._count('retries')
+            delay = backoff_delay(attempt)
+            logger.warning("Erreur transitoire %s (tentative %s), nouvel essai dans %.1f s: %s",
+                           provider_name, attempt, delay, e)
+            await asyncio.sleep(delay)
+            continue
+        limiter.reconcile(estimated_tokens, actual_tokens(result))
+        return result
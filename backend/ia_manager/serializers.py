@@ -0,0 +1,16 @@
+from rest_framework import serializers
+
+from ia_manager.usage import GROUPINGS
+
+
+class AIStreamRequestSerializer(serializers.Serializer):
+    prompt = serializers.CharField(max_length=20000)
+    system_instruction = serializers.CharField(max_length=5000, required=False, allow_blank=True)
+    response_mime_type = serializers.ChoiceField(
+        choices=('text/plain', 'application/json'), default='text/plain'
+    )
+
+
+class AIUsageQuerySerializer(serializers.Serializer):
+    days = serializers.IntegerField(min_value=1, max_value=366, default=30)
+    group_by = serializers.ChoiceField(choices=tuple(GROUPINGS), default='model')
@@ -1,3 +1,674 @@
-from django.test import TestCase
+import asyncio
+import json
+import threading
+import time
+from datetime import timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.conf import settings
+from django.core.cache import caches
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from google.genai import errors as genai_errors
+from rest_framework.test import APIClient
+
+from ia_manager import clients, interaction_log, ratelimit, usage
+from ia_manager.admin import IAInteractionAdmin
+from ia_manager.concurrency import reset_limits
+from ia_manager.core import AIManager, AIProcessingError
+from ia_manager.interaction_log import flush_interactions
+from ia_manager.models import AIBatchJob, IAInteraction
+from ia_manager.providers import FakeProvider, GeminiProvider
+from ia_manager.utils import IAManager
+from user_auth.models import User
+
+
+class StubGeminiHandler(BaseHTTPRequestHandler):
+    """Répond comme l'endpoint generateContent de Gemini, en HTTP/1.1 (keep-alive)."""
+    protocol_version = 'HTTP/1.1'
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+        self.server.requests.append((self.path, body))
+        self.server.connections.add(self.client_address)
+        reply = self.server.reply
+        if ':streamGenerateContent' in self.path:
+            # Réponse en deux fragments SSE, l'usage sur le dernier
+            middle = len(reply) // 2
+            payload = ''.join(
+                f"data: {json.dumps(self._response(text, last))}\r\n\r\n"
+                for text, last in ((reply[:middle], False), (reply[middle:], True))
+            ).encode()
+            content_type = 'text/event-stream'
+        else:
+            payload = json.dumps(self._response(reply, True)).encode()
+            content_type = 'application/json'
+        self.send_response(200)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    @staticmethod
+    def _response(text, last):
+        response = {
+            'candidates': [{
+                'content': {'role': 'model', 'parts': [{'text': text}]},
+                **({'finishReason': 'STOP'} if last else {}),
+            }],
+            'modelVersion': 'gemini-2.0-flash',
+        }
+        if last:
+            response['usageMetadata'] = {'promptTokenCount': 4, 'candidatesTokenCount': 2, 'totalTokenCount': 6}
+        return response
+
+    def log_message(self, *args):
+        pass
+
+
+class StubGeminiServerMixin:
+    """Serveur Gemini local démarré une fois par classe ; les clients IA y sont dirigés."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.server = ThreadingHTTPServer(('127.0.0.1', 0), StubGeminiHandler)
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+        cls.addClassCleanup(cls.server.server_close)
+        cls.addClassCleanup(cls.server.shutdown)
+
+        overrides = override_settings(
+            GEMINI_API_KEY='test-key', GEMINI_BASE_URL=f'http://127.0.0.1:{cls.server.server_port}'
+        )
+        overrides.enable()
+        cls.addClassCleanup(overrides.disable)
+
+    def setUp(self):
+        super().setUp()
+        self.server.requests = []
+        self.server.connections = set()
+        self.server.reply = '{"ok": true}'
+        # Nouveaux clients (et connexions) pour chaque test
+        clients.close_clients()
+        self.addCleanup(clients.close_clients)
+
+
+class UserTestDataMixin:
+    """`cls.user` créé une fois par classe ; `username` donne aussi l'email et le mot de passe."""
+    username = 'ia'
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.user = User.objects.create_user(
+            username=cls.username, email=f'{cls.username}@example.com', password=f'{cls.username}Password123'
+        )
+
+
+class GeminiClientPoolTests(StubGeminiServerMixin, TestCase):
+    def test_client_is_shared_per_api_key(self):
+        self.assertIs(clients.get_gemini_client(), clients.get_gemini_client())
+        self.assertIsNot(clients.get_gemini_client(), clients.get_gemini_client('other-key'))
+
+    def test_calls_reuse_one_connection(self):
+        provider = GeminiProvider()
+        for _ in range(3):
+            result = provider.generate_content('salut')
+            self.assertEqual(result['processed_response'], '{"ok": true}')
+
+        self.assertEqual(len(self.server.requests), 3)
+        self.assertTrue(self.server.requests[0][0].endswith('/models/gemini-2.0-flash:generateContent'))
+        # Keep-alive : une seule connexion TCP pour les trois appels
+        self.assertEqual(len(self.server.connections), 1)
+
+    def test_async_client_is_bound_to_its_event_loop(self):
+        async def call():
+            result = await GeminiProvider().agenerate_content('salut')
+            return result['processed_response'], clients.get_async_gemini_client()
+
+        # Deux boucles successives (asyncio.run) : le pool de la première est fermé avec elle
+        first_reply, first_client = asyncio.run(call())
+        second_reply, second_client = asyncio.run(call())
+        self.assertEqual([first_reply, second_reply], ['{"ok": true}'] * 2)
+        self.assertIsNot(first_client, second_client)
+        self.assertEqual(len(self.server.requests), 2)
+
+    def test_clients_are_rebuilt_after_fork(self):
+        client = clients.get_gemini_client()
+        with mock.patch.object(clients.os, 'getpid', return_value=clients._clients_pid + 1):
+            self.assertIsNot(clients.get_gemini_client(), client)
+
+
+class IAManagerTests(StubGeminiServerMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.addCleanup(flush_interactions)
+
+    def test_ask_uses_configured_client_and_logs_interaction(self):
+        answer = {'title': 'Titre', 'description': 'Desc', 'keywords': 'a, b'}
+        self.server.reply = json.dumps({'is_valid': True, 'response': answer})
+
+        self.assertEqual(IAManager().ask('Décris ce produit'), answer)
+        path, body = self.server.requests[0]
+        self.assertIn('/models/gemini-2.0-flash:streamGenerateContent', path)
+        self.assertEqual(body['contents'][0]['parts'][0]['text'], 'Décris ce produit')
+        self.assertEqual(body['systemInstruction']['parts'][0]['text'], 'Réponds de manière détaillée.')
+
+        flush_interactions()
+        interaction = IAInteraction.objects.get()
+        self.assertEqual((interaction.provider, interaction.output_data), ('gemini', answer))
+
+
+class ResponseCacheTests(UserTestDataMixin, StubGeminiServerMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        caches['ai_responses'].clear()
+        self.addCleanup(flush_interactions)
+
+    def test_identical_requests_hit_the_cache(self):
+        manager = AIManager()
+        first = manager.process_request(self.user, 'Décris ce produit', system_instruction='SEO')
+        # Espaces et paramètres par défaut explicites : même requête normalisée
+        second = manager.process_request(
+            self.user, '  Décris ce produit\n', system_instruction='SEO', model='gemini-2.0-flash'
+        )
+
+        self.assertEqual(first, second)
+        self.assertEqual(len(self.server.requests), 1)
+        flush_interactions()
+        interactions = IAInteraction.objects.order_by('created_at')
+        self.assertEqual(interactions.count(), 2)
+        self.assertNotIn('cache_hit', interactions[0].metadata)
+        self.assertTrue(interactions[1].metadata['cache_hit'])
+
+    def test_different_requests_and_opt_out_reach_the_provider(self):
+        manager = AIManager()
+        manager.process_request(self.user, 'prompt', response_mime_type='application/json')
+        manager.process_request(self.user, 'prompt', response_mime_type='text/plain')
+        manager.process_request(self.user, 'prompt', response_mime_type='text/plain', use_cache=False)
+        self.assertEqual(len(self.server.requests), 3)
+
+    @override_settings(AI_RESPONSE_CACHE_TIMEOUT=0)
+    def test_cache_can_be_disabled(self):
+        manager = AIManager()
+        manager.process_request(self.user, 'prompt')
+        manager.process_request(self.user, 'prompt')
+        self.assertEqual(len(self.server.requests), 2)
+
+
+class FlakyFakeProvider(FakeProvider):
+    """Échoue sur les prompts contenant 'boom' et mesure la concurrence atteinte."""
+
+    def __init__(self):
+        super().__init__(latency=0.05)
+        self.lock = threading.Lock()
+        self.active = 0
+        self.peak = 0
+
+    def generate_content(self, prompt, *args, **kwargs):
+        with self.lock:
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+        try:
+            if 'boom' in prompt:
+                raise RuntimeError('provider down')
+            return super().generate_content(prompt, *args, **kwargs)
+        finally:
+            with self.lock:
+                self.active -= 1
+
+    async def agenerate_content(self, prompt, *args, **kwargs):
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        try:
+            return await super().agenerate_content(prompt, *args, **kwargs)
+        finally:
+            self.active -= 1
+
+
+# Les appels parallèles journalisent depuis d'autres threads : transactions réelles
+@override_settings(AI_PROVIDER_CONCURRENCY={'fake': 3}, AI_RESPONSE_CACHE_TIMEOUT=0)
+class ConcurrentRequestTests(TransactionTestCase):
+    def setUp(self):
+        reset_limits()
+        self.addCleanup(reset_limits)
+        self.manager = AIManager('fake')
+        self.manager.provider = FlakyFakeProvider()
+        self.addCleanup(flush_interactions)
+
+    def test_process_many_keeps_order_and_isolates_errors(self):
+        prompts = ['a', 'b', 'boom', 'c', 'd', 'e']
+        start = time.perf_counter()
+        results = self.manager.process_many(None, prompts, response_mime_type='text/plain', max_workers=6)
+        elapsed = time.perf_counter() - start
+
+        self.assertEqual([result.prompt for result in results], prompts)
+        self.assertEqual([result.response for result in results if result.ok], ['a', 'b', 'c', 'd', 'e'])
+        self.assertIsInstance(results[2].error, AIProcessingError)
+        # 6 workers demandés mais 3 appels simultanés au plus : au moins deux vagues
+        self.assertEqual(self.manager.provider.peak, 3)
+        self.assertLess(elapsed, 6 * 0.05)
+        flush_interactions()
+        self.assertEqual(IAInteraction.objects.filter(error__isnull=False).count(), 1)
+
+    def test_aprocess_many(self):
+        results = asyncio.run(self.manager.aprocess_many(None, [f'p{i}' for i in range(7)], response_mime_type='text/plain'))
+        self.assertEqual([result.response for result in results], [f'p{i}' for i in range(7)])
+        self.assertEqual(self.manager.provider.peak, 3)
+        flush_interactions()
+        self.assertEqual(IAInteraction.objects.count(), 7)
+
+
+@override_settings(AI_RESPONSE_CACHE_TIMEOUT=0)
+class BatchJobTests(TransactionTestCase):
+    def setUp(self):
+        self.users = [
+            User.objects.create_user(username=f'item{i}', email=f'item{i}@example.com', password='x')
+            for i in range(7)
+        ]
+        self.addCleanup(flush_interactions)
+
+    def _run(self, *args):
+        out = StringIO()
+        call_command('run_ai_batch_job', *args, stdout=out)
+        return out.getvalue()
+
+    def test_job_resumes_from_checkpoint(self):
+        self._run(
+            '--model', 'user_auth.User', '--filter', '{"username__startswith": "item"}',
+            '--template', 'Bio de {{ item.username }} & co', '--result-field', 'full_name',
+            '--provider', 'fake', '--options', '{"response_mime_type": "text/plain"}',
+            '--batch-size', '3', '--max-batches', '1',
+        )
+        job = AIBatchJob.objects.get()
+        self.assertEqual((job.status, job.processed_count, job.total_count), (AIBatchJob.Status.PENDING, 3, 7))
+        self.assertEqual(job.last_pk, str(self.users[2].pk))
+
+        # Reprise : seuls les 4 éléments restants sont envoyés au fournisseur
+        self._run('--job', str(job.pk))
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.processed_count, job.failed_count), (AIBatchJob.Status.COMPLETED, 7, 0))
+        flush_interactions()
+        self.assertEqual(IAInteraction.objects.count(), 7)
+        # Template rendu sans échappement HTML
+        self.assertEqual(User.objects.get(username='item4').full_name, 'Bio de item4 & co')
+
+    def test_running_job_is_not_claimed_twice(self):
+        job = AIBatchJob.objects.create(
+            target_model='user_auth.User', prompt_template='x', result_field='full_name',
+            provider_name='fake', status=AIBatchJob.Status.RUNNING, heartbeat_at=timezone.now(),
+        )
+        with self.assertRaises(CommandError):
+            self._run('--job', str(job.pk))
+
+    def test_invalid_json_responses_are_counted_as_failures(self):
+        job = AIBatchJob.objects.create(
+            target_model='user_auth.User', prompt_template='{{ item.username }}', result_field='full_name',
+            result_key='title', provider_name='fake', request_options={'response_mime_type': 'text/plain'},
+        )
+        self._run('--job', str(job.pk))
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.failed_count), (AIBatchJob.Status.COMPLETED, 7))
+        self.assertIn("Clé 'title'", job.last_error)
+
+
+class ScriptedFakeProvider(FakeProvider):
+    """Lève successivement les erreurs de `failures`, puis répond normalement."""
+
+    def __init__(self, failures):
+        super().__init__(latency=0)
+        self.failures = list(failures)
+        self.calls = 0
+
+    def generate_content(self, prompt, *args, **kwargs):
+        self.calls += 1
+        if self.failures:
+            raise self.failures.pop(0)
+        return super().generate_content(prompt, *args, **kwargs)
+
+
+@override_settings(AI_RESPONSE_CACHE_TIMEOUT=0, AI_RETRY_MAX_ATTEMPTS=3)
+class RateLimitTests(TestCase):
+    def setUp(self):
+        ratelimit.reset_limiters()
+        self.addCleanup(ratelimit.reset_limiters)
+        patcher = mock.patch.object(ratelimit, 'backoff_delay', return_value=0)
+        self.backoff = patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(flush_interactions)
+
+    def _manager(self, failures=()):
+        manager = AIManager('fake')
+        manager.provider = ScriptedFakeProvider(failures)
+        return manager
+
+    def test_token_bucket_spaces_out_requests(self):
+        bucket = ratelimit.LocalTokenBucket()
+        # 10 requêtes/s, rafale de 5
+        waits = [bucket.take('k', 10, 5, 1) for _ in range(6)]
+        self.assertEqual(waits[:5], [0.0] * 5)
+        self.assertAlmostEqual(waits[5], 0.1, places=2)
+
+    def test_transient_errors_are_retried_with_backoff(self):
+        manager = self._manager([genai_errors.ClientError(429, {}), genai_errors.ServerError(503, {})])
+        self.assertEqual(manager.process_request(None, 'salut', response_mime_type='text/plain'), 'salut')
+        self.assertEqual(manager.provider.calls, 3)
+        self.assertEqual([call.args for call in self.backoff.call_args_list], [(1,), (2,)])
+        # Une seule interaction, sans erreur
+        flush_interactions()
+        self.assertFalse(IAInteraction.objects.filter(error__isnull=False).exists())
+        self.assertEqual(ratelimit.get_metrics()['fake']['retries'], 2)
+
+    def test_permanent_errors_are_not_retried(self):
+        manager = self._manager([genai_errors.ClientError(400, {})])
+        with self.assertRaises(AIProcessingError):
+            manager.process_request(None, 'salut')
+        self.assertEqual(manager.provider.calls, 1)
+
+    @override_settings(
+        AI_PROVIDER_RATE_LIMITS={'fake': {'rpm': 60, 'burst_seconds': 1}}, AI_RATE_LIMIT_MAX_WAIT=0.1
+    )
+    def test_excess_load_is_shed_without_calling_the_provider(self):
+        manager = self._manager()
+        manager.process_request(None, 'premier')
+        with self.assertRaises(AIProcessingError):
+            manager.process_request(None, 'second')
+        self.assertEqual(manager.provider.calls, 1)
+        flush_interactions()
+        self.assertEqual(IAInteraction.objects.count(), 1)
+        self.assertEqual(ratelimit.get_metrics()['fake']['shed'], 1)
+
+    def test_metrics_endpoint_is_admin_only(self):
+        self._manager().process_request(None, 'salut')
+        client = APIClient()
+        self.assertIn(client.get('/api/ia/metrics/').status_code, (401, 403))
+
+        admin = User.objects.create_superuser(username='root', email='root@example.com', password='rootPassword123')
+        client.force_authenticate(admin)
+        response = client.get('/api/ia/metrics/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['fake']['waiting'], 0)
+
+
+class InteractionLogTests(TestCase):
+    def setUp(self):
+        self.addCleanup(flush_interactions)
+
+    def test_interactions_are_written_in_one_bulk_insert(self):
+        manager = AIManager('fake')
+        manager.provider = FakeProvider(latency=0)
+        with CaptureQueriesContext(connection) as queries:
+            for i in range(5):
+                manager.process_request(None, f'p{i}', response_mime_type='text/plain', use_cache=False)
+        self.assertEqual(len(queries), 0)
+        self.assertEqual(IAInteraction.objects.count(), 0)
+
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(flush_interactions(), 5)
+        self.assertEqual(len(queries), 1)
+        self.assertEqual(IAInteraction.objects.count(), 5)
+
+    @override_settings(AI_INTERACTION_LOG_SAMPLE_RATE=0)
+    def test_sampling_keeps_errors(self):
+        interaction_log.log_interaction(model_name='fake', input_data={'prompt': 'ok'}, output_data='ok')
+        interaction_log.log_interaction(model_name='fake', input_data={'prompt': 'ko'}, error='provider down')
+        flush_interactions()
+        self.assertEqual(list(IAInteraction.objects.values_list('error', flat=True)), ['provider down'])
+
+    @override_settings(AI_INTERACTION_LOG_MAX_CHARS=20)
+    def test_large_payloads_are_truncated_and_metadata_summarised(self):
+        created = interaction_log.log_interaction(
+            model_name='gemini',
+            input_data={'prompt': 'x' * 50},
+            output_data='y' * 50,
+            metadata=json.dumps({
+                'candidates': [{'content': 'z' * 50}],
+                'usage_metadata': {'total_token_count': 6},
+                'model_version': 'gemini-2.0-flash',
+                'cache_hit': False,
+            }),
+        )
+        flush_interactions()
+        interaction = IAInteraction.objects.get()
+        self.assertEqual(interaction.input_data['prompt'], 'x' * 20 + interaction_log.TRUNCATION_MARKER)
+        self.assertEqual(interaction.output_data, 'y' * 20 + interaction_log.TRUNCATION_MARKER)
+        self.assertEqual(interaction.metadata, {
+            'usage_metadata': {'total_token_count': 6}, 'model_version': 'gemini-2.0-flash', 'cache_hit': False,
+        })
+        # Heure de l'appel, pas celle de l'écriture
+        self.assertEqual(interaction.created_at, created.created_at)
+
+
+class StreamingTests(UserTestDataMixin, StubGeminiServerMixin, TestCase):
+    username = 'flux'
+
+    def setUp(self):
+        super().setUp()
+        caches['ai_responses'].clear()
+        # Débit et places de flux par utilisateur
+        caches['default'].clear()
+        self.addCleanup(flush_interactions)
+        self.server.reply = 'Bonjour, voici la réponse.'
+
+    def test_chunks_are_forwarded_and_logged_once_assembled(self):
+        chunks = list(AIManager().stream_request(self.user, 'salut', response_mime_type='text/plain'))
+        self.assertEqual(chunks, ['Bonjour, voic', 'i la réponse.'])
+        self.assertTrue(self.server.requests[0][0].endswith(':streamGenerateContent?alt=sse'))
+
+        flush_interactions()
+        interaction = IAInteraction.objects.get()
+        self.assertEqual(interaction.output_data, 'Bonjour, voici la réponse.')
+        self.assertIsNone(interaction.error)
+        self.assertEqual(interaction.metadata['usage_metadata']['total_token_count'], 6)
+        # La réponse assemblée est en cache : le second flux ne rappelle pas le fournisseur
+        self.assertEqual(list(AIManager().stream_request(self.user, 'salut', response_mime_type='text/plain')),
+                         ['Bonjour, voici la réponse.'])
+        self.assertEqual(len(self.server.requests), 1)
+
+    def test_abandoned_stream_is_logged_with_partial_text(self):
+        stream = AIManager().stream_request(self.user, 'salut', response_mime_type='text/plain')
+        self.assertEqual(next(stream), 'Bonjour, voic')
+        stream.close()
+
+        flush_interactions()
+        interaction = IAInteraction.objects.get()
+        self.assertEqual(interaction.output_data, 'Bonjour, voic')
+        self.assertIn('interrompu', interaction.error)
+
+    def _events(self, response):
+        body = b''.join(response.streaming_content).decode()
+        return [
+            (block.split('\n')[0][len('event: '):], json.loads(block.split('\n')[1][len('data: '):]))
+            for block in body.strip().split('\n\n')
+        ]
+
+    def test_sse_endpoint(self):
+        client = APIClient()
+        self.assertIn(client.post('/api/ia/stream/', {'prompt': 'salut'}).status_code, (401, 403))
+
+        client.force_authenticate(self.user)
+        response = client.post('/api/ia/stream/', {'prompt': 'salut'}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        self.assertEqual(self._events(response), [
+            ('message', {'text': 'Bonjour, voic'}), ('message', {'text': 'i la réponse.'}), ('done', {}),
+        ])
+
+    def test_sse_endpoint_reports_errors(self):
+        client = APIClient()
+        client.force_authenticate(self.user)
+        with mock.patch.object(GeminiProvider, 'generate_content_stream', side_effect=RuntimeError('down')):
+            response = client.post('/api/ia/stream/', {'prompt': 'salut'}, format='json')
+            events = self._events(response)
+        self.assertEqual([event for event, _ in events], ['error'])
+        flush_interactions()
+        self.assertEqual(IAInteraction.objects.get().error, 'down')
+
+    @override_settings(AI_STREAM_MAX_PER_USER=1)
+    def test_concurrent_streams_are_limited_per_user(self):
+        client = APIClient()
+        client.force_authenticate(self.user)
+        first = client.post('/api/ia/stream/', {'prompt': 'salut'}, format='json')
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(client.post('/api/ia/stream/', {'prompt': 'salut'}, format='json').status_code, 429)
+
+        # Flux fermé sans avoir été lu : la place est rendue
+        first.close()
+        other = client.post('/api/ia/stream/', {'prompt': 'salut'}, format='json')
+        self.assertEqual(other.status_code, 200)
+        self.assertEqual(self._events(other)[-1], ('done', {}))
+        self.assertEqual(client.post('/api/ia/stream/', {'prompt': 'salut'}, format='json').status_code, 200)
+
+    def test_stream_requests_are_throttled_per_user(self):
+        rates = {**settings.REST_FRAMEWORK['DEFAULT_THROTTLE_RATES'], 'ai_stream': '1/min'}
+        client = APIClient()
+        client.force_authenticate(self.user)
+        with override_settings(REST_FRAMEWORK={**settings.REST_FRAMEWORK, 'DEFAULT_THROTTLE_RATES': rates}):
+            self._events(client.post('/api/ia/stream/', {'prompt': 'salut'}, format='json'))
+            response = client.post('/api/ia/stream/', {'prompt': 'salut'}, format='json')
+        self.assertEqual(response.status_code, 429)
+
+
+@override_settings(AI_TOKEN_PRICES={'fake-echo': {'prompt': 1.0, 'output': 2.0}})
+class UsageAccountingTests(UserTestDataMixin, TestCase):
+    username = 'compta'
+
+    def setUp(self):
+        caches['ai_responses'].clear()
+        self.addCleanup(flush_interactions)
+
+    def test_usage_columns_are_filled(self):
+        manager = AIManager('fake')
+        manager.provider = FakeProvider(latency=0.01)
+        manager.process_request(self.user, 'un prompt de test', response_mime_type='text/plain')
+        manager.process_request(self.user, 'un prompt de test', response_mime_type='text/plain')
+        flush_interactions()
+
+        first, second = IAInteraction.objects.order_by('created_at')
+        self.assertEqual((first.provider, first.prompt_tokens, first.output_tokens, first.cache_hit), ('fake', 5, 5, False))
+        self.assertGreaterEqual(first.latency_ms, 10)
+        # Servi depuis le cache : aucun token consommé
+        self.assertEqual((second.prompt_tokens, second.output_tokens, second.cache_hit), (0, 0, True))
+
+    def test_summary_aggregates_typed_columns(self):
+        now = timezone.now()
+        rows = [
+            dict(provider='fake', model_name='fake-echo', prompt_tokens=1000, output_tokens=500, latency_ms=100),
+            dict(provider='fake', model_name='fake-echo', prompt_tokens=0, output_tokens=0, latency_ms=2, cache_hit=True),
+            dict(provider='gemini', model_name='gemini-x', prompt_tokens=10, output_tokens=10, latency_ms=300),
+            dict(provider='fake', model_name='fake-echo', error='down', latency_ms=50),
+        ]
+        IAInteraction.objects.bulk_create([IAInteraction(user=self.user, created_at=now, **row) for row in rows])
+        # Hors période
+        IAInteraction.objects.create(provider='fake', model_name='fake-echo', prompt_tokens=10 ** 6,
+                                     created_at=now - timedelta(days=40))
+
+        summary = usage.usage_summary(since=now - timedelta(days=30), group_by='model')
+        self.assertEqual(summary[0], {
+            'provider': 'fake', 'model_name': 'fake-echo', 'calls': 3, 'errors': 1, 'cache_hits': 1,
+            'prompt_tokens': 1000, 'output_tokens': 500, 'max_latency_ms': 100, 'avg_latency_ms': 51,
+            'cost': 0.002,
+        })
+        # Modèle sans prix : coût inconnu
+        self.assertIsNone(summary[1]['cost'])
+
+        client = APIClient()
+        client.force_authenticate(self.user)
+        self.assertEqual(client.get('/api/ia/usage/').status_code, 403)
+        admin = User.objects.create_superuser(username='chef', email='chef@example.com', password='chefPassword123')
+        client.force_authenticate(admin)
+        response = client.get('/api/ia/usage/', {'group_by': 'user', 'days': 7})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['totals']['calls'], 4)
+        self.assertIsNone(response.data['totals']['cost'])
+        self.assertEqual(response.data['groups'][0]['user__username'], 'compta')
+        self.assertEqual(client.get('/api/ia/usage/', {'group_by': 'metadata'}).status_code, 400)
+
+    def test_backfill_command_fills_legacy_rows_in_batches(self):
+        legacy = [
+            IAInteraction(model_name='gemini-2.0-flash', metadata={'usage_metadata': {
+                'prompt_token_count': 12, 'candidates_token_count': 30}}),
+            IAInteraction(model_name='fake-echo', metadata=json.dumps({'cache_hit': True})),
+            IAInteraction(model_name='autre', metadata='pas du json'),
+        ]
+        IAInteraction.objects.bulk_create(legacy)
+        recent = IAInteraction.objects.create(provider='fake', model_name='fake-echo', prompt_tokens=7)
+
+        out = StringIO()
+        call_command('backfill_ai_usage', '--batch-size', '2', stdout=out)
+        self.assertIn('Terminé : 3 interaction(s).', out.getvalue())
+
+        gemini = IAInteraction.objects.get(model_name='gemini-2.0-flash')
+        self.assertEqual((gemini.provider, gemini.prompt_tokens, gemini.output_tokens), ('gemini', 12, 30))
+        self.assertTrue(IAInteraction.objects.get(pk=legacy[1].pk).cache_hit)
+        self.assertEqual(IAInteraction.objects.get(model_name='autre').provider, '')
+        recent.refresh_from_db()
+        self.assertEqual(recent.prompt_tokens, 7)
+
+
+class IAInteractionAdminTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser(username='admin', email='admin@example.com', password='adminPassword123')
+        now = timezone.now()
+        cls.interactions = IAInteraction.objects.bulk_create([
+            IAInteraction(user=cls.admin if i % 2 else None, model_name='fake-echo', provider='fake',
+                          input_data={'prompt': f'question {i}'}, output_data=f'réponse {i}',
+                          created_at=now - timedelta(minutes=i))
+            for i in range(5)
+        ])
+
+    def setUp(self):
+        self.client.force_login(self.admin)
+        patcher = mock.patch.object(IAInteractionAdmin, 'list_per_page', 2)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.url = '/d-admin/ia_manager/iainteraction/'
+
+    def _page(self, url):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return response.context['cl']
+
+    def test_changelist_is_paginated_by_cursor(self):
+        seen = []
+        cl = self._page(self.url)
+        self.assertEqual(cl.result_count, 5)
+        while True:
+            seen += [obj.pk for obj in cl.result_list]
+            if not cl.next_page_url:
+                break
+            cl = self._page(self.url + cl.next_page_url)
+        self.assertEqual(seen, [interaction.pk for interaction in self.interactions])
+        # Les JSON complets ne sont pas chargés sur la liste
+        self.assertEqual(cl.result_list[0].get_deferred_fields(), {'input_data', 'output_data', 'metadata'})
+        self.assertEqual(self.client.get(self.url + '?after=nimporte').status_code, 302)
+
+    def test_search_and_user_filter(self):
+        cl = self._page(self.url + '?q=question 3')
+        self.assertEqual([obj.pk for obj in cl.result_list], [self.interactions[3].pk])
+        cl = self._page(self.url + f'?q={self.interactions[4].pk}')
+        self.assertEqual([obj.pk for obj in cl.result_list], [self.interactions[4].pk])
+
+        response = self.client.get(self.url + f'?user__id__exact={self.admin.pk}&after=x')
+        self.assertEqual(response.status_code, 302)
+        cl = self._page(self.url + f'?user__id__exact={self.admin.pk}')
+        self.assertEqual([obj.pk for obj in cl.result_list], [self.interactions[1].pk, self.interactions[3].pk])
+        self.assertContains(self.client.get(self.url), 'admin-autocomplete')
+
+        response = self.client.get('/d-admin/autocomplete/', {
+            'app_label': 'ia_manager', 'model_name': 'iainteraction', 'field_name': 'user', 'term': 'adm',
+        })
+        self.assertEqual([result['text'] for result in response.json()['results']], ['admin'])
+
+    @mock.patch('ia_manager.admin.HIGHLIGHT_MAX_CHARS', 10)
+    def test_large_json_is_not_highlighted(self):
+        response = self.client.get(f'{self.url}{self.interactions[0].pk}/change/')
+        self.assertContains(response, '<pre>')
@@ -0,0 +1,17 @@
+"""
+Limitation du débit des endpoints IA.
+
+`AIStreamRateThrottle` (scope `ai_stream`) : requêtes de flux par
+utilisateur authentifié, taux lu dans `REST_FRAMEWORK['DEFAULT_THROTTLE_RATES']`
+à chaque requête (un scope absent ou à None désactive la limite). Le nombre
+de flux ouverts en même temps est limité à part (ia_manager/concurrency.py).
+"""
+from rest_framework.settings import api_settings
+from rest_framework.throttling import UserRateThrottle
+
+
+class AIStreamRateThrottle(UserRateThrottle):
+    scope = 'ai_stream'
+
+    def get_rate(self):
+        return api_settings.DEFAULT_THROTTLE_RATES.get(self.scope)
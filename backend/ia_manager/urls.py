@@ -0,0 +1,9 @@
+from django.urls import path
+
+from ia_manager.views import AIProviderMetricsView, AIStreamView, AIUsageSummaryView
+
+urlpatterns = [
+    path('metrics/', AIProviderMetricsView.as_view(), name='ia_provider_metrics'),
+    path('usage/', AIUsageSummaryView.as_view(), name='ia_usage_summary'),
+    path('stream/', AIStreamView.as_view(), name='ia_stream'),
+]
@@ -0,0 +1,108 @@
+"""
+Agrégats de consommation des interactions IA (tokens, latence, coût).
+
+Les requêtes portent uniquement sur les colonnes typées d'IAInteraction
+(provider, prompt_tokens, output_tokens, latency_ms, cache_hit), filtrées
+sur une période de `created_at` (index), sans lire ni décoder le JSON de
+`metadata`. Le coût est calculé après agrégation, par modèle, depuis
+AI_TOKEN_PRICES (prix par million de tokens) : changer un prix s'applique
+aussi à l'historique.
+"""
+from typing import Dict, List, Optional
+
+from django.conf import settings
+from django.db.models import Avg, Count, Max, Q, Sum
+from django.db.models.functions import TruncDate
+
+from ia_manager.models import IAInteraction
+
+# Regroupements autorisés -> champs du GROUP BY
+GROUPINGS = {
+    'provider': ('provider',),
+    'model': ('provider', 'model_name'),
+    'user': ('user_id', 'user__username'),
+    'day': ('day',),
+}
+
+
+def price_for(model_name: str) -> Optional[Dict[str, float]]:
+    return getattr(settings, 'AI_TOKEN_PRICES', {}).get(model_name)
+
+
+def interactions_between(since=None, until=None):
+    queryset = IAInteraction.objects.all()
+    if since is not None:
+        queryset = queryset.filter(created_at__gte=since)
+    if until is not None:
+        queryset = queryset.filter(created_at__lt=until)
+    return queryset
+
+
+def _cost(prompt_tokens, output_tokens, price) -> Optional[float]:
+    if price is None:
+        return None
+    return ((prompt_tokens or 0) * price.get('prompt', 0) + (output_tokens or 0) * price.get('output', 0)) / 1_000_000
+
+
+def usage_summary(since=None, until=None, group_by: str = 'model') -> List[dict]:
+    """
+    Une ligne par groupe : appels, erreurs, succès du cache, tokens, latence
+    moyenne et maximale, coût estimé (None si un modèle du groupe n'a pas de
+    prix). Les groupes sont triés par tokens consommés décroissants.
+    """
+    fields = GROUPINGS[group_by]
+    queryset = interactions_between(since, until)
+    if group_by == 'day':
+        queryset = queryset.annotate(day=TruncDate('created_at'))
+    # Le coût dépend du modèle : on agrège aussi par modèle, puis on fusionne
+    rows = queryset.order_by().values(*fields, *(('model_name',) if 'model_name' not in fields else ())).annotate(
+        calls=Count('pk'),
+        errors=Count('pk', filter=Q(error__isnull=False)),
+        cache_hits=Count('pk', filter=Q(cache_hit=True)),
+        prompt_tokens=Sum('prompt_tokens'),
+        output_tokens=Sum('output_tokens'),
+        latency_sum_ms=Sum('latency_ms'),
+        latency_count=Count('latency_ms'),
+        max_latency_ms=Max('latency_ms'),
+    )
+
+    groups: Dict[tuple, dict] = {}
+    for row in rows:
+        key = tuple(row[field] for field in fields)
+        cost = _cost(row['prompt_tokens'], row['output_tokens'], price_for(row['model_name']))
+        group = groups.get(key)
+        if group is None:
+            group = groups[key] = {
+                **{field: row[field] for field in fields},
+                'calls': 0, 'errors': 0, 'cache_hits': 0, 'prompt_tokens': 0, 'output_tokens': 0,
+                'latency_sum_ms': 0, 'latency_count': 0, 'max_latency_ms': None, 'cost': 0.0,
+            }
+        for name in ('calls', 'errors', 'cache_hits', 'latency_count'):
+            group[name] += row[name]
+        for name in ('prompt_tokens', 'output_tokens', 'latency_sum_ms'):
+            group[name] += row[name] or 0
+        if row['max_latency_ms'] is not None:
+            group['max_latency_ms'] = max(group['max_latency_ms'] or 0, row['max_latency_ms'])
+        group['cost'] = None if cost is None or group['cost'] is None else group['cost'] + cost
+
+    summary = []
+    for group in groups.values():
+        latency_sum, latency_count = group.pop('latency_sum_ms'), group.pop('latency_count')
+        group['avg_latency_ms'] = round(latency_sum / latency_count) if latency_count else None
+        if group['cost'] is not None:
+            group['cost'] = round(group['cost'], 6)
+        summary.append(group)
+    summary.sort(key=lambda group: group['prompt_tokens'] + group['output_tokens'], reverse=True)
+    return summary
+
+
+def usage_totals(since=None, until=None) -> dict:
+    """Totaux de la période, en une seule requête d'agrégation."""
+    return interactions_between(since, until).aggregate(
+        calls=Count('pk'),
+        errors=Count('pk', filter=Q(error__isnull=False)),
+        cache_hits=Count('pk', filter=Q(cache_hit=True)),
+        prompt_tokens=Sum('prompt_tokens'),
+        output_tokens=Sum('output_tokens'),
+        avg_latency_ms=Avg('latency_ms'),
+    )
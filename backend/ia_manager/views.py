@@ -1,3 +1,123 @@
-from django.shortcuts import render
+import json
+from contextlib import closing
+from datetime import timedelta
 
-# Create your views here.
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.permissions import IsAdminUser, IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from ia_manager.concurrency import acquire_stream_slot, get_concurrency, release_stream_slot
+from ia_manager.core import AIManager, AIProcessingError
+from ia_manager.ratelimit import get_metrics
+from ia_manager.serializers import AIStreamRequestSerializer, AIUsageQuerySerializer
+from ia_manager.throttling import AIStreamRateThrottle
+from ia_manager.usage import usage_summary, usage_totals
+
+
+class AIProviderMetricsView(APIView):
+    """File d'attente et compteurs de limitation de débit du processus, par fournisseur."""
+    permission_classes = (IsAdminUser,)
+
+    def get(self, request):
+        return Response({
+            name: {**metrics, 'concurrency': get_concurrency(name)}
+            for name, metrics in get_metrics().items()
+        })
+
+
+class AIUsageSummaryView(APIView):
+    """
+    Consommation IA des `days` derniers jours : totaux, et détail par
+    fournisseur, modèle, utilisateur ou jour (`group_by`), avec coût estimé.
+    """
+    permission_classes = (IsAdminUser,)
+
+    def get(self, request):
+        serializer = AIUsageQuerySerializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+        since = timezone.now() - timedelta(days=serializer.validated_data['days'])
+        group_by = serializer.validated_data['group_by']
+        groups = usage_summary(since, group_by=group_by)
+        totals = usage_totals(since)
+        costs = [group['cost'] for group in groups]
+        totals['cost'] = None if None in costs else round(sum(costs), 6)
+        return Response({'since': since, 'group_by': group_by, 'totals': totals, 'groups': groups})
+
+
+def sse_event(event: str, data) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+def sse_stream(chunks):
+    """Événements SSE d'un flux de `AIManager.stream_request` ; ferme le flux si le client part."""
+    with closing(chunks):
+        try:
+            for chunk in chunks:
+                yield sse_event('message', {'text': chunk})
+        except AIProcessingError:
+            # Détail déjà journalisé avec l'interaction
+            yield sse_event('error', {'detail': "La génération de la réponse a échoué."})
+            return
+    yield sse_event('done', {})
+
+
+class StreamSlot:
+    """Contenu d'une StreamingHttpResponse qui libère la place de flux à sa fermeture, même jamais itéré."""
+
+    def __init__(self, events, user_id):
+        self.events = events
+        self.user_id = user_id
+        self.released = False
+
+    def __iter__(self):
+        return iter(self.events)
+
+    def close(self):
+        if self.released:
+            return
+        self.released = True
+        try:
+            self.events.close()
+        finally:
+            release_stream_slot(self.user_id)
+
+
+class AIStreamView(APIView):
+    """
+    Réponse IA en flux (Server-Sent Events) : un événement `message`
+    ({"text": ...}) par fragment reçu du fournisseur, puis `done`, ou `error`
+    si l'appel échoue en cours de route.
+
+    Chaque flux occupe un worker pendant toute la génération : débit limité
+    par utilisateur (scope `ai_stream`) et au plus AI_STREAM_MAX_PER_USER
+    flux ouverts en même temps par utilisateur (429 au-delà).
+    """
+    permission_classes = (IsAuthenticated,)
+    throttle_classes = [AIStreamRateThrottle]
+
+    def post(self, request):
+        serializer = AIStreamRequestSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+        if not acquire_stream_slot(request.user.pk):
+            return Response(
+                {'detail': "Trop de réponses en cours pour cet utilisateur."},
+                status=status.HTTP_429_TOO_MANY_REQUESTS,
+            )
+        try:
+            chunks = AIManager().stream_request(
+                request.user, data['prompt'], data.get('system_instruction') or None,
+                response_mime_type=data['response_mime_type'],
+            )
+            content = StreamSlot(sse_stream(chunks), request.user.pk)
+        except BaseException:
+            release_stream_slot(request.user.pk)
+            raise
+        response = StreamingHttpResponse(content, content_type='text/event-stream')
+        response['Cache-Control'] = 'no-cache'
+        # Pas de mise en tampon par nginx
+        response['X-Accel-Buffering'] = 'no'
+        return response
@@ -0,0 +1,22 @@
+from django.contrib import admin, messages
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
+
+from .models import EmailOutbox
+
+
+@admin.register(EmailOutbox)
+class EmailOutboxAdmin(admin.ModelAdmin):
+    list_display = ('subject', 'event_type', 'status', 'attempts', 'created_at', 'sent_at')
+    list_filter = ('status', 'event_type')
+    search_fields = ('subject',)
+    raw_id_fields = ('recipient_user',)
+    readonly_fields = ('created_at', 'sent_at', 'claimed_at', 'last_error')
+    actions = ['retry_now']
+
+    @admin.action(description=_("Renvoyer maintenant"))
+    def retry_now(self, request, queryset):
+        updated = queryset.exclude(status=EmailOutbox.Status.SENT).update(
+            status=EmailOutbox.Status.PENDING, next_attempt_at=timezone.now(), attempts=0
+        )
+        self.message_user(request, _("%(count)d email(s) reprogrammé(s).") % {'count': updated}, messages.SUCCESS)
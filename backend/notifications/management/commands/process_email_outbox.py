@@ -0,0 +1,29 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from notifications.services import DEFAULT_BATCH_SIZE, DEFAULT_MAX_ATTEMPTS, process_outbox
+
+
+class Command(BaseCommand):
+    help = (
+        "Envoie les emails en attente dans EmailOutbox, par lots et sur une seule connexion "
+        "SMTP par lot. Avec --loop, tourne en continu (worker)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE)
+        parser.add_argument('--max-attempts', type=int, default=DEFAULT_MAX_ATTEMPTS)
+        parser.add_argument('--loop', action='store_true', help="Ne pas s'arrêter quand l'outbox est vide.")
+        parser.add_argument('--interval', type=float, default=5.0, help="Pause (secondes) entre deux passes en mode --loop.")
+
+    def handle(self, *args, **options):
+        while True:
+            stats = process_outbox(batch_size=options['batch_size'], max_attempts=options['max_attempts'])
+            if any(stats.values()) or not options['loop']:
+                self.stdout.write(
+                    f"{stats['sent']} envoyé(s), {stats['retried']} reprogrammé(s), {stats['failed']} en échec définitif."
+                )
+            if not options['loop']:
+                return
+            time.sleep(options['interval'])
@@ -0,0 +1,62 @@
+from django.conf import settings
+from django.contrib.contenttypes.fields import GenericForeignKey
+from django.contrib.contenttypes.models import ContentType
+from django.db import models
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
+
+
+class EmailOutbox(models.Model):
+    """
+    Email en attente d'envoi (pattern « outbox »).
+
+    Les messages sont rendus et enregistrés dans la transaction de la requête
+    (voir notifications/services.py), puis envoyés par lots par la commande
+    `process_email_outbox`, hors du cycle HTTP.
+    """
+
+    class Status(models.TextChoices):
+        PENDING = 'pending', _("En attente")
+        SENDING = 'sending', _("En cours d'envoi")
+        SENT = 'sent', _("Envoyé")
+        FAILED = 'failed', _("Échec définitif")
+
+    event_type = models.CharField(_("Type d'événement"), max_length=100, blank=True, db_index=True)
+    subject = models.CharField(_("Sujet"), max_length=255)
+    body_text = models.TextField(_("Corps (texte)"))
+    body_html = models.TextField(_("Corps (HTML)"), blank=True)
+    from_email = models.CharField(_("Expéditeur"), max_length=254)
+    to = models.JSONField(_("Destinataires"), default=list)
+
+    recipient_user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True, blank=True,
+        related_name='outbox_emails',
+        verbose_name=_("Utilisateur destinataire"),
+    )
+    content_type = models.ForeignKey(
+        ContentType, on_delete=models.SET_NULL, null=True, blank=True, verbose_name=_("Type de l'objet lié")
+    )
+    object_id = models.CharField(_("ID de l'objet lié"), max_length=64, blank=True)
+    related_object = GenericForeignKey('content_type', 'object_id')
+
+    status = models.CharField(_("Statut"), max_length=10, choices=Status.choices, default=Status.PENDING)
+    attempts = models.PositiveSmallIntegerField(_("Tentatives"), default=0)
+    next_attempt_at = models.DateTimeField(_("Prochaine tentative"), default=timezone.now)
+    claimed_at = models.DateTimeField(_("Pris en charge le"), null=True, blank=True)
+    last_error = models.TextField(_("Dernière erreur"), blank=True)
+    created_at = models.DateTimeField(_("Créé le"), auto_now_add=True)
+    sent_at = models.DateTimeField(_("Envoyé le"), null=True, blank=True)
+
+    class Meta:
+        verbose_name = _("Email en attente")
+        verbose_name_plural = _("Emails en attente")
+        ordering = ['-created_at']
+        indexes = [
+            # Sélection des messages à envoyer par le worker
+            models.Index(fields=['status', 'next_attempt_at'], name='outbox_status_next_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.subject} → {', '.join(self.to)} ({self.get_status_display()})"
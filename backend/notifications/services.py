@@ -0,0 +1,176 @@
+"""
+Envoi d'emails via la table EmailOutbox.
+
+`send_templated_email` ne fait que rendre les templates et insérer une ligne
+dans la transaction courante : aucun appel SMTP pendant la requête, et rien
+n'est envoyé si la transaction est annulée. La commande `process_email_outbox`
+appelle `process_outbox` pour envoyer les messages par lots sur une seule
+connexion SMTP, avec nouvelles tentatives espacées en cas d'échec.
+"""
+import logging
+from datetime import timedelta
+from typing import Iterable, List, Optional
+
+from django.conf import settings
+from django.contrib.contenttypes.models import ContentType
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.db import transaction
+from django.db.models import Q
+from django.template.loader import render_to_string
+from django.utils import timezone
+from django.utils.html import strip_tags
+
+from notifications.models import EmailOutbox
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BATCH_SIZE = 50
+DEFAULT_MAX_ATTEMPTS = 5
+RETRY_BACKOFF_SECONDS = 60
+MAX_RETRY_DELAY_SECONDS = 3600
+# Un message resté « en cours d'envoi » au-delà de ce délai (worker arrêté) est repris
+CLAIM_TIMEOUT_SECONDS = 600
+
+
+def send_templated_email(
+    subject_template_name: str,
+    html_template_name: str,
+    context: dict,
+    recipient_list: Iterable[str],
+    text_template_name: Optional[str] = None,
+    event_type: str = '',
+    recipient_user=None,
+    related_object=None,
+    from_email: Optional[str] = None,
+) -> EmailOutbox:
+    """Rend l'email et l'ajoute à l'outbox (une seule requête INSERT)."""
+    context = {
+        'site_name': getattr(settings, 'SITE_NAME', ''),
+        'site_url': getattr(settings, 'FRONTEND_URL', '') or '',
+        **context,
+    }
+    subject = ' '.join(render_to_string(subject_template_name, context).split())
+    body_html = render_to_string(html_template_name, context)
+    body_text = render_to_string(text_template_name, context) if text_template_name else strip_tags(body_html)
+
+    outbox = EmailOutbox(
+        event_type=event_type,
+        subject=subject[:255],
+        body_text=body_text,
+        body_html=body_html,
+        from_email=from_email or settings.DEFAULT_FROM_EMAIL,
+        to=list(recipient_list),
+        recipient_user=recipient_user,
+    )
+    if related_object is not None:
+        outbox.content_type = ContentType.objects.get_for_model(related_object)
+        outbox.object_id = str(related_object.pk)
+    outbox.save()
+    return outbox
+
+
+def claim_batch(batch_size: int = DEFAULT_BATCH_SIZE) -> List[EmailOutbox]:
+    """
+    Réserve jusqu'à `batch_size` messages prêts à partir. `skip_locked` permet
+    à plusieurs workers de tourner en parallèle sans se disputer les mêmes lignes.
+    """
+    now = timezone.now()
+    ready = Q(status=EmailOutbox.Status.PENDING, next_attempt_at__lte=now) | Q(
+        status=EmailOutbox.Status.SENDING, claimed_at__lt=now - timedelta(seconds=CLAIM_TIMEOUT_SECONDS)
+    )
+    with transaction.atomic():
+        batch = list(
+            EmailOutbox.objects.select_for_update(skip_locked=True)
+            .filter(ready)
+            .order_by('next_attempt_at', 'pk')[:batch_size]
+        )
+        if batch:
+            EmailOutbox.objects.filter(pk__in=[message.pk for message in batch]).update(
+                status=EmailOutbox.Status.SENDING, claimed_at=now
+            )
+    return batch
+
+
+def _retry_delay(attempts: int) -> timedelta:
+    return timedelta(seconds=min(RETRY_BACKOFF_SECONDS * 2 ** (attempts - 1), MAX_RETRY_DELAY_SECONDS))
+
+
+def _record_failure(message: EmailOutbox, error: Exception, max_attempts: int, stats: dict) -> None:
+    message.last_error = f"{type(error).__name__}: {error}"[:2000]
+    if message.attempts >= max_attempts:
+        message.status = EmailOutbox.Status.FAILED
+        stats['failed'] += 1
+        logger.error("Email %s abandonné après %s tentatives: %s", message.pk, message.attempts, error)
+    else:
+        message.status = EmailOutbox.Status.PENDING
+        message.next_attempt_at = timezone.now() + _retry_delay(message.attempts)
+        stats['retried'] += 1
+        logger.warning("Échec d'envoi de l'email %s (tentative %s): %s", message.pk, message.attempts, error)
+
+
+def deliver_batch(batch: List[EmailOutbox], max_attempts: int = DEFAULT_MAX_ATTEMPTS, connection=None) -> dict:
+    """Envoie `batch` sur une seule connexion et enregistre le résultat de chaque message."""
+    stats = {'sent': 0, 'retried': 0, 'failed': 0}
+    if not batch:
+        return stats
+
+    connection = connection or get_connection()
+    try:
+        # Une seule session SMTP pour tout le lot (la connexion reste ouverte entre les envois)
+        connection.open()
+    except Exception as e:
+        # Serveur injoignable : tout le lot est reprogrammé
+        for message in batch:
+            message.attempts += 1
+            message.claimed_at = None
+            _record_failure(message, e, max_attempts, stats)
+        _save_results(batch)
+        return stats
+
+    try:
+        for message in batch:
+            email = EmailMultiAlternatives(
+                subject=message.subject,
+                body=message.body_text,
+                from_email=message.from_email,
+                to=message.to,
+                connection=connection,
+            )
+            if message.body_html:
+                email.attach_alternative(message.body_html, 'text/html')
+
+            message.attempts += 1
+            message.claimed_at = None
+            try:
+                email.send()
+            except Exception as e:
+                _record_failure(message, e, max_attempts, stats)
+            else:
+                message.status = EmailOutbox.Status.SENT
+                message.sent_at = timezone.now()
+                message.last_error = ''
+                stats['sent'] += 1
+    finally:
+        try:
+            connection.close()
+        except Exception:
+            logger.warning("Fermeture de la connexion email en échec", exc_info=True)
+        _save_results(batch)
+    return stats
+
+
+def _save_results(batch: List[EmailOutbox]) -> None:
+    EmailOutbox.objects.bulk_update(
+        batch, ['status', 'attempts', 'next_attempt_at', 'claimed_at', 'last_error', 'sent_at']
+    )
+
+
+def process_outbox(batch_size: int = DEFAULT_BATCH_SIZE, max_attempts: int = DEFAULT_MAX_ATTEMPTS) -> dict:
+    """Envoie tous les messages prêts, lot par lot. Retourne les compteurs cumulés."""
+    totals = {'sent': 0, 'retried': 0, 'failed': 0}
+    while True:
+        batch = claim_batch(batch_size)
+        if not batch:
+            return totals
+        for key, value in deliver_batch(batch, max_attempts=max_attempts).items():
+            totals[key] += value
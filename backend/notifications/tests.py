@@ -0,0 +1,112 @@
+import smtplib
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+from django.core import mail
+from django.core.management import call_command
+from django.db import transaction
+from django.test import TestCase, TransactionTestCase
+from django.utils import timezone
+
+from notifications.models import EmailOutbox
+from notifications.services import (
+    CLAIM_TIMEOUT_SECONDS, claim_batch, deliver_batch, process_outbox, send_templated_email,
+)
+
+TEMPLATES = {
+    'subject_template_name': 'notifications/email/user_auth/password_reset_subject.txt',
+    'html_template_name': 'notifications/email/user_auth/password_reset_body.html',
+}
+
+
+def enqueue(to='someone@example.com', **kwargs):
+    return send_templated_email(
+        context={'user_name': 'Someone', 'reset_password_url': 'https://example.com/reset/abc/'},
+        recipient_list=[to],
+        event_type='test',
+        **TEMPLATES,
+        **kwargs,
+    )
+
+
+class EmailOutboxTests(TestCase):
+    """Mise en file transactionnelle et envoi par lots (backend locmem des tests)."""
+
+    def test_enqueue_renders_without_sending(self):
+        message = enqueue()
+        self.assertEqual(mail.outbox, [])
+        self.assertEqual(message.status, EmailOutbox.Status.PENDING)
+        self.assertEqual(message.subject, 'Réinitialisation de votre mot de passe')
+        self.assertIn('https://example.com/reset/abc/', message.body_html)
+        # Version texte dérivée du HTML en l'absence de template texte
+        self.assertNotIn('<p>', message.body_text)
+
+    def test_worker_sends_batch_over_one_connection(self):
+        for index in range(3):
+            enqueue(to=f'user{index}@example.com')
+
+        with mock.patch('django.core.mail.backends.locmem.EmailBackend.open') as open_connection:
+            stats = process_outbox(batch_size=10)
+
+        self.assertEqual(stats, {'sent': 3, 'retried': 0, 'failed': 0})
+        self.assertEqual(open_connection.call_count, 1)
+        self.assertEqual(len(mail.outbox), 3)
+        self.assertEqual(mail.outbox[0].alternatives[0][1], 'text/html')
+        self.assertFalse(EmailOutbox.objects.exclude(status=EmailOutbox.Status.SENT).exists())
+
+    def test_failures_are_retried_then_abandoned(self):
+        message = enqueue()
+        with mock.patch(
+            'django.core.mail.backends.locmem.EmailBackend.send_messages',
+            side_effect=smtplib.SMTPServerDisconnected('down'),
+        ):
+            self.assertEqual(process_outbox(max_attempts=2)['retried'], 1)
+            message.refresh_from_db()
+            self.assertEqual(message.status, EmailOutbox.Status.PENDING)
+            self.assertGreater(message.next_attempt_at, timezone.now())
+            # Pas encore l'heure de la prochaine tentative
+            self.assertEqual(claim_batch(), [])
+
+            EmailOutbox.objects.filter(pk=message.pk).update(next_attempt_at=timezone.now())
+            self.assertEqual(process_outbox(max_attempts=2)['failed'], 1)
+
+        message.refresh_from_db()
+        self.assertEqual(message.status, EmailOutbox.Status.FAILED)
+        self.assertEqual(message.attempts, 2)
+        self.assertIn('SMTPServerDisconnected', message.last_error)
+
+    def test_unreachable_server_reschedules_whole_batch(self):
+        enqueue()
+        enqueue()
+        connection = mock.Mock()
+        connection.open.side_effect = OSError('connection refused')
+        stats = deliver_batch(claim_batch(), connection=connection)
+        self.assertEqual(stats['retried'], 2)
+        self.assertFalse(EmailOutbox.objects.filter(status=EmailOutbox.Status.SENDING).exists())
+
+    def test_stale_claims_are_recovered(self):
+        message = enqueue()
+        claim_batch()
+        EmailOutbox.objects.filter(pk=message.pk).update(
+            claimed_at=timezone.now() - timedelta(seconds=CLAIM_TIMEOUT_SECONDS + 1)
+        )
+        self.assertEqual([claimed.pk for claimed in claim_batch()], [message.pk])
+
+    def test_management_command(self):
+        enqueue()
+        out = StringIO()
+        call_command('process_email_outbox', stdout=out)
+        self.assertIn('1 envoyé(s)', out.getvalue())
+        self.assertEqual(len(mail.outbox), 1)
+
+
+class EmailOutboxTransactionTests(TransactionTestCase):
+    """L'email n'existe que si la transaction qui l'a créé est validée."""
+
+    def test_rolled_back_transaction_leaves_no_message(self):
+        with self.assertRaises(RuntimeError):
+            with transaction.atomic():
+                enqueue()
+                raise RuntimeError
+        self.assertFalse(EmailOutbox.objects.exists())
@@ -1,3 +1,4 @@
+import logging
 from django.contrib import admin
 from django.contrib.contenttypes.models import ContentType
 from django.urls import reverse, NoReverseMatch
@@ -7,6 +8,8 @@ from django.utils.safestring import mark_safe
 
 from .models import SEOOverride
 
+logger = logging.getLogger(__name__)
+
 @admin.register(SEOOverride)
 class SEOOverrideAdmin(admin.ModelAdmin):
     # --- Config Liste (Identique) ---
@@ -171,7 +174,7 @@ class SEOOverrideAdmin(admin.ModelAdmin):
             try:
                  # Vérification si self.request existe avant de l'utiliser
                  if not hasattr(self, 'request'):
-                     print("WARN: self.request non disponible dans display_target_info_readonly en mode ajout initial.")
+                     logger.warning("self.request non disponible dans display_target_info_readonly en mode ajout initial.")
                      # Fallback générique si request n'est pas encore défini
                      return _("Utilisez la section 'Ciblage Manuel' pour définir la cible.")
 
@@ -194,10 +197,10 @@ class SEOOverrideAdmin(admin.ModelAdmin):
                   # --- FIN CORRECTION ---
             except AttributeError as e:
                  # Si self.request n'est pas défini même après la vérification (ne devrait pas arriver avec add_view/change_view surchargés)
-                 print(f"WARN: AttributeError in display_target_info_readonly (add mode): {e}")
+                 logger.warning("AttributeError in display_target_info_readonly (add mode): %s", e)
                  return _("Utilisez la section 'Ciblage Manuel' pour définir la cible.")
             except Exception as e:
-                 print(f"ERROR in display_target_info_readonly (add mode): {e}")
+                 logger.exception("Error in display_target_info_readonly (add mode): %s", e)
                  return _("Erreur lors de l'affichage des informations de ciblage.")
 
 
@@ -1,9 +1,12 @@
+import logging
 from django.contrib.contenttypes.models import ContentType
 from django.urls import reverse, NoReverseMatch
 from django.utils.html import format_html, escape
 from django.utils.translation import gettext_lazy as _
 from .models import SEOOverride # Attention à l'import relatif '.' si dans admin_utils.py
 
+logger = logging.getLogger(__name__)
+
 def get_seo_override_link(obj):
     """Génère un lien vers l'ajout ou la modification d'un SEOOverride pour l'objet donné."""
     if not obj or not obj.pk:
@@ -27,13 +30,13 @@ def get_seo_override_link(obj):
         return format_html('<a href="{}" class="{}" target="_blank" rel="noopener noreferrer">{}</a>', url, css_class, link_text)
 
     except ContentType.DoesNotExist:
-        print(f"ERROR: ContentType non trouvé pour le modèle {obj.__class__}")
+        logger.error("ContentType non trouvé pour le modèle %s", obj.__class__)
         return _("Erreur : ContentType non trouvé")
     except NoReverseMatch as e:
-         print(f"ERROR: NoReverseMatch pour le lien SEO. Vérifiez les noms d'URL admin ('admin:seo_seooverride_change' ou 'add'). Erreur: {e}")
+         logger.error("NoReverseMatch pour le lien SEO. Vérifiez les noms d'URL admin ('admin:seo_seooverride_change' ou 'add'). Erreur: %s", e)
          return _("Erreur : URL admin SEO introuvable")
     except Exception as e:
-        print(f"ERROR: Erreur imprévue lors de la génération du lien SEO pour {obj}: {e}")
+        logger.exception("Erreur imprévue lors de la génération du lien SEO pour %s: %s", obj, e)
         return _("Erreur lors de la génération du lien SEO")
 
 # Configuration pour l'admin (si utilisée directement dans list_display)
@@ -106,6 +106,16 @@ class SEOConfig:
         """Liste des URLs 'sameAs' (profils sociaux) extraite de default_organization."""
         return self.default_organization.get('sameAs', [])
 
+    @property
+    def server_timing_enabled(self) -> bool:
+        """Expose le chronométrage du pipeline SEO dans l'en-tête HTTP `Server-Timing`."""
+        return bool(self.settings_dict.get('SERVER_TIMING', False))
+
+    @property
+    def slow_render_threshold_ms(self) -> float:
+        """Au-delà de ce temps (ms), un rendu SEO est journalisé en WARNING."""
+        return float(self.settings_dict.get('SLOW_RENDER_THRESHOLD_MS', 200))
+
     # --- Ajoutez d'autres propriétés au besoin ---
     # Exemple: Si vous avez une valeur par défaut pour la disponibilité des produits
     # @property
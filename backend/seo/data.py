@@ -11,6 +11,7 @@ class PageContext:
     page_type: str = 'website' # 'product', 'category', 'search', 'static', etc.
     view_kwargs: Dict[str, Any] = field(default_factory=dict)
     extra_data: Dict[str, Any] = field(default_factory=dict) # Pour breadcrumbs, terme recherche, 
+    timings: Optional[Any] = None # SEOTimings renseigné par SEOOrchestrator (voir seo/instrumentation.py)
 
     def get_absolute_uri(self, relative_path: str) -> str:
         return self.request.build_absolute_uri(relative_path)
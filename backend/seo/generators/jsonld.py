@@ -7,6 +7,9 @@ from seo.data import PageContext, StandardizedSEOData
 from seo.models import SEOOverride
 from seo.config import seo_config
 from decimal import Decimal # Pour typer price
+import logging
+
+logger = logging.getLogger(__name__)
 
 class JsonLdGeneratorFunction(Protocol):
     """Interface pour une fonction qui génère un dictionnaire JSON-LD."""
@@ -18,7 +21,7 @@ def generate_website_ld(page_context: PageContext, seo_data: StandardizedSEOData
     """Génère le schéma WebSite avec la Sitelinks Search Box."""
     org_url = seo_config.organization_url
     if not org_url:
-        print("WARN: SEOConfig.organization_url non défini, WebSite JSON-LD ne sera pas généré.")
+        logger.warning("SEOConfig.organization_url non défini, WebSite JSON-LD ne sera pas généré.")
         return None
 
     # Assurez-vous que l'URL est absolue
@@ -27,7 +30,7 @@ def generate_website_ld(page_context: PageContext, seo_data: StandardizedSEOData
         if not base_url: # Sécurité si build_absolute_uri retourne None ou vide
              raise ValueError("Impossible de déterminer l'URL de base")
     except Exception as e:
-         print(f"WARN: Impossible de construire l'URL absolue pour WebSite JSON-LD: {e}")
+         logger.warning("Impossible de construire l'URL absolue pour WebSite JSON-LD: %s", e)
          return None
 
     # Recherche Sitelinks
@@ -76,7 +79,7 @@ def generate_organization_ld(page_context: PageContext, seo_data: StandardizedSE
     """Génère le schéma Organization basé sur la configuration."""
     org_config = seo_config.default_organization
     if not org_config or not org_config.get('name') or not org_config.get('url'):
-        print("WARN: Données d'organisation incomplètes dans SEO_SETTINGS, Organization JSON-LD ne sera pas généré.")
+        logger.warning("Données d'organisation incomplètes dans SEO_SETTINGS, Organization JSON-LD ne sera pas généré.")
         return None
 
     # Préparer une copie avec @context
@@ -96,15 +99,16 @@ def generate_product_ld(page_context: PageContext, seo_data: StandardizedSEOData
     Génère le schéma Product complet et optimisé pour Cicaw.
     """
     # --- Validation Essentielle ---
-    error_prefix = f"Product JSON-LD generation skipped for product '{seo_data.name or 'UNKNOWN'}' because:"
+    error_prefix = "Product JSON-LD generation skipped for product '%s' because:"
+    product_name = seo_data.name or 'UNKNOWN'
     if not seo_data.name:
-        print(f"{error_prefix} 'name' is missing.")
+        logger.warning(error_prefix + " 'name' is missing.", product_name)
         return None
     if seo_data.price is None or not isinstance(seo_data.price, (Decimal, float, int)) or seo_data.price < 0:
-        print(f"{error_prefix} 'price' is missing, invalid, or negative ('{seo_data.price}').")
+        logger.warning(error_prefix + " 'price' is missing, invalid, or negative ('%s').", product_name, seo_data.price)
         return None
     if not seo_data.url_path:
-        print(f"{error_prefix} 'url_path' is missing.")
+        logger.warning(error_prefix + " 'url_path' is missing.", product_name)
         return None
 
     # --- Préparation des Données ---
@@ -112,7 +116,7 @@ def generate_product_ld(page_context: PageContext, seo_data: StandardizedSEOData
         product_url = page_context.request.build_absolute_uri(seo_data.url_path)
         if not product_url: raise ValueError("URL Produit vide générée")
     except Exception as e:
-        print(f"ERROR {error_prefix} failed to build absolute URL from '{seo_data.url_path}': {e}")
+        logger.error(error_prefix + " failed to build absolute URL from '%s': %s", product_name, seo_data.url_path, e)
         return None
 
     # URLs Images (Liste, image principale en premier)
@@ -283,14 +287,14 @@ def generate_breadcrumb_ld(page_context: PageContext, seo_data: StandardizedSEOD
                  if item_url:
                      item_data["item"] = item_url
                  else:
-                      print(f"WARN: Impossible de générer URL pour breadcrumb item '{name}' avec path '{path}'")
+                      logger.warning("Impossible de générer URL pour breadcrumb item '%s' avec path '%s'", name, path)
              items.append(item_data)
 
         if not items: # Si aucun item n'a pu être généré
              return None
 
     except Exception as e:
-         print(f"ERROR: Échec de la génération des items Breadcrumb: {e}")
+         logger.exception("Échec de la génération des items Breadcrumb: %s", e)
          return None
 
     return {
@@ -308,7 +312,7 @@ def generate_category_ld(page_context: PageContext, seo_data: StandardizedSEODat
         category_url = page_context.request.build_absolute_uri(seo_data.url_path)
         if not category_url: raise ValueError("URL Catégorie vide")
     except Exception as e:
-         print(f"WARN: Impossible de construire l'URL absolue pour Category JSON-LD: {e}")
+         logger.warning("Impossible de construire l'URL absolue pour Category JSON-LD: %s", e)
          return None
 
     # Utiliser CollectionPage ou WebPage comme type? WebPage est plus simple.
@@ -330,14 +334,14 @@ def generate_category_ld(page_context: PageContext, seo_data: StandardizedSEODat
 def generate_card_page_ld(page_context: PageContext, seo_data: StandardizedSEOData, override: Optional[SEOOverride]) -> Optional[Dict[str, Any]]:
     """Génère le schéma CollectionPage pour une page Card."""
     if not seo_data.name or not seo_data.url_path:
-        print(f"WARN: Données manquantes (name ou url_path) pour Card Page JSON-LD.")
+        logger.warning("Données manquantes (name ou url_path) pour Card Page JSON-LD.")
         return None
 
     try:
         page_url = page_context.request.build_absolute_uri(seo_data.url_path)
         if not page_url: raise ValueError("URL Page Card vide générée")
     except Exception as e:
-        print(f"ERROR Card Page JSON-LD: Impossible de construire l'URL absolue: {e}")
+        logger.error("Card Page JSON-LD: Impossible de construire l'URL absolue: %s", e)
         return None
 
     item_list_elements = []
@@ -409,7 +413,7 @@ def generate_webpage_ld(page_context: PageContext, seo_data: StandardizedSEOData
         page_url = page_context.request.build_absolute_uri(seo_data.url_path)
         if not page_url: raise ValueError("URL Page vide générée")
     except Exception as e:
-        print(f"ERROR WebPage JSON-LD: Impossible de construire l'URL absolue: {e}")
+        logger.error("WebPage JSON-LD: Impossible de construire l'URL absolue: %s", e)
         return None
 
     webpage_data = {
@@ -476,14 +480,14 @@ def generate_blog_schema_ld(page_context: PageContext, seo_data: StandardizedSEO
 def generate_blog_posting_ld(page_context: PageContext, seo_data: StandardizedSEOData, override: Optional[SEOOverride]) -> Optional[Dict[str, Any]]:
     """Génère le schéma BlogPosting (ou Article) pour un article de blog."""
     if not seo_data.name or not seo_data.url_path or not seo_data.date_published:
-        print(f"WARN: Données manquantes (name, url_path ou date_published) pour BlogPosting JSON-LD.")
+        logger.warning("Données manquantes (name, url_path ou date_published) pour BlogPosting JSON-LD.")
         return None
 
     try:
         post_url = page_context.request.build_absolute_uri(seo_data.url_path)
         if not post_url: raise ValueError("URL Article vide")
     except Exception as e:
-        print(f"ERROR BlogPosting JSON-LD: Impossible de construire l'URL absolue: {e}")
+        logger.error("BlogPosting JSON-LD: Impossible de construire l'URL absolue: %s", e)
         return None
 
     # Précision sur l'auteur
@@ -602,7 +606,7 @@ class JsonLdProcessor:
                 elif isinstance(custom_ld, dict): # Si c'est un objet unique
                      scripts.append(json.dumps(custom_ld, ensure_ascii=False, indent=2))
                 else:
-                    print(f"WARN: custom_json_ld pour l'override {override.pk} n'est ni une liste ni un dict.")
+                    logger.warning("custom_json_ld pour l'override %s n'est ni une liste ni un dict.", override.pk)
 
                 # Si un override existe, on n'ajoute PAS les générés automatiquement ?
                 # Ou on les ajoute APRES ? Pour l'instant, on suppose que l'override remplace tout.
@@ -611,7 +615,7 @@ class JsonLdProcessor:
                 # Si l'override était invalide, on continue avec la génération auto
 
             except (json.JSONDecodeError, TypeError) as e:
-                print(f"ERROR: Erreur lors de la sérialisation du custom_json_ld pour l'override {override.pk}: {e}")
+                logger.error("Erreur lors de la sérialisation du custom_json_ld pour l'override %s: %s", override.pk, e)
                 # Continuer avec la génération automatique comme fallback
 
         # --- Génération Automatique ---
@@ -624,18 +628,17 @@ class JsonLdProcessor:
                     if ld_data and isinstance(ld_data, dict): # Vérifier que c'est bien un dict
                         generated_data[key] = ld_data # Stocker avec clé unique
                     else:
-                         print(f"DEBUG: Générateur '{key}' n'a rien retourné pour page type '{page_type}'.")
+                         logger.debug("Générateur '%s' n'a rien retourné pour page type '%s'.", key, page_type)
                 except Exception as e:
-                     print(f"ERROR: Échec de l'exécution du générateur JSON-LD '{key}' pour page type '{page_type}': {e}")
-                     import traceback
-                     traceback.print_exc() # Afficher la trace complète pour le débogage
+                     # logger.exception joint la trace complète à l'enregistrement
+                     logger.exception("Échec de l'exécution du générateur JSON-LD '%s' pour page type '%s': %s", key, page_type, e)
 
         # Sérialiser les dictionnaires uniques générés
         for ld_data in generated_data.values():
              try:
                  scripts.append(json.dumps(ld_data, ensure_ascii=False, indent=2))
              except TypeError as e:
-                 print(f"ERROR: Échec de la sérialisation JSON pour {ld_data.get('@type', 'Donnée inconnue')}: {e}")
+                 logger.error("Échec de la sérialisation JSON pour %s: %s", ld_data.get('@type', 'Donnée inconnue'), e)
 
         return scripts
     
@@ -3,6 +3,9 @@ from seo.data import PageContext, StandardizedSEOData
 from seo.models import SEOOverride
 from seo.config import seo_config
 from typing import Optional, Dict
+import logging
+
+logger = logging.getLogger(__name__)
 
 class MetaTagGenerator(SEOGenerator):
     def generate(self, page_context: PageContext, seo_data: StandardizedSEOData, override: Optional[SEOOverride]) -> Dict:
@@ -34,7 +37,7 @@ class MetaTagGenerator(SEOGenerator):
                 canonical_url = page_context.request.build_absolute_uri(seo_data.url_path)
             except Exception as e:
                 # Logguer l'erreur potentielle ici si nécessaire
-                print(f"Erreur build_absolute_uri pour canonical: {e}")
+                logger.warning("Erreur build_absolute_uri pour canonical: %s", e)
                 pass # Garder canonical_url = None
 
         robots = seo_config.default_robots
@@ -0,0 +1,136 @@
+# seo/instrumentation.py
+
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+from django.db import connection
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class StageTiming:
+    """Mesure d'une étape du pipeline SEO (provider, override, meta, social, jsonld)."""
+    name: str
+    duration_ms: float = 0.0
+    queries: int = 0
+    error: Optional[str] = None
+
+
+@dataclass
+class SEOTimings:
+    """
+    Chronométrage d'un appel à `SEOOrchestrator.get_seo_context`.
+
+    Une instance est créée par requête (l'orchestrateur est partagé entre les threads)
+    et attachée au `PageContext` pour que la vue puisse exposer l'en-tête `Server-Timing`.
+    """
+    page_type: str
+    provider_name: Optional[str] = None
+    stages: List[StageTiming] = field(default_factory=list)
+
+    @property
+    def total_ms(self) -> float:
+        return sum(stage.duration_ms for stage in self.stages)
+
+    @property
+    def total_queries(self) -> int:
+        return sum(stage.queries for stage in self.stages)
+
+    @contextmanager
+    def stage(self, name: str):
+        """Mesure la durée et le nombre de requêtes SQL exécutées dans le bloc."""
+        timing = StageTiming(name=name)
+        self.stages.append(timing)
+
+        def count_queries(execute, sql, params, many, context):
+            timing.queries += 1
+            return execute(sql, params, many, context)
+
+        start = time.perf_counter()
+        try:
+            with connection.execute_wrapper(count_queries):
+                yield timing
+        except Exception as e:
+            timing.error = e.__class__.__name__
+            raise
+        finally:
+            timing.duration_ms = (time.perf_counter() - start) * 1000
+
+    def as_server_timing(self) -> str:
+        """Formate les mesures pour l'en-tête HTTP `Server-Timing`."""
+        entries = [
+            f'seo-{stage.name};dur={stage.duration_ms:.2f};desc="{stage.queries}q"'
+            for stage in self.stages
+        ]
+        entries.append(f'seo;dur={self.total_ms:.2f};desc="{self.total_queries}q"')
+        return ', '.join(entries)
+
+    def as_log_data(self) -> Dict:
+        """Représentation structurée pour les `extra` des logs."""
+        return {
+            'page_type': self.page_type,
+            'provider': self.provider_name,
+            'total_ms': round(self.total_ms, 2),
+            'total_queries': self.total_queries,
+            'stages': {
+                stage.name: {
+                    'duration_ms': round(stage.duration_ms, 2),
+                    'queries': stage.queries,
+                    'error': stage.error,
+                }
+                for stage in self.stages
+            },
+        }
+
+
+class SEOMetrics:
+    """
+    Compteurs agrégés en mémoire (par processus) des rendus SEO.
+
+    Regroupés par (page_type, provider, étape) pour repérer les providers lents.
+    Consultables via `seo_metrics.snapshot()` (shell, endpoint de monitoring...).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters: Dict[tuple, Dict[str, float]] = {}
+
+    def record(self, timings: SEOTimings) -> None:
+        with self._lock:
+            for stage in timings.stages:
+                key = (timings.page_type, timings.provider_name, stage.name)
+                counter = self._counters.setdefault(
+                    key, {'count': 0, 'errors': 0, 'total_ms': 0.0, 'max_ms': 0.0, 'queries': 0}
+                )
+                counter['count'] += 1
+                counter['total_ms'] += stage.duration_ms
+                counter['max_ms'] = max(counter['max_ms'], stage.duration_ms)
+                counter['queries'] += stage.queries
+                if stage.error:
+                    counter['errors'] += 1
+
+    def snapshot(self) -> List[Dict]:
+        with self._lock:
+            return [
+                {
+                    'page_type': page_type,
+                    'provider': provider,
+                    'stage': stage,
+                    **values,
+                    'avg_ms': values['total_ms'] / values['count'] if values['count'] else 0.0,
+                }
+                for (page_type, provider, stage), values in self._counters.items()
+            ]
+
+    def reset(self) -> None:
+        with self._lock:
+            self._counters.clear()
+
+
+# Instance unique partagée par l'orchestrateur
+seo_metrics = SEOMetrics()
@@ -3,6 +3,9 @@ from django.urls import reverse
 from seo.protocols import SEODataProvider
 from seo.data import PageContext, StandardizedSEOData
 from seo.config import seo_config
+import logging
+
+logger = logging.getLogger(__name__)
 
 class BaseDataProvider:
     """Classe de base optionnelle pour partager des logiques."""
@@ -26,7 +29,7 @@ class LoginPageSEODataProvider(BaseDataProvider, SEODataProvider):
             # Assurez-vous d'avoir un nom d'URL pour cette vue (ex: 'login')
             url_path = reverse('login') # Remplacer par le nom réel de l'URL de connexion
         except Exception as e:
-             print(f"WARN: Impossible de trouver l'URL nommée 'login': {e}")
+             logger.debug("Impossible de trouver l'URL nommée 'login': %s", e)
              url_path = '/login' # Fallback
 
         common_data = self.get_common_data(context)
@@ -50,7 +53,7 @@ class SignupPageSEODataProvider(BaseDataProvider, SEODataProvider):
         try:
             url_path = reverse('signup') # Assurez-vous que 'signup' est le nom de votre URL
         except Exception as e:
-             print(f"WARN: Impossible de trouver l'URL nommée 'signup': {e}")
+             logger.debug("Impossible de trouver l'URL nommée 'signup': %s", e)
              url_path = '/sign-in/' # Fallback sur l'URL en dur si vous utilisez celle-là
 
         common_data = self.get_common_data(context)
@@ -1,3 +1,4 @@
+import logging
 from django.contrib.contenttypes.models import ContentType
 from typing import Optional, Dict
 
@@ -8,6 +9,10 @@ from seo.providers import get_provider
 from seo.generators.meta import MetaTagGenerator
 # from .generators.social import SocialTagGenerator # À créer
 from seo.generators.jsonld import JsonLdProcessor
+from seo.instrumentation import SEOTimings, seo_metrics
+from seo.config import seo_config
+
+logger = logging.getLogger(__name__)
 
 class OverrideService:
     def get_override(self, context: PageContext) -> Optional[SEOOverride]:
@@ -31,18 +36,47 @@ class SEOOrchestrator:
         self.jsonld_processor = JsonLdProcessor()
 
     def get_seo_context(self, page_context: PageContext) -> Dict:
+        timings = SEOTimings(page_type=page_context.page_type)
+        page_context.timings = timings
+        try:
+            return self._build_seo_context(page_context, timings)
+        finally:
+            self._record_timings(timings)
+
+    def _record_timings(self, timings: SEOTimings) -> None:
+        """Alimente les compteurs et émet un événement de log structuré par rendu."""
+        seo_metrics.record(timings)
+        failed = any(stage.error for stage in timings.stages)
+        if failed or timings.total_ms > seo_config.slow_render_threshold_ms:
+            level = logging.ERROR if failed else logging.WARNING
+        else:
+            level = logging.DEBUG
+        if logger.isEnabledFor(level):
+            logger.log(
+                level, "SEO render page_type=%s provider=%s total=%.1fms queries=%d",
+                timings.page_type, timings.provider_name, timings.total_ms, timings.total_queries,
+                extra={'seo_timings': timings.as_log_data()},
+            )
+
+    def _build_seo_context(self, page_context: PageContext, timings: SEOTimings) -> Dict:
         provider = self.provider_registry(page_context.page_type)
         seo_data = StandardizedSEOData() # Default empty data
         if provider:
-            seo_data = provider.get_seo_data(page_context)
+            timings.provider_name = provider.__class__.__name__
+            with timings.stage('provider'):
+                seo_data = provider.get_seo_data(page_context)
             # Note: Pas besoin d'injecter 'request' ici si on passe page_context
 
-        override = self.override_service.get_override(page_context)
+        with timings.stage('override'):
+            override = self.override_service.get_override(page_context)
 
         # 3. Générer les différentes parties - MODIFIÉ: Passe page_context
-        meta_results = self.meta_generator.generate(page_context, seo_data, override)
-        social_results = self.social_generator.generate(page_context, seo_data, override) # MODIFIÉ
-        json_ld_scripts = self.jsonld_processor.generate(page_context, seo_data, override) # MODIFIÉ
+        with timings.stage('meta'):
+            meta_results = self.meta_generator.generate(page_context, seo_data, override)
+        with timings.stage('social'):
+            social_results = self.social_generator.generate(page_context, seo_data, override) # MODIFIÉ
+        with timings.stage('jsonld'):
+            json_ld_scripts = self.jsonld_processor.generate(page_context, seo_data, override) # MODIFIÉ
 
         # 4. Assembler le contexte final pour le template
         final_context = {
@@ -1,3 +1,65 @@
-from django.test import TestCase
+from unittest import mock
 
-# Create your tests here.
+from django.test import TestCase, RequestFactory, override_settings
+from django.conf import settings
+from django.http import HttpResponse
+
+from core.views import BasePageView
+
+from seo.data import PageContext
+from seo.instrumentation import seo_metrics
+from seo.services import SEOOrchestrator
+
+
+class SEOInstrumentationTests(TestCase):
+    """Chronométrage par étape de SEOOrchestrator et en-tête Server-Timing."""
+
+    def setUp(self):
+        self.factory = RequestFactory()
+        seo_metrics.reset()
+
+    def _page_context(self, page_type='login_page'):
+        return PageContext(request=self.factory.get('/login'), page_type=page_type)
+
+    def test_orchestrator_records_each_stage(self):
+        page_context = self._page_context()
+        SEOOrchestrator().get_seo_context(page_context)
+
+        timings = page_context.timings
+        self.assertIsNotNone(timings)
+        self.assertEqual(timings.provider_name, 'LoginPageSEODataProvider')
+        self.assertEqual(
+            [stage.name for stage in timings.stages],
+            ['provider', 'override', 'meta', 'social', 'jsonld'],
+        )
+        # La recherche d'override interroge la table SEOOverride (au moins une requête)
+        override_stage = next(stage for stage in timings.stages if stage.name == 'override')
+        self.assertGreaterEqual(override_stage.queries, 1)
+
+    def test_metrics_are_aggregated_per_provider_and_stage(self):
+        orchestrator = SEOOrchestrator()
+        orchestrator.get_seo_context(self._page_context())
+        orchestrator.get_seo_context(self._page_context())
+
+        rows = {row['stage']: row for row in seo_metrics.snapshot()}
+        self.assertEqual(rows['provider']['count'], 2)
+        self.assertEqual(rows['provider']['provider'], 'LoginPageSEODataProvider')
+        self.assertEqual(rows['jsonld']['errors'], 0)
+
+    def test_server_timing_header_format(self):
+        page_context = self._page_context(page_type='website')
+        SEOOrchestrator().get_seo_context(page_context)
+
+        header = page_context.timings.as_server_timing()
+        self.assertIn('seo-override;dur=', header)
+        self.assertTrue(header.split(', ')[-1].startswith('seo;dur='))
+
+    @mock.patch('core.views.render', side_effect=lambda *args, **kwargs: HttpResponse())
+    def test_base_page_view_sets_server_timing_only_when_enabled(self, _render):
+        view = BasePageView.as_view()
+        response = view(self.factory.get('/'))
+        self.assertNotIn('Server-Timing', response)
+
+        with override_settings(SEO_SETTINGS={**settings.SEO_SETTINGS, 'SERVER_TIMING': True}):
+            response = view(self.factory.get('/'))
+        self.assertIn('seo;dur=', response['Server-Timing'])
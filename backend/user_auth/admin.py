@@ -4,6 +4,8 @@ from .models import User
 
 class CustomUserAdmin(UserAdmin):
     list_display = ('username', 'email', 'birthday', 'gender', )
+    # Le modèle n'a pas first_name/last_name (recherche et autocomplete de l'admin)
+    search_fields = ('username', 'email', 'full_name')
     fieldsets = (
         (None, {'fields': ('username', 'email', 'password')}),
         ('Personal info', {'fields': ('full_name', 'birthday', 'gender', 'profile_color')}),
@@ -9,3 +9,6 @@ class UserAuthConfig(AppConfig):
 
     def ready(self):
         import user_auth.signals
+        from user_auth.jwks import install_token_backend
+
+        install_token_backend()
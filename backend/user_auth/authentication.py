@@ -1,12 +1,28 @@
 from rest_framework_simplejwt.authentication import JWTAuthentication
 from rest_framework_simplejwt.exceptions import InvalidToken, AuthenticationFailed
 from django.conf import settings
+from rest_framework_simplejwt.settings import api_settings
+from user_auth.cache import get_cached_token_user, cache_token_user
+from user_auth.tokens import has_profile_claims
+import logging
+
+logger = logging.getLogger(__name__)
 
 class CookieJWTAuthentication(JWTAuthentication):
     """
     Authentification JWT personnalisée qui lit le token d'accès
     depuis un cookie HTTP Only spécifié dans les settings.
+
+    L'utilisateur résolu est mis en cache (voir user_auth/cache.py) pour
+    éviter un SELECT sur User à chaque requête authentifiée.
     """
+    def get_user(self, validated_token):
+        user = get_cached_token_user(validated_token)
+        if user is None:
+            user = super().get_user(validated_token)
+            cache_token_user(validated_token, user)
+        return user
+
     def authenticate(self, request):
         # Récupère le nom du cookie d'accès depuis les settings
         access_cookie_name = settings.SIMPLE_JWT.get('AUTH_COOKIE')
@@ -26,8 +42,7 @@ class CookieJWTAuthentication(JWTAuthentication):
              # Récupère l'utilisateur associé au token validé
             user = self.get_user(validated_token)
         except InvalidToken as e:
-            # Log l'erreur si nécessaire
-            print(f"CookieJWTAuthentication: Invalid token found in cookie '{access_cookie_name}'. Error: {e}")
+            logger.debug("CookieJWTAuthentication: Invalid token found in cookie '%s'. Error: %s", access_cookie_name, e)
             # Important : Ne pas lever AuthenticationFailed ici directement si on veut
             # potentiellement permettre à d'autres méthodes d'auth de s'exécuter.
             # Retourner None signifie que CETTE méthode n'a pas pu authentifier.
@@ -38,7 +53,7 @@ class CookieJWTAuthentication(JWTAuthentication):
 
         except Exception as e:
             # Gérer d'autres erreurs potentielles (ex: user not found, etc.)
-            print(f"CookieJWTAuthentication: Error during authentication. Error: {e}")
+            logger.warning("CookieJWTAuthentication: Error during authentication. Error: %s", e)
             raise AuthenticationFailed("Erreur pendant la validation du token cookie.")
 
         if not user or not user.is_active:
@@ -46,4 +61,23 @@ class CookieJWTAuthentication(JWTAuthentication):
 
         # Si tout réussit, retourne l'utilisateur et le token validé
         # C'est ce qui définit request.user et request.auth
-        return (user, validated_token)
\ No newline at end of file
+        return (user, validated_token)
+
+
+class CookieJWTStatelessAuthentication(CookieJWTAuthentication):
+    """
+    Variante sans état, à activer vue par vue via `authentication_classes`.
+
+    L'utilisateur est construit à partir des claims du token d'accès
+    (`TOKEN_USER_CLASS`, voir user_auth/tokens.py) : ni base ni cache.
+    Réservée aux vues qui n'ont besoin que de l'identité (id, username,
+    is_superuser, profile_color) ; le token ne porte aucune donnée personnelle.
+    Les tokens émis avant l'ajout des claims retombent sur la résolution
+    classique.
+    """
+    def get_user(self, validated_token):
+        if not has_profile_claims(validated_token):
+            return super().get_user(validated_token)
+        if api_settings.USER_ID_CLAIM not in validated_token:
+            raise InvalidToken("Le token ne contient aucun identifiant utilisateur reconnaissable.")
+        return api_settings.TOKEN_USER_CLASS(validated_token)
@@ -1,6 +1,7 @@
 from django.contrib.auth import get_user_model
 from django.contrib.auth.backends import ModelBackend
-from django.db.models import Q
+
+from user_auth.hashers import check_password_deferred_rehash
 
 UserModel = get_user_model()
 
@@ -16,27 +17,40 @@ class EmailOrUsernameModelBackend(ModelBackend):
         if not username: # Encore une fois, s'assurer qu'on a quelque chose
             return None
 
-        # Essayer de trouver l'utilisateur par nom d'utilisateur OU par email
-        # On utilise Q object pour faire un OR dans la requête
+        # Essayer de trouver l'utilisateur par nom d'utilisateur OU par email.
+        # Chaque branche compare LOWER(col) à LOWER(identifiant) pour utiliser les
+        # index fonctionnels de User.Meta ; les deux sondes sont réunies par UNION
+        # plutôt que par un OR, que le planificateur ne combine pas toujours en index.
         try:
             # On vérifie si l'identifiant fourni ressemble à un email
             # C'est une simple heuristique, une validation plus poussée de l'email
             # devrait être faite au niveau du formulaire/serializer d'inscription.
+            queryset = UserModel.objects.by_identifier(username, 'username')
             if '@' in username:
-                # On suppose que c'est un email. `i` pour insensible à la casse.
-                user = UserModel.objects.get(Q(email__iexact=username) | Q(username__iexact=username))
-            else:
-                # On suppose que c'est un nom d'utilisateur
-                user = UserModel.objects.get(Q(username__iexact=username))
+                # On suppose que c'est un email, mais un nom d'utilisateur peut aussi contenir '@'
+                queryset = UserModel.objects.by_identifier(username, 'email').union(queryset)
+            users = list(queryset[:2])
+            if not users:
+                raise UserModel.DoesNotExist
+            if len(users) > 1:
+                raise UserModel.MultipleObjectsReturned
+            user = users[0]
         except UserModel.DoesNotExist:
             # Lancer UserModel.DoesNotExistS silencieusement ne révélera pas
             # si c'est le nom d'utilisateur ou le mot de passe qui est incorrect.
+            # Hachage factice : même coût qu'un mauvais mot de passe, pour ne pas
+            # révéler par le temps de réponse qu'aucun compte n'existe.
+            UserModel().set_password(password)
             return None
         except UserModel.MultipleObjectsReturned:
             # Cela ne devrait pas arriver si username et email sont uniques.
             # Mais si c'est le cas, c'est une erreur de données.
+            UserModel().set_password(password)
             return None 
         else:
-            if user.check_password(password) and self.user_can_authenticate(user):
+            # Vérification sans re-hachage synchrone : si la politique de hachage a
+            # changé, le nouveau hachage est calculé en tâche de fond (user_auth/hashers.py)
+            if check_password_deferred_rehash(user, password) and self.user_can_authenticate(user):
                 return user
-        return None # Authentification échouée
\ No newline at end of file
+        return None # Authentification échouée
+
@@ -0,0 +1,328 @@
+"""
+Liste noire des refresh tokens adossée au cache partagé.
+
+Sans ce module, chaque refresh fait un `EXISTS` sur BlacklistedToken puis,
+avec la rotation, plusieurs SELECT/INSERT pour mettre l'ancien token en liste
+noire et enregistrer le nouveau. Ici :
+
+- les `jti` révoqués sont écrits dans le cache (une clé par token, expirant
+  avec lui) : la vérification est une lecture de cache, sans SQL ;
+- une clé « chargée » indique que le cache contient toute la liste noire.
+  Absente (cache vidé, redémarré), la liste est rechargée depuis la base ;
+  si le cache est injoignable on interroge directement la base ;
+- une révocation (BlacklistedToken) est écrite en base dans la requête, avant
+  le cache : elle survit à un arrêt brutal du processus comme à un cache vidé ;
+- les lignes OutstandingToken des tokens émis sont mises en tampon dans le
+  processus et écrites par lots (`bulk_create`) depuis le pool de tâches de
+  fond, dès que le lot est plein ou au plus tard
+  `BLACKLIST_WRITE_FLUSH_SECONDS` après le premier ajout (minuteur), ainsi
+  qu'à l'arrêt du processus. Une ligne perdue n'a pas d'effet sur la sécurité :
+  la révocation d'un token l'écrit aussi.
+
+Le cache doit être partagé par tous les workers (Redis) et ne pas évincer de
+clés (`maxmemory-policy noeviction` ou `volatile-ttl`), sinon une révocation
+pourrait être perdue. Le mode est demandé par
+`SIMPLE_JWT['BLACKLIST_CACHE_ENABLED']` (par défaut si REDIS_URL est défini)
+mais n'est actif que si `BLACKLIST_CACHE_ALIAS` désigne un cache Redis
+(`cache_is_shared`) : un cache LocMem est propre au processus et évince ses
+clés les moins lues. Désactivé, le comportement est celui de simplejwt
+(`EXISTS` sur BlacklistedToken à chaque refresh).
+
+Le rechargement de la liste noire est fait par une seule requête à la fois
+(verrou `cache.add`) ; les autres interrogent la base en attendant.
+"""
+import atexit
+import logging
+import threading
+import time
+from typing import List, NamedTuple, Optional
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.redis import RedisCache
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.utils import timezone
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+from rest_framework_simplejwt.utils import datetime_from_epoch
+
+from core.background import run_in_background
+
+logger = logging.getLogger(__name__)
+
+BLACKLIST_CACHE_PREFIX = 'user_auth:jwt_blacklist'
+LOADED_KEY = f'{BLACKLIST_CACHE_PREFIX}:loaded'
+LOAD_LOCK_KEY = f'{BLACKLIST_CACHE_PREFIX}:loading'
+# Durée maximale d'un rechargement : au-delà, un autre processus peut reprendre le verrou
+LOAD_LOCK_TIMEOUT = 60
+DEFAULT_BATCH_SIZE = 100
+DEFAULT_FLUSH_SECONDS = 2.0
+# Taille des lots lors du rechargement de la liste noire dans le cache
+LOAD_CHUNK_SIZE = 5000
+
+
+_unshared_cache_warned = False
+
+
+def is_enabled() -> bool:
+    """Mode cache demandé et cache partagé sans éviction ; sinon comportement de simplejwt."""
+    global _unshared_cache_warned
+    if not settings.SIMPLE_JWT.get('BLACKLIST_CACHE_ENABLED', False):
+        return False
+    if cache_is_shared():
+        return True
+    if not _unshared_cache_warned:
+        _unshared_cache_warned = True
+        logger.warning(
+            "BLACKLIST_CACHE_ENABLED ignoré : le cache %r n'est pas un cache Redis partagé, "
+            "la liste noire est vérifiée en base",
+            settings.SIMPLE_JWT.get('BLACKLIST_CACHE_ALIAS', 'default'),
+        )
+    return False
+
+
+def _cache():
+    return caches[settings.SIMPLE_JWT.get('BLACKLIST_CACHE_ALIAS', 'default')]
+
+
+def cache_is_shared() -> bool:
+    """Seul Redis est vu par tous les workers (l'absence d'éviction reste à configurer côté serveur)."""
+    return isinstance(_cache(), RedisCache)
+
+
+def _key(jti: str) -> str:
+    return f'{BLACKLIST_CACHE_PREFIX}:{jti}'
+
+
+def _remaining_seconds(expires_at) -> int:
+    return int((expires_at - timezone.now()).total_seconds())
+
+
+class PendingToken(NamedTuple):
+    jti: str
+    token: str
+    user_id: Optional[int]
+    created_at: object
+    expires_at: object
+
+
+def pending_from_token(token, user_id=None) -> PendingToken:
+    return PendingToken(
+        jti=token.payload[api_settings.JTI_CLAIM],
+        token=str(token),
+        user_id=user_id if user_id is not None else token.payload.get(api_settings.USER_ID_CLAIM),
+        created_at=token.current_time,
+        expires_at=datetime_from_epoch(token.payload['exp']),
+    )
+
+
+# --- Écritures différées ---------------------------------------------------
+
+class _WriteBuffer:
+    """
+    Tampon des lignes OutstandingToken à insérer. Les révocations n'y passent
+    pas : elles sont écrites en base dans la requête (voir `blacklist`).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._outstanding: List[PendingToken] = []
+        self._oldest: Optional[float] = None
+        self._flush_scheduled = False
+        # Incrémenté à chaque vidage : un minuteur armé pour un tampon déjà vidé ne fait rien
+        self._generation = 0
+
+    def __len__(self):
+        return len(self._outstanding)
+
+    def add(self, pending: PendingToken) -> None:
+        with self._lock:
+            self._outstanding.append(pending)
+            if self._oldest is None:
+                self._oldest = time.monotonic()
+                # Écriture garantie au plus tard après BLACKLIST_WRITE_FLUSH_SECONDS, même sans autre ajout
+                timer = threading.Timer(_flush_seconds(), self._flush_if_current, args=(self._generation,))
+                timer.daemon = True
+                timer.start()
+            due = (
+                len(self._outstanding) >= _batch_size()
+                or time.monotonic() - self._oldest >= _flush_seconds()
+            )
+        if due:
+            self._schedule_flush()
+
+    def _flush_if_current(self, generation: int) -> None:
+        with self._lock:
+            current = generation == self._generation and bool(self._outstanding)
+        if current:
+            self._schedule_flush()
+
+    def _schedule_flush(self) -> None:
+        with self._lock:
+            if self._flush_scheduled:
+                return
+            self._flush_scheduled = True
+        run_in_background(self.flush)
+
+    def drain(self) -> List[PendingToken]:
+        with self._lock:
+            outstanding, self._outstanding = self._outstanding, []
+            self._oldest = None
+            self._flush_scheduled = False
+            self._generation += 1
+        return outstanding
+
+    def flush(self) -> int:
+        outstanding = self.drain()
+        if outstanding:
+            try:
+                write_tokens(outstanding, [])
+            except Exception:
+                # Base indisponible : le lot sera retenté au prochain flush
+                with self._lock:
+                    self._outstanding[:0] = outstanding
+                    self._oldest = self._oldest or time.monotonic()
+                raise
+        return len(outstanding)
+
+
+def _batch_size() -> int:
+    return int(settings.SIMPLE_JWT.get('BLACKLIST_WRITE_BATCH_SIZE', DEFAULT_BATCH_SIZE))
+
+
+def _flush_seconds() -> float:
+    return float(settings.SIMPLE_JWT.get('BLACKLIST_WRITE_FLUSH_SECONDS', DEFAULT_FLUSH_SECONDS))
+
+
+def _outstanding_rows(tokens: List[PendingToken]) -> List[OutstandingToken]:
+    # Les clés étrangères sont vérifiées au COMMIT : un utilisateur supprimé
+    # entre-temps ferait échouer tout le lot. Même repli que simplejwt : le
+    # token est alors enregistré sans utilisateur.
+    user_ids = {pending.user_id for pending in tokens if pending.user_id is not None}
+    existing = set(
+        get_user_model().objects.filter(pk__in=user_ids).values_list('pk', flat=True)
+    ) if user_ids else set()
+    return [
+        OutstandingToken(
+            jti=pending.jti,
+            token=pending.token,
+            user_id=pending.user_id if pending.user_id in existing else None,
+            created_at=pending.created_at,
+            expires_at=pending.expires_at,
+        )
+        for pending in tokens
+    ]
+
+
+def write_tokens(outstanding: List[PendingToken], blacklisted: List[PendingToken]) -> None:
+    """
+    Insère un lot en quatre requêtes au plus, quelle que soit sa taille : les
+    lignes déjà présentes sont ignorées (`ignore_conflicts`), l'opération est
+    donc rejouable.
+    """
+    with transaction.atomic():
+        OutstandingToken.objects.bulk_create(_outstanding_rows(outstanding + blacklisted), ignore_conflicts=True)
+        if blacklisted:
+            ids = OutstandingToken.objects.filter(
+                jti__in=[pending.jti for pending in blacklisted]
+            ).values_list('id', flat=True)
+            BlacklistedToken.objects.bulk_create(
+                [BlacklistedToken(token_id=token_id) for token_id in ids], ignore_conflicts=True
+            )
+
+
+_buffer = _WriteBuffer()
+
+
+def flush_pending_writes() -> int:
+    """Écrit immédiatement le tampon du processus ; retourne le nombre de tokens écrits."""
+    return _buffer.flush()
+
+
+@atexit.register
+def _flush_at_exit():
+    try:
+        _buffer.flush()
+    except Exception:
+        logger.exception("Écriture des tokens en attente impossible à l'arrêt")
+
+
+# --- Liste noire -----------------------------------------------------------
+
+def load_blacklist() -> int:
+    """Recharge dans le cache les jti révoqués et non expirés ; retourne leur nombre."""
+    cache = _cache()
+    now = timezone.now()
+    rows = (
+        BlacklistedToken.objects.filter(token__expires_at__gt=now)
+        .values_list('token__jti', 'token__expires_at')
+        .iterator(chunk_size=LOAD_CHUNK_SIZE)
+    )
+    loaded = 0
+    chunk = {}
+    for jti, expires_at in rows:
+        chunk[_key(jti)] = expires_at
+        if len(chunk) >= LOAD_CHUNK_SIZE:
+            loaded += _store_chunk(cache, chunk)
+            chunk = {}
+    loaded += _store_chunk(cache, chunk)
+    cache.set(LOADED_KEY, True, timeout=None)
+    return loaded
+
+
+def _store_chunk(cache, chunk: dict) -> int:
+    # set_many n'accepte qu'un timeout commun : on prend le plus long du lot
+    if not chunk:
+        return 0
+    timeout = max(_remaining_seconds(expires_at) for expires_at in chunk.values())
+    cache.set_many({key: True for key in chunk}, timeout=max(timeout, 1))
+    return len(chunk)
+
+
+def is_blacklisted(jti: str) -> bool:
+    """Une lecture de cache dans le cas courant ; la base n'est lue qu'en repli."""
+    try:
+        cache = _cache()
+        values = cache.get_many([_key(jti), LOADED_KEY])
+        if _key(jti) in values:
+            return True
+        if LOADED_KEY in values:
+            return False
+        # Un seul rechargement à la fois ; les autres requêtes lisent la base en attendant
+        if not cache.add(LOAD_LOCK_KEY, True, timeout=LOAD_LOCK_TIMEOUT):
+            return BlacklistedToken.objects.filter(token__jti=jti).exists()
+        try:
+            load_blacklist()
+        finally:
+            cache.delete(LOAD_LOCK_KEY)
+        return cache.get(_key(jti)) is not None
+    except Exception:
+        logger.warning("Cache de liste noire indisponible, repli sur la base", exc_info=True)
+        return BlacklistedToken.objects.filter(token__jti=jti).exists()
+
+
+def blacklist(pending: PendingToken) -> None:
+    """
+    Révoque le token : écrit en base dans la requête (la base fait foi, le
+    cache est rechargé depuis elle), puis dans le cache pour les lectures.
+    """
+    timeout = _remaining_seconds(pending.expires_at)
+    if timeout <= 0:
+        # Déjà expiré : il sera refusé de toute façon
+        return
+    write_tokens([], [pending])
+    try:
+        _cache().set(_key(pending.jti), True, timeout=timeout)
+    except Exception:
+        logger.warning("Cache de liste noire indisponible, révocation écrite en base seulement", exc_info=True)
+        try:
+            # Le cache ne peut plus se dire complet : rechargement depuis la base à la prochaine lecture
+            _cache().delete(LOADED_KEY)
+        except Exception:
+            pass
+
+
+def outstand(pending: PendingToken) -> None:
+    """Enregistre un token émis ; l'écriture est différée et groupée."""
+    _buffer.add(pending)
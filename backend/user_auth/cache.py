@@ -0,0 +1,112 @@
+"""
+Cache de résolution utilisateur pour CookieJWTAuthentication.
+
+Sans cache, chaque requête authentifiée déclenche un SELECT sur `User`. Les
+utilisateurs résolus depuis un token d'accès sont donc gardés en cache,
+sous une clé composée de l'id utilisateur, d'une « génération » propre à
+l'utilisateur et de l'identifiant du token (`jti`, à défaut `iat`).
+
+L'invalidation se fait en changeant la génération (signal `post_save` /
+`post_delete` sur User, voir user_auth/signals.py) : toutes les entrées
+existantes deviennent inaccessibles d'un coup, sans devoir les énumérer.
+
+Seule une projection minimale est mise en cache (`USER_FIELDS`, la clé
+primaire et la génération), jamais le hash du mot de passe ni les données
+personnelles. L'utilisateur renvoyé est une instance `User` non sauvegardée
+reconstruite à partir de ces champs : les vues qui ont besoin du profil
+complet le relisent en base, et elle ne doit jamais être sauvegardée.
+
+En production plusieurs workers doivent partager le même cache (CACHES
+avec Redis) pour que la désactivation d'un compte soit vue partout.
+"""
+import time
+from typing import Optional
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from rest_framework_simplejwt.settings import api_settings
+
+USER_CACHE_PREFIX = 'user_auth:jwt_user'
+# Champs de User conservés dans le cache (en plus de la clé primaire)
+USER_FIELDS = ('username', 'is_active', 'is_staff', 'is_superuser', 'profile_color')
+
+
+def _cache():
+    return caches[settings.SIMPLE_JWT.get('USER_CACHE_ALIAS', 'default')]
+
+
+def get_user_cache_timeout() -> int:
+    """Durée de vie (secondes) d'une entrée ; 0 désactive le cache."""
+    return int(settings.SIMPLE_JWT.get('USER_CACHE_TIMEOUT', 60))
+
+
+def _version_key(user_id) -> str:
+    return f"{USER_CACHE_PREFIX}:v:{user_id}"
+
+
+def _get_version(user_id) -> str:
+    cache = _cache()
+    version = cache.get(_version_key(user_id))
+    if version is None:
+        # Génération inconnue (jamais créée ou évincée) : en créer une nouvelle
+        # rend inaccessibles les entrées qui auraient pu survivre.
+        cache.add(_version_key(user_id), time.time_ns(), timeout=None)
+        version = cache.get(_version_key(user_id))
+    return version
+
+
+def _token_id(validated_token) -> Optional[str]:
+    return validated_token.get(api_settings.JTI_CLAIM) or validated_token.get('iat')
+
+
+def _user_key(user_id, version, token_id) -> str:
+    return f"{USER_CACHE_PREFIX}:{user_id}:{version}:{token_id}"
+
+
+def _project_user(user, version) -> dict:
+    data = {field: getattr(user, field) for field in USER_FIELDS}
+    data.update(pk=user.pk, version=version)
+    return data
+
+
+def _rebuild_user(data):
+    return get_user_model()(pk=data['pk'], **{field: data[field] for field in USER_FIELDS})
+
+
+def get_cached_token_user(validated_token):
+    """Retourne l'utilisateur (partiel, non sauvegardé) en cache pour ce token, ou None."""
+    if get_user_cache_timeout() <= 0:
+        return None
+    user_id = validated_token.get(api_settings.USER_ID_CLAIM)
+    token_id = _token_id(validated_token)
+    if user_id is None or token_id is None:
+        return None
+    version = _get_version(user_id)
+    data = _cache().get(_user_key(user_id, version, token_id))
+    if not isinstance(data, dict) or data.get('version') != version:
+        return None
+    return _rebuild_user(data)
+
+
+def cache_token_user(validated_token, user) -> None:
+    """Met en cache la projection de l'utilisateur résolu, sans dépasser l'expiration du token."""
+    timeout = get_user_cache_timeout()
+    if timeout <= 0:
+        return
+    user_id = validated_token.get(api_settings.USER_ID_CLAIM)
+    token_id = _token_id(validated_token)
+    if user_id is None or token_id is None:
+        return
+    exp = validated_token.get('exp')
+    if exp:
+        timeout = min(timeout, max(int(exp - time.time()), 0))
+        if not timeout:
+            return
+    version = _get_version(user_id)
+    _cache().set(_user_key(user_id, version, token_id), _project_user(user, version), timeout=timeout)
+
+
+def invalidate_cached_user(user_id) -> None:
+    """Invalide toutes les entrées d'un utilisateur (tous tokens confondus)."""
+    _cache().set(_version_key(user_id), time.time_ns(), timeout=None)
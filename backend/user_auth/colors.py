@@ -0,0 +1,44 @@
+"""
+Génération des couleurs de profil.
+
+Les couleurs sont tirées directement dans l'espace HSL (teinte uniforme,
+saturation et luminosité bornées) puis, si leur luminance perçue dépasse
+`MAX_LUMINANCE`, assombries d'un facteur calculé : le coût est constant, sans
+boucle de rejet, et le critère reste celui d'origine (texte blanc lisible).
+"""
+import colorsys
+import math
+import random
+from typing import List, Optional
+
+# Luminance perçue maximale (Rec. 601, 0..1) : au-delà le texte blanc devient illisible
+MAX_LUMINANCE = 0.7
+SATURATION_RANGE = (0.45, 0.85)
+LIGHTNESS_RANGE = (0.25, 0.6)
+
+
+def luminance(color: str) -> float:
+    """Luminance perçue (0..1) d'une couleur '#RRGGBB'."""
+    red, green, blue = (int(color[i:i + 2], 16) for i in (1, 3, 5))
+    return (0.299 * red + 0.587 * green + 0.114 * blue) / 255
+
+
+def random_profile_color(rng: Optional[random.Random] = None) -> str:
+    """Retourne une couleur '#RRGGBB' de luminance <= MAX_LUMINANCE, en temps constant."""
+    rng = rng or random
+    red, green, blue = colorsys.hls_to_rgb(
+        rng.random(),
+        rng.uniform(*LIGHTNESS_RANGE),
+        rng.uniform(*SATURATION_RANGE),
+    )
+    # La luminance est linéaire en (r, g, b) : un seul facteur la ramène sous le plafond
+    value = 0.299 * red + 0.587 * green + 0.114 * blue
+    scale = min(1.0, MAX_LUMINANCE / value) if value else 1.0
+    # Arrondi par défaut : la couleur finale ne dépasse jamais le plafond
+    return '#' + ''.join(f'{math.floor(channel * scale * 255):02X}' for channel in (red, green, blue))
+
+
+def generate_profile_colors(count: int, rng: Optional[random.Random] = None) -> List[str]:
+    """Génère `count` couleurs d'un coup (backfill, import en masse)."""
+    rng = rng or random.Random()
+    return [random_profile_color(rng) for _ in range(count)]
@@ -0,0 +1,50 @@
+"""
+Politique de hachage des mots de passe et re-hachage différé.
+
+Le hasher préféré est le premier de `PASSWORD_HASHERS` (choisi par la
+variable d'environnement PASSWORD_HASHER, voir settings/base.py). Les autres
+restent acceptés : un mot de passe haché avec un ancien algorithme ou un coût
+dépassé est re-haché après une connexion réussie, hors de la requête, au lieu
+du re-hachage synchrone de `AbstractBaseUser.check_password`.
+"""
+import logging
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import check_password, get_hasher, identify_hasher, make_password
+
+from core.background import run_in_background
+
+logger = logging.getLogger(__name__)
+
+
+def password_needs_rehash(encoded) -> bool:
+    """True si `encoded` n'utilise pas le hasher préféré ou son coût actuel."""
+    try:
+        hasher = identify_hasher(encoded)
+    except ValueError:
+        return False
+    preferred = get_hasher('default')
+    return hasher.algorithm != preferred.algorithm or preferred.must_update(encoded)
+
+
+def _rehash_password(user_pk, old_encoded, raw_password) -> bool:
+    # UPDATE conditionnel : un changement de mot de passe concurrent l'emporte.
+    # Pas de save() : le hachage change mais pas le mot de passe, rien à invalider.
+    updated = get_user_model().objects.filter(pk=user_pk, password=old_encoded).update(
+        password=make_password(raw_password)
+    )
+    if updated:
+        logger.info("Mot de passe de l'utilisateur %s re-haché avec %s", user_pk, get_hasher('default').algorithm)
+    return bool(updated)
+
+
+def check_password_deferred_rehash(user, raw_password) -> bool:
+    """
+    Vérifie le mot de passe de `user` sans re-hachage synchrone ; si la
+    politique a changé, le re-hachage est soumis au pool de tâches de fond.
+    """
+    if not check_password(raw_password, user.password):
+        return False
+    if password_needs_rehash(user.password):
+        run_in_background(_rehash_password, user.pk, user.password, raw_password)
+    return True
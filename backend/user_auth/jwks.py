@@ -0,0 +1,218 @@
+"""
+Signature asymétrique des JWT (RS256, ES256, EdDSA...) à partir d'un JWKS local.
+
+Avec HS256, tout service qui vérifie un token doit connaître SECRET_KEY. Ici
+les clés privées sont lues dans un fichier JWKS (`SIMPLE_JWT['JWKS_FILE']`) :
+
+    {"active": "2024-06", "keys": [{"kid": "2024-06", "kty": "RSA", "alg": "RS256", "n": ..., "d": ...}, ...]}
+
+- la clé `active` (à défaut la première) signe, son `kid` est écrit dans
+  l'en-tête du token ;
+- toutes les clés du fichier vérifient : on peut ajouter une clé, la publier,
+  puis l'activer une fois les caches des consommateurs expirés
+  (`JWKS_CACHE_MAX_AGE`), et retirer l'ancienne après REFRESH_TOKEN_LIFETIME ;
+- les objets clés (parsés une fois, coûteux en RSA) sont gardés en mémoire ;
+  le fichier n'est relu que si sa date de modification change, vérifiée au
+  plus toutes les `JWKS_RELOAD_INTERVAL` secondes.
+
+La partie publique est servie sur /.well-known/jwks.json (voir `jwks_view`).
+"""
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from typing import Any, Dict, NamedTuple, Optional
+
+import jwt
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.http import Http404, HttpResponse, HttpResponseNotModified
+from django.utils.translation import gettext_lazy as _
+from django.views.decorators.http import require_GET
+from rest_framework_simplejwt.backends import TokenBackend
+from rest_framework_simplejwt.exceptions import TokenBackendError
+from rest_framework_simplejwt.settings import api_settings
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_RELOAD_INTERVAL = 60
+DEFAULT_CACHE_MAX_AGE = 3600
+# Membres privés des JWK (RFC 7518) : jamais publiés
+PRIVATE_MEMBERS = {'d', 'p', 'q', 'dp', 'dq', 'qi', 'oth', 'k'}
+
+
+def jwks_file() -> Optional[str]:
+    return settings.SIMPLE_JWT.get('JWKS_FILE') or None
+
+
+def jwt_algorithm() -> str:
+    return settings.SIMPLE_JWT.get('ALGORITHM', 'HS256')
+
+
+class KeySet(NamedTuple):
+    active_kid: str
+    signing_keys: Dict[str, Any]
+    verifying_keys: Dict[str, Any]
+    public_json: bytes
+    etag: str
+
+
+def load_key_set(path: str, algorithm: str) -> KeySet:
+    """Parse le fichier JWKS ; chaque clé doit correspondre à SIMPLE_JWT['ALGORITHM']."""
+    with open(path, 'rb') as handle:
+        data = json.load(handle)
+
+    if algorithm.startswith('HS'):
+        raise ImproperlyConfigured("Un JWKS n'a de sens qu'avec un algorithme asymétrique (RS256, ES256, EdDSA...)")
+
+    signing_keys, verifying_keys, public = {}, {}, []
+    for jwk in data.get('keys', []):
+        kid = jwk.get('kid')
+        if not kid:
+            raise ImproperlyConfigured(f"{path}: chaque clé du JWKS doit avoir un 'kid'")
+        if jwk.get('alg', algorithm) != algorithm:
+            raise ImproperlyConfigured(f"{path}: la clé {kid} utilise {jwk.get('alg')}, attendu {algorithm}")
+        key = jwt.PyJWK(jwk, algorithm=algorithm).key
+        if 'd' in jwk:
+            signing_keys[kid] = key
+            key = key.public_key()
+        # Une clé sans partie privée (retirée) ne sert plus qu'à vérifier
+        verifying_keys[kid] = key
+        public.append({
+            **{name: value for name, value in jwk.items() if name not in PRIVATE_MEMBERS},
+            'alg': algorithm,
+            'use': 'sig',
+        })
+
+    if not signing_keys:
+        raise ImproperlyConfigured(f"{path}: aucune clé privée dans le JWKS")
+    active_kid = data.get('active') or next(iter(signing_keys))
+    if active_kid not in signing_keys:
+        raise ImproperlyConfigured(f"{path}: clé privée active {active_kid} absente du JWKS")
+
+    public_json = json.dumps({'keys': public}, separators=(',', ':'), sort_keys=True).encode()
+    etag = f'"{hashlib.sha256(public_json).hexdigest()[:16]}"'
+    return KeySet(active_kid, signing_keys, verifying_keys, public_json, etag)
+
+
+class _KeySetCache:
+    """Jeu de clés du processus, rechargé quand le fichier change."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._key_set: Optional[KeySet] = None
+        self._source = None
+        self._checked_at = 0.0
+
+    def get(self, path: str, algorithm: str) -> KeySet:
+        now = time.monotonic()
+        interval = settings.SIMPLE_JWT.get('JWKS_RELOAD_INTERVAL', DEFAULT_RELOAD_INTERVAL)
+        if self._key_set is not None and self._source and self._source[0] == path \
+                and now - self._checked_at < interval:
+            return self._key_set
+        with self._lock:
+            source = (path, os.stat(path).st_mtime_ns, algorithm)
+            if self._key_set is None or source != self._source:
+                self._key_set = load_key_set(path, algorithm)
+                self._source = source
+                logger.info("JWKS chargé depuis %s (clé active %s)", path, self._key_set.active_kid)
+            self._checked_at = now
+            return self._key_set
+
+    def clear(self) -> None:
+        with self._lock:
+            self._key_set = None
+            self._source = None
+
+
+_key_sets = _KeySetCache()
+
+
+def get_key_set() -> KeySet:
+    path = jwks_file()
+    if not path:
+        raise ImproperlyConfigured("SIMPLE_JWT['JWKS_FILE'] n'est pas défini")
+    return _key_sets.get(path, jwt_algorithm())
+
+
+class JWKSTokenBackend(TokenBackend):
+    """TokenBackend signant avec la clé active du JWKS et vérifiant selon le `kid` du token."""
+
+    @property
+    def prepared_signing_key(self) -> Any:
+        key_set = get_key_set()
+        return key_set.signing_keys[key_set.active_kid]
+
+    def get_verifying_key(self, token) -> Any:
+        key_set = get_key_set()
+        try:
+            kid = jwt.get_unverified_header(token).get('kid')
+        except jwt.InvalidTokenError as e:
+            raise TokenBackendError(_("Token is invalid")) from e
+        if kid is None and len(key_set.verifying_keys) == 1:
+            return next(iter(key_set.verifying_keys.values()))
+        try:
+            return key_set.verifying_keys[kid]
+        except KeyError as e:
+            # Clé retirée du JWKS ou token signé ailleurs
+            raise TokenBackendError(_("Token is invalid")) from e
+
+    def encode(self, payload: Dict[str, Any]) -> str:
+        jwt_payload = payload.copy()
+        if self.audience is not None:
+            jwt_payload['aud'] = self.audience
+        if self.issuer is not None:
+            jwt_payload['iss'] = self.issuer
+
+        key_set = get_key_set()
+        return jwt.encode(
+            jwt_payload,
+            key_set.signing_keys[key_set.active_kid],
+            algorithm=self.algorithm,
+            headers={'kid': key_set.active_kid},
+            json_encoder=self.json_encoder,
+        )
+
+
+def build_token_backend() -> JWKSTokenBackend:
+    return JWKSTokenBackend(
+        jwt_algorithm(),
+        None,
+        None,
+        api_settings.AUDIENCE,
+        api_settings.ISSUER,
+        None,
+        api_settings.LEEWAY,
+        api_settings.JSON_ENCODER,
+    )
+
+
+def install_token_backend() -> None:
+    """
+    Remplace le backend global de simplejwt si un JWKS est configuré. Les
+    tokens le résolvent à l'usage (`rest_framework_simplejwt.state.token_backend`).
+    """
+    if not jwks_file():
+        return
+    from rest_framework_simplejwt import state
+
+    state.token_backend = build_token_backend()
+
+
+@require_GET
+def jwks_view(request):
+    """Clés publiques au format JWKS, cachables longtemps par les services consommateurs."""
+    if not jwks_file():
+        # HS256 : la clé est secrète, rien à publier
+        raise Http404
+    key_set = get_key_set()
+    if request.headers.get('If-None-Match') == key_set.etag:
+        response = HttpResponseNotModified()
+    else:
+        response = HttpResponse(key_set.public_json, content_type='application/json')
+    max_age = settings.SIMPLE_JWT.get('JWKS_CACHE_MAX_AGE', DEFAULT_CACHE_MAX_AGE)
+    response['Cache-Control'] = f'public, max-age={max_age}'
+    response['ETag'] = key_set.etag
+    return response
@@ -0,0 +1,35 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from user_auth.colors import generate_profile_colors
+
+UserModel = get_user_model()
+
+
+class Command(BaseCommand):
+    help = "Attribue une couleur de profil aux utilisateurs qui ont encore la couleur par défaut, par lots."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        default_color = UserModel._meta.get_field('profile_color').get_default()
+        queryset = UserModel.objects.filter(profile_color=default_color).order_by('pk')
+
+        updated = 0
+        last_pk = None
+        while True:
+            batch_qs = queryset if last_pk is None else queryset.filter(pk__gt=last_pk)
+            users = list(batch_qs.only('pk')[:batch_size])
+            if not users:
+                break
+            for user, color in zip(users, generate_profile_colors(len(users))):
+                user.profile_color = color
+            with transaction.atomic():
+                UserModel.objects.bulk_update(users, ['profile_color'])
+            updated += len(users)
+            last_pk = users[-1].pk
+
+        self.stdout.write(self.style.SUCCESS(f"{updated} couleur(s) de profil attribuée(s)."))
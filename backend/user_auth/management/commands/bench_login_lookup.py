@@ -0,0 +1,95 @@
+import random
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.db.models import Q
+
+UserModel = get_user_model()
+BENCH_PREFIX = 'bench_lookup_'
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare la recherche d'identifiant historique (Q(email__iexact) | Q(username__iexact)) "
+        "aux deux sondes indexées LOWER(...) réunies par UNION d'EmailOrUsernameModelBackend. "
+        "À lancer sur une base PostgreSQL de test : les utilisateurs factices sont insérés puis supprimés."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1_000_000)
+        parser.add_argument('--batch-size', type=int, default=10_000)
+        parser.add_argument('--probes', type=int, default=200)
+        parser.add_argument('--keep', action='store_true', help="Conserver les utilisateurs factices après la mesure.")
+
+    def handle(self, *args, **options):
+        total = options['users']
+        existing = UserModel.objects.filter(username__startswith=BENCH_PREFIX).count()
+        if existing < total:
+            self._populate(existing, total, options['batch_size'])
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute(f'ANALYZE {UserModel._meta.db_table}')
+
+        try:
+            identifiers = [
+                self._identifier(random.randrange(total)) for _ in range(options['probes'])
+            ]
+            legacy = self._bench(identifiers, lambda ident: list(
+                UserModel.objects.filter(Q(email__iexact=ident) | Q(username__iexact=ident))[:2]
+            ))
+            indexed = self._bench(identifiers, lambda ident: list(
+                UserModel.objects.by_identifier(ident, 'email')
+                .union(UserModel.objects.by_identifier(ident, 'username'))[:2]
+            ))
+
+            self.stdout.write(f"{total} utilisateurs, {len(identifiers)} sondes ({connection.vendor})")
+            self.stdout.write(f"  OR + iexact (UPPER)      {legacy:9.3f} ms/recherche")
+            self.stdout.write(f"  UNION + LOWER indexé     {indexed:9.3f} ms/recherche  (x{legacy / indexed:.1f})")
+
+            sample = identifiers[0]
+            self.stdout.write("\nPlan historique :")
+            self.stdout.write(UserModel.objects.filter(Q(email__iexact=sample) | Q(username__iexact=sample)).explain())
+            self.stdout.write("\nPlan indexé :")
+            self.stdout.write(
+                UserModel.objects.by_identifier(sample, 'email')
+                .union(UserModel.objects.by_identifier(sample, 'username')).explain()
+            )
+        finally:
+            if not options['keep']:
+                self._cleanup(options['batch_size'])
+
+    def _identifier(self, i):
+        # Casse mélangée pour exercer l'insensibilité à la casse
+        return f'{BENCH_PREFIX}{i}@Example.com' if i % 2 else f'{BENCH_PREFIX.upper()}{i}'
+
+    def _populate(self, start, total, batch_size):
+        self.stdout.write(f"Insertion de {total - start} utilisateurs factices...")
+        for offset in range(start, total, batch_size):
+            UserModel.objects.bulk_create(
+                [
+                    UserModel(
+                        username=f'{BENCH_PREFIX}{i}',
+                        email=f'{BENCH_PREFIX}{i}@example.com',
+                        password='!',  # mot de passe inutilisable
+                        full_name=f'Bench {i}',
+                    )
+                    for i in range(offset, min(offset + batch_size, total))
+                ],
+                batch_size=batch_size,
+            )
+
+    def _bench(self, identifiers, lookup):
+        start = time.perf_counter()
+        for identifier in identifiers:
+            lookup(identifier)
+        return (time.perf_counter() - start) / len(identifiers) * 1000
+
+    def _cleanup(self, batch_size):
+        queryset = UserModel.objects.filter(username__startswith=BENCH_PREFIX)
+        while True:
+            pks = list(queryset.values_list('pk', flat=True)[:batch_size])
+            if not pks:
+                break
+            UserModel.objects.filter(pk__in=pks).delete()
@@ -0,0 +1,53 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth.hashers import get_hasher, get_hashers
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    help = (
+        "Mesure, sur la machine courante, le coût d'une vérification de mot de passe "
+        "(donc d'un login) pour chaque hasher de PASSWORD_HASHERS, en série et en parallèle."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=20)
+        parser.add_argument(
+            '--workers', type=int, default=4,
+            help="Threads simulant des logins concurrents (hashlib et argon2 relâchent le GIL).",
+        )
+        parser.add_argument('--password', default='correct horse battery staple')
+
+    def handle(self, *args, **options):
+        iterations = options['iterations']
+        workers = options['workers']
+        password = options['password']
+        preferred = get_hasher('default').algorithm
+
+        self.stdout.write(f"{iterations} vérifications par hasher, {workers} threads en parallèle")
+        for hasher in get_hashers():
+            try:
+                encoded = hasher.encode(password, hasher.salt())
+            except (ValueError, ImportError) as exc:
+                # Bibliothèque optionnelle absente (argon2-cffi, bcrypt)
+                self.stdout.write(f"  {hasher.algorithm:<22} indisponible ({exc})")
+                continue
+
+            start = time.perf_counter()
+            for _ in range(iterations):
+                hasher.verify(password, encoded)
+            serial = (time.perf_counter() - start) / iterations
+
+            start = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                list(pool.map(lambda _: hasher.verify(password, encoded), range(iterations * workers)))
+            parallel_rate = iterations * workers / (time.perf_counter() - start)
+
+            marker = '*' if hasher.algorithm == preferred else ' '
+            self.stdout.write(
+                f"{marker} {hasher.algorithm:<22} {serial * 1000:8.1f} ms/login"
+                f"  {1 / serial:7.1f} logins/s (1 thread)  {parallel_rate:7.1f} logins/s ({workers} threads)"
+            )
+        self.stdout.write(f"* hasher préféré (PASSWORD_HASHER={getattr(settings, 'PASSWORD_HASHER', '?')})")
@@ -0,0 +1,31 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from user_auth.password_reset import DEFAULT_BATCH_SIZE, process_pending_requests
+
+
+class Command(BaseCommand):
+    help = (
+        "Traite les demandes de réinitialisation de mot de passe en attente : token et email "
+        "inscrits dans EmailOutbox pour les comptes actifs. Avec --loop, tourne en continu (worker)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE)
+        parser.add_argument('--loop', action='store_true', help="Ne pas s'arrêter quand la file est vide.")
+        parser.add_argument('--interval', type=float, default=5.0, help="Pause (secondes) entre deux passes en mode --loop.")
+
+    def handle(self, *args, **options):
+        while True:
+            processed = 0
+            while True:
+                count = process_pending_requests(batch_size=options['batch_size'])
+                processed += count
+                if not count:
+                    break
+            if processed or not options['loop']:
+                self.stdout.write(f"{processed} demande(s) traitée(s).")
+            if not options['loop']:
+                return
+            time.sleep(options['interval'])
@@ -0,0 +1,37 @@
+import logging
+
+from django.core.management.base import BaseCommand
+
+from user_auth.retention import purge_in_batches, purgeable_querysets, table_stats
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = (
+        "Purge par lots les tokens de réinitialisation expirés/utilisés, les demandes de "
+        "réinitialisation traitées et les tokens JWT expirés (outstanding + blacklist), "
+        "puis affiche la taille des tables."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--pause', type=float, default=0.0, help="Pause (secondes) entre deux lots.")
+        parser.add_argument('--dry-run', action='store_true', help="Compter sans supprimer.")
+        parser.add_argument('--stats-only', action='store_true', help="Afficher la taille des tables sans purger.")
+
+    def handle(self, *args, **options):
+        if not options['stats_only']:
+            for table, queryset in purgeable_querysets().items():
+                count = purge_in_batches(
+                    queryset, batch_size=options['batch_size'], pause=options['pause'], dry_run=options['dry_run']
+                )
+                verb = "à supprimer" if options['dry_run'] else "supprimée(s)"
+                self.stdout.write(f"{table}: {count} ligne(s) {verb}")
+
+        stats = table_stats()
+        # Métriques exploitables par l'agrégateur de logs
+        logger.info("Taille des tables de tokens", extra={'token_table_stats': stats})
+        for table, values in stats.items():
+            size = f", {values['bytes'] / 1024:.0f} Kio" if values['bytes'] is not None else ''
+            self.stdout.write(f"  {table:<40} {values['rows']} ligne(s){size}")
@@ -0,0 +1,64 @@
+# Generated by Django 4.2.4 on 2026-10-19 10:08
+"""
+Unicité insensible à la casse de `username` et `email`.
+
+Avant de créer les index uniques, `check_case_insensitive_duplicates` cherche
+les comptes dont l'username ou l'email ne diffèrent que par la casse et
+arrête la migration en les listant : rien n'est fusionné ni modifié
+automatiquement. Nettoyage à faire avant de relancer `migrate` : pour chaque
+groupe signalé, garder un compte et renommer (ou désactiver puis renommer)
+les autres, par exemple `UPDATE user_auth_user SET email = '' WHERE id = ...`
+pour un email en double (les emails vides sont exclus de la contrainte).
+"""
+from django.db import migrations, models
+from django.db.models import Count
+from django.db.models.functions import Lower
+import django.db.models.functions.text
+
+# Nombre de groupes listés dans le message d'erreur
+MAX_REPORTED = 20
+
+
+def check_case_insensitive_duplicates(apps, schema_editor):
+    User = apps.get_model('user_auth', 'User')
+    users = User.objects.using(schema_editor.connection.alias)
+    problems = []
+    for field, queryset in (('username', users.all()), ('email', users.exclude(email=''))):
+        duplicates = (
+            queryset.annotate(normalized=Lower(field)).order_by().values('normalized')
+            .annotate(total=Count('pk')).filter(total__gt=1).values_list('normalized', flat=True)
+        )
+        for value in duplicates[:MAX_REPORTED]:
+            ids = list(queryset.filter(**{f'{field}__iexact': value}).order_by('pk').values_list('pk', flat=True))
+            problems.append(f"  {field} '{value}' : comptes {ids}")
+    if problems:
+        raise RuntimeError(
+            "Comptes en double à la casse près : impossible de créer les contraintes "
+            "user_username_lower_uniq / user_email_lower_uniq.\n" + "\n".join(problems)
+            + "\nGarder un compte par groupe, renommer les autres (voir la docstring de "
+            "user_auth/migrations/0003_user_case_insensitive_unique.py), puis relancer migrate."
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('user_auth', '0002_user_lower_identifier_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(check_case_insensitive_duplicates, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='user',
+            constraint=models.UniqueConstraint(django.db.models.functions.text.Lower('username'), name='user_username_lower_uniq'),
+        ),
+        migrations.AddConstraint(
+            model_name='user',
+            constraint=models.UniqueConstraint(django.db.models.functions.text.Lower('email'), condition=models.Q(('email', ''), _negated=True), name='user_email_lower_uniq'),
+        ),
+        # Supprimé après la création de l'index unique qui le remplace
+        migrations.RemoveIndex(
+            model_name='user',
+            name='user_username_lower_idx',
+        ),
+    ]
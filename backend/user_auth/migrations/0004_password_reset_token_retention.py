@@ -0,0 +1,29 @@
+# Generated by Django 4.2.4 on 2026-10-19 10:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('user_auth', '0003_user_case_insensitive_unique'),
+        ('token_blacklist', '0013_alter_blacklistedtoken_options_and_more'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='passwordresettoken',
+            index=models.Index(fields=['expires_at'], name='pwreset_expires_at_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='passwordresettoken',
+            index=models.Index(condition=models.Q(('used_at__isnull', False)), fields=['used_at'], name='pwreset_used_at_idx'),
+        ),
+        # OutstandingToken (simplejwt) n'indexe pas expires_at : index ajouté ici pour
+        # la purge des tokens expirés (modèle tiers, donc en SQL brut).
+        migrations.RunSQL(
+            sql='CREATE INDEX IF NOT EXISTS outstandingtoken_expires_at_idx '
+                'ON token_blacklist_outstandingtoken (expires_at)',
+            reverse_sql='DROP INDEX IF EXISTS outstandingtoken_expires_at_idx',
+        ),
+    ]
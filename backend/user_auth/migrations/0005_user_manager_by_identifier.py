@@ -0,0 +1,20 @@
+# Generated by Django 4.2.4 on 2026-10-19 10:57
+
+from django.db import migrations
+import user_auth.models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('user_auth', '0004_password_reset_token_retention'),
+    ]
+
+    operations = [
+        migrations.AlterModelManagers(
+            name='user',
+            managers=[
+                ('objects', user_auth.models.UserManager()),
+            ],
+        ),
+    ]
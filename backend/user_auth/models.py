@@ -1,7 +1,8 @@
-from django.contrib.auth.models import AbstractUser
+from django.contrib.auth.models import AbstractUser, UserManager as DjangoUserManager
 from django.db import models
-import random
-from django.db.models.signals import post_save
+from django.db.models import Q, Value
+from django.db.models.functions import Lower
+from django.db.models.signals import pre_save
 from django.dispatch import receiver
 from datetime import timedelta
 from django.utils import timezone
@@ -9,10 +10,23 @@ from django.conf import settings
 from django.utils.translation import gettext_lazy as _
 import uuid
 
+from user_auth.colors import random_profile_color
+
 def default_reset_token_expiry():
     return timezone.now() + timedelta(hours=settings.PASSWORD_RESET_TIMEOUT_HOURS 
                                        if hasattr(settings, 'PASSWORD_RESET_TIMEOUT_HOURS') else 1)
 
+class UserManager(DjangoUserManager):
+    def by_identifier(self, identifier, field):
+        """
+        Comptes dont `field` (username ou email) vaut `identifier` à la casse près.
+
+        Compare LOWER(col) à LOWER(identifiant) : utilise les index uniques
+        fonctionnels de User.Meta, contrairement à `__iexact` (UPPER).
+        """
+        return self.alias(**{f'{field}_lower': Lower(field)}).filter(**{f'{field}_lower': Lower(Value(identifier))})
+
+
 class User(AbstractUser):
     first_name = None
     last_name = None
@@ -25,27 +39,37 @@ class User(AbstractUser):
     gender = models.CharField(max_length=5, choices=Sexe.choices)
     profile_color = models.CharField(max_length=10, default='#362c54')
 
-    def generate_random_color(self):
-        letters = '0123456789ABCDEF'
-        color = '#'
-        is_light_color = True
+    objects = UserManager()
 
-        # Boucle pour générer une couleur tant que la luminance est trop claire (luminance > 0.7)
-        while is_light_color:
-            color = '#'
-            for i in range(6):
-                color += letters[random.randint(0, 15)]  # Choix aléatoire d'un caractère hexadécimal
+    class Meta(AbstractUser.Meta):
+        # Index fonctionnels pour la recherche insensible à la casse du login
+        # (voir EmailOrUsernameModelBackend) : LOWER(col) = LOWER(%s) les utilise,
+        # contrairement à UPPER(col) produit par `__iexact`.
+        indexes = [
+            models.Index(Lower('email'), name='user_email_lower_idx'),
+        ]
+        # Unicité insensible à la casse garantie par la base (inscriptions concurrentes) ;
+        # l'index unique sur LOWER(username) sert aussi à la recherche du login.
+        constraints = [
+            models.UniqueConstraint(Lower('username'), name='user_username_lower_uniq'),
+            models.UniqueConstraint(Lower('email'), condition=~Q(email=''), name='user_email_lower_uniq'),
+        ]
 
-            # Calcul de la luminance de la couleur pour déterminer si elle est claire ou sombre
-            luminance = (0.299 * int(color[1:3], 16) +
-                         0.587 * int(color[3:5], 16) +
-                         0.114 * int(color[5:7], 16)) / 255
+    def generate_random_color(self):
+        # Couleur assez sombre pour un texte blanc (voir user_auth/colors.py)
+        return random_profile_color()
+    
 
-            # Vérification si la couleur est claire (luminance > 0.7)
-            is_light_color = luminance > 0.7
+class PasswordResetTokenQuerySet(models.QuerySet):
+    def valid(self):
+        """Tokens encore utilisables (équivalent SQL de `is_valid()`)."""
+        return self.filter(used_at__isnull=True, expires_at__gt=timezone.now())
+
+    def purgeable(self, retention):
+        """Tokens expirés ou utilisés depuis plus de `retention` (timedelta)."""
+        limit = timezone.now() - retention
+        return self.filter(Q(expires_at__lt=limit) | Q(used_at__lt=limit))
 
-        return color
-    
 
 class PasswordResetToken(models.Model):
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="password_reset_tokens")
@@ -54,6 +78,8 @@ class PasswordResetToken(models.Model):
     expires_at = models.DateTimeField(default=default_reset_token_expiry)
     used_at = models.DateTimeField(null=True, blank=True) # Quand le token a été utilisé
 
+    objects = PasswordResetTokenQuerySet.as_manager()
+
     def is_valid(self):
         return not self.used_at and timezone.now() < self.expires_at
 
@@ -68,11 +94,52 @@ class PasswordResetToken(models.Model):
         verbose_name = _("Token de Réinitialisation de Mot de Passe")
         verbose_name_plural = _("Tokens de Réinitialisation de Mot de Passe")
         ordering = ['-created_at']
+        # Purge par lots (commande purge_expired_tokens)
+        indexes = [
+            models.Index(fields=['expires_at'], name='pwreset_expires_at_idx'),
+            models.Index(fields=['used_at'], name='pwreset_used_at_idx', condition=Q(used_at__isnull=False)),
+        ]
 
 
-@receiver(post_save, sender=User)
-def create_user_profile(sender, instance, created, **kwargs):
-    if created:
-        # Appel de la méthode pour générer une couleur aléatoire
+@receiver(pre_save, sender=User)
+def assign_profile_color(sender, instance, **kwargs):
+    """
+    Attribue la couleur de profil avant le premier INSERT (un seul
+    enregistrement à la création, au lieu d'un second save() en post_save).
+    Une couleur fournie explicitement est conservée.
+    """
+    if instance._state.adding and instance.profile_color == sender._meta.get_field('profile_color').get_default():
         instance.profile_color = instance.generate_random_color()
-        instance.save()
\ No newline at end of file
+
+
+class PasswordResetRequestQuerySet(models.QuerySet):
+    def pending(self):
+        return self.filter(processed_at__isnull=True)
+
+    def purgeable(self, retention):
+        """Demandes traitées depuis plus de `retention` (timedelta)."""
+        return self.filter(processed_at__lt=timezone.now() - retention)
+
+
+class PasswordResetRequest(models.Model):
+    """
+    Demande de réinitialisation reçue par l'API, traitée plus tard par
+    `process_password_reset_requests` (voir user_auth/password_reset.py).
+    La vue n'insère que cette ligne, que le compte existe ou non.
+    """
+    email = models.EmailField(_("Adresse e-mail"))
+    created_at = models.DateTimeField(auto_now_add=True)
+    processed_at = models.DateTimeField(null=True, blank=True)
+
+    objects = PasswordResetRequestQuerySet.as_manager()
+
+    def __str__(self):
+        return f"Reset request for {self.email}"
+
+    class Meta:
+        verbose_name = _("Demande de Réinitialisation de Mot de Passe")
+        verbose_name_plural = _("Demandes de Réinitialisation de Mot de Passe")
+        indexes = [
+            # Sélection des demandes à traiter par le worker
+            models.Index(fields=['created_at'], condition=Q(processed_at__isnull=True), name='pwreset_request_pending_idx'),
+        ]
@@ -0,0 +1,96 @@
+"""
+Traitement des demandes de réinitialisation de mot de passe.
+
+La vue appelle `queue_password_reset_request`, qui insère une ligne
+PasswordResetRequest et rien d'autre : la requête fait exactement le même
+travail que le compte existe ou non, son temps de réponse ne révèle rien.
+La commande `process_password_reset_requests` reprend ces lignes
+(`process_pending_requests`) : recherche du compte, puis token et email
+inscrits ensemble dans l'outbox de `notifications`, envoyée par
+`process_email_outbox`. Les throttles de la vue (user_auth/throttling.py)
+bornent le nombre de demandes par IP et par email.
+"""
+import logging
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from user_auth.models import PasswordResetRequest, PasswordResetToken, User
+
+try:
+    from notifications.services import send_templated_email
+except ImportError: # Gérer le cas où l'application notifications n'est pas installée
+    send_templated_email = None
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BATCH_SIZE = 50
+
+
+def build_reset_url(token_value) -> str:
+    # L'URL que l'utilisateur recevra doit pointer vers la page FRONTEND
+    # qui gérera ensuite la confirmation avec le token.
+    return f"{getattr(settings, 'FRONTEND_URL', None) or 'https://cicaw.pythonanywhere.com'}" \
+           f"/reset-password-confirm/{token_value}/"
+
+
+def process_password_reset_request(email):
+    """Crée un token et met en file l'email de réinitialisation si un compte actif correspond."""
+    if send_templated_email is None:
+        logger.error("send_templated_email n'est pas disponible. Assurez-vous que le module notifications est installé.")
+        return None
+
+    # Une seule recherche, indexée sur LOWER(email) ; au plus un compte (contrainte unique)
+    user = User.objects.by_identifier(email, 'email').filter(is_active=True).first()
+    if user is None:
+        return None
+
+    # Token et email validés ensemble : pas d'email pointant vers un token inexistant
+    with transaction.atomic():
+        reset_token_obj = PasswordResetToken.objects.create(user=user)
+        send_templated_email(
+            subject_template_name='notifications/email/user_auth/password_reset_subject.txt',
+            html_template_name='notifications/email/user_auth/password_reset_body.html',
+            context={
+                'user': user,
+                'user_name': user.full_name or user.username,
+                'reset_password_url': build_reset_url(reset_token_obj.token),
+            },
+            recipient_list=[user.email],
+            event_type='password_reset_request',
+            recipient_user=user,
+            related_object=reset_token_obj,
+        )
+    logger.info("Email de réinitialisation mis en file pour l'utilisateur %s", user.pk)
+    return reset_token_obj
+
+
+def queue_password_reset_request(email) -> PasswordResetRequest:
+    """Enregistre la demande (un seul INSERT, sans chercher le compte)."""
+    return PasswordResetRequest.objects.create(email=email)
+
+
+def process_pending_requests(batch_size: int = DEFAULT_BATCH_SIZE) -> int:
+    """
+    Traite un lot de demandes en attente. Retourne le nombre de demandes traitées.
+    `skip_locked` permet à plusieurs workers de tourner en parallèle.
+    """
+    with transaction.atomic():
+        batch = list(
+            PasswordResetRequest.objects.pending().select_for_update(skip_locked=True)
+            .order_by('created_at', 'pk')[:batch_size]
+        )
+        for reset_request in batch:
+            try:
+                # Savepoint : une demande en échec n'annule pas les emails du lot
+                with transaction.atomic():
+                    process_password_reset_request(reset_request.email)
+            except Exception:
+                # Marquée traitée quand même : une ligne en échec ne doit pas bloquer la file
+                logger.exception("Échec du traitement de la demande de réinitialisation %s", reset_request.pk)
+        if batch:
+            PasswordResetRequest.objects.filter(pk__in=[reset_request.pk for reset_request in batch]).update(
+                processed_at=timezone.now()
+            )
+    return len(batch)
@@ -0,0 +1,76 @@
+"""
+Rétention des tables de tokens.
+
+- PasswordResetToken : supprimés `PASSWORD_RESET_TOKEN_RETENTION_DAYS` après
+  expiration ou utilisation ;
+- PasswordResetRequest : supprimées avec le même délai après traitement ;
+- OutstandingToken / BlacklistedToken (simplejwt) : un token expiré n'a plus
+  besoin d'être blacklisté, il est supprimé (la blacklist suit par CASCADE).
+
+Les suppressions se font par lots bornés (`DELETE ... WHERE id IN (...)`)
+pour ne jamais verrouiller longtemps la table ni gonfler le WAL d'un coup.
+"""
+import logging
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+
+from user_auth.models import PasswordResetRequest, PasswordResetToken
+
+logger = logging.getLogger(__name__)
+
+RETENTION_MODELS = (PasswordResetToken, PasswordResetRequest, OutstandingToken, BlacklistedToken)
+
+
+def purgeable_querysets():
+    """Requêtes des lignes à purger, par nom de table."""
+    retention = timedelta(days=getattr(settings, 'PASSWORD_RESET_TOKEN_RETENTION_DAYS', 7))
+    return {
+        PasswordResetToken._meta.db_table: PasswordResetToken.objects.purgeable(retention),
+        PasswordResetRequest._meta.db_table: PasswordResetRequest.objects.purgeable(retention),
+        OutstandingToken._meta.db_table: OutstandingToken.objects.filter(expires_at__lte=timezone.now()),
+    }
+
+
+def purge_in_batches(queryset, batch_size=1000, pause=0.0, dry_run=False) -> int:
+    """Supprime les lignes de `queryset` par lots de `batch_size`. Retourne le nombre de lignes visées."""
+    model = queryset.model
+    if dry_run:
+        return queryset.count()
+
+    deleted = 0
+    while True:
+        with transaction.atomic():
+            pks = list(queryset.order_by().values_list('pk', flat=True)[:batch_size])
+            if not pks:
+                return deleted
+            model.objects.filter(pk__in=pks).delete()
+        deleted += len(pks)
+        if pause:
+            time.sleep(pause)
+
+
+def table_stats():
+    """
+    Nombre de lignes (et taille sur disque sous PostgreSQL) des tables de tokens.
+    Sous PostgreSQL le nombre de lignes est l'estimation du planificateur :
+    un COUNT(*) sur une grosse table de blacklist serait lui-même coûteux.
+    """
+    stats = {}
+    for model in RETENTION_MODELS:
+        table = model._meta.db_table
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    "SELECT reltuples::bigint, pg_total_relation_size(oid) FROM pg_class WHERE oid = %s::regclass",
+                    [table],
+                )
+                rows, size = cursor.fetchone()
+            stats[table] = {'rows': max(rows, 0), 'bytes': size}
+        else:
+            stats[table] = {'rows': model.objects.count(), 'bytes': None}
+    return stats
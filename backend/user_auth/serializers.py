@@ -1,6 +1,5 @@
 from rest_framework import serializers
 from django.contrib.auth.password_validation import validate_password 
-from rest_framework.validators import UniqueValidator
 from django.contrib.auth.validators import UnicodeUsernameValidator
 from django.contrib.auth import get_user_model
 from rest_framework_simplejwt.serializers import TokenRefreshSerializer
@@ -8,6 +7,10 @@ from rest_framework_simplejwt.exceptions import InvalidToken
 from django.conf import settings
 from django.utils.translation import gettext_lazy as _
 from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db import IntegrityError, transaction
+import logging
+
+logger = logging.getLogger(__name__)
 
 
 User = get_user_model()
@@ -18,17 +21,11 @@ class UserCreateSerializer(serializers.Serializer):
         max_length=150,
         label="Nom d'utilisateur",
         help_text="Requis. 150 caractères ou moins. Lettres, chiffres et @/./+/-/_ seulement.",
-        validators=[
-            UnicodeUsernameValidator(), 
-            UniqueValidator(queryset=User.objects.all(), message="Ce nom d'utilisateur est déjà pris.")
-        ]
+        validators=[UnicodeUsernameValidator()]
     )
     email = serializers.EmailField(
         max_length=254, # Longueur standard pour EmailField Django
         label="Adresse Email",
-        validators=[
-            UniqueValidator(queryset=User.objects.all(), message="Cette adresse email est déjà utilisée.")
-        ]
     )
     first_name = serializers.CharField(
         max_length=150,
@@ -56,11 +53,54 @@ class UserCreateSerializer(serializers.Serializer):
         label="Confirmer le mot de passe"
     )
 
+    # L'unicité est vérifiée en une requête dans validate() puis garantie par les
+    # contraintes uniques de User (une inscription concurrente lève IntegrityError).
+    unique_error_messages = {
+        'username': "Ce nom d'utilisateur est déjà pris.",
+        'email': "Cette adresse email est déjà utilisée.",
+    }
+
     def validate(self, data):
         if data['password'] != data['password2']:
              raise serializers.ValidationError({"password2": "Les mots de passe ne correspondent pas."}) # Cibler plutôt password2
+        self._validate_unique(data['username'], data['email'])
         return data
 
+    def _validate_unique(self, username, email):
+        """Teste nom d'utilisateur et email (insensibles à la casse) en une seule requête."""
+        existing = list(
+            User.objects.by_identifier(username, 'username').values_list('username', 'email')
+            .union(User.objects.by_identifier(email, 'email').values_list('username', 'email'))[:2]
+        )
+        errors = {}
+        for existing_username, existing_email in existing:
+            if existing_username.lower() == username.lower():
+                errors['username'] = [self.unique_error_messages['username']]
+            if existing_email and existing_email.lower() == email.lower():
+                errors['email'] = [self.unique_error_messages['email']]
+        if errors:
+            raise serializers.ValidationError(errors)
+
+    # Contrainte violée -> champ en erreur. Le nom vient de `diag.constraint_name`
+    # (psycopg2) ; sans diagnostic (SQLite), du message, qui nomme l'index ou la colonne.
+    unique_constraint_fields = {
+        'user_username_lower_uniq': 'username',
+        'user_email_lower_uniq': 'email',
+        f'{User._meta.db_table}_username_key': 'username',  # unique=True d'AbstractUser (PostgreSQL)
+        f'{User._meta.db_table}.username': 'username',  # même contrainte (SQLite)
+    }
+
+    def _integrity_error_to_field_errors(self, error):
+        """Traduit la violation d'unicité levée par la base en erreurs de champ."""
+        constraint = getattr(getattr(error.__cause__, 'diag', None), 'constraint_name', None)
+        if constraint is None:
+            message = str(error)
+            constraint = next((name for name in self.unique_constraint_fields if name in message), None)
+        field = self.unique_constraint_fields.get(constraint)
+        if field is None:
+            raise error
+        return {field: [self.unique_error_messages[field]]}
+
     def create(self, validated_data):
         """
         Crée et retourne une nouvelle instance User avec full_name, étant donné les données validées.
@@ -74,12 +114,17 @@ class UserCreateSerializer(serializers.Serializer):
         validated_data['full_name'] = full_name
 
         try:
-            user = User.objects.create_user(**validated_data)
+            with transaction.atomic():
+                user = User.objects.create_user(**validated_data)
             return user
 
+        except IntegrityError as e:
+            # Course perdue contre une inscription concurrente : même erreur que la validation
+            raise serializers.ValidationError(self._integrity_error_to_field_errors(e))
+
         except TypeError as te:
             if 'full_name' in str(te):
-                print(f"ERREUR: Le manager {User.objects.__class__.__name__} (ou create_user) ne semble pas accepter 'full_name'. Tentative alternative.")
+                logger.error("Le manager %s (ou create_user) ne semble pas accepter 'full_name'. Tentative alternative.", User.objects.__class__.__name__)
                 try:
                      user_data_alt = {
                          'username': validated_data['username'],
@@ -90,7 +135,7 @@ class UserCreateSerializer(serializers.Serializer):
                      user = User(**user_data_alt)
                      user.set_password(validated_data['password'])
                      user.save()
-                     print("DEBUG: Utilisateur créé (alternative):", user, "avec full_name:", user.full_name)
+                     logger.debug("Utilisateur créé (alternative): %s avec full_name: %s", user, user.full_name)
                      return user
                 except Exception as e_alt:
                       raise serializers.ValidationError({"non_field_errors": [f"Erreur (alt) lors de la création : {e_alt}"]})
@@ -150,7 +195,7 @@ class CookieTokenRefreshSerializer(TokenRefreshSerializer):
              raise InvalidToken(f"Le token du cookie '{refresh_cookie_name}' est invalide ou expiré. Détail: {e}")
         except Exception as e:
              # Capturer d'autres erreurs potentielles pendant la validation
-             print(f"Erreur inattendue pendant super().validate: {e}")
+             logger.exception("Erreur inattendue pendant super().validate: %s", e)
              raise InvalidToken(f"Erreur serveur pendant la validation du refresh token.")
 
 
@@ -259,6 +304,14 @@ class UserProfileSerializer(serializers.ModelSerializer):
 
 
 
+class TokenIdentitySerializer(serializers.Serializer):
+    """Identité lue dans les claims du token d'accès (`ProfileTokenUser`)."""
+    id = serializers.CharField()
+    username = serializers.CharField()
+    is_superuser = serializers.BooleanField()
+    profile_color = serializers.CharField()
+
+
 class PasswordResetRequestSerializer(serializers.Serializer):
     email = serializers.EmailField(
         label=_("Adresse e-mail"),
@@ -266,19 +319,9 @@ class PasswordResetRequestSerializer(serializers.Serializer):
         required=True
     )
 
-    def validate_email(self, value):
-        # Vérifier si un utilisateur avec cet email existe ET est actif
-        try:
-            user = User.objects.get(email__iexact=value, is_active=True)
-            # Stocker l'utilisateur trouvé dans le contexte du serializer pour la vue
-            self.context['user_to_reset'] = user 
-        except User.DoesNotExist:
-            # Ne pas révéler si l'email existe ou non pour des raisons de sécurité (énumération d'utilisateurs)
-            # Mais pour la logique de la vue, on a besoin de savoir.
-            # Ou bien, on valide juste le format et la vue fait la recherche.
-            # Pour cet exemple, la vue fera la recherche.
-            pass # On ne lève pas d'erreur ici pour ne pas confirmer l'existence de l'email.
-        return value
+    # Pas de recherche du compte ici : la vue la délègue au worker
+    # (user_auth/password_reset.py) pour ne pas révéler par le temps de réponse
+    # si l'email existe.
 
 class PasswordResetConfirmSerializer(serializers.Serializer):
     # Le token sera dans l'URL, pas dans le corps de la requête normalement
@@ -1,37 +1,73 @@
-from django.db.models.signals import post_save
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
 from django.conf import settings # Pour le modèle User et d'autres settings
 from django.urls import reverse # Si vous voulez inclure un lien de confirmation/login
 
-send_templated_email = None # Gérer le cas où l'import échoue
+from user_auth.cache import invalidate_cached_user
+
+try:
+    from notifications.services import send_templated_email
+except ImportError: # Gérer le cas où l'application notifications n'est pas installée
+    send_templated_email = None
 
 import logging
 logger = logging.getLogger(__name__)
 
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+@receiver(post_delete, sender=settings.AUTH_USER_MODEL)
+def invalidate_jwt_user_cache(sender, instance, created=False, update_fields=None, **kwargs):
+    """
+    Invalide le cache de CookieJWTAuthentication quand un utilisateur change
+    (mot de passe, désactivation, profil...). La mise à jour seule de
+    `last_login` (faite à chaque connexion) n'a pas d'effet sur l'authentification.
+    """
+    if created:
+        return
+    if update_fields is not None and set(update_fields) <= {'last_login'}:
+        return
+    invalidate_cached_user(instance.pk)
+
+
 @receiver(post_save, sender=settings.AUTH_USER_MODEL) # Écoute le signal post_save pour le modèle User
 def send_welcome_email_on_user_creation(sender, instance, created, **kwargs):
     """
-    Envoie un email de bienvenue lorsqu'un nouvel utilisateur est créé.
+    Ajoute l'email de bienvenue à l'outbox lorsqu'un nouvel utilisateur est créé.
+    La ligne est écrite dans la même transaction que l'utilisateur (rien n'est
+    envoyé si la création est annulée) ; l'envoi SMTP est fait par le worker
+    `process_email_outbox`, hors de la requête d'inscription. L'insertion a son
+    propre savepoint : si elle échoue, l'utilisateur est créé quand même et la
+    transaction englobante reste utilisable.
     """
     if created: # On agit seulement si l'instance vient d'être créée
-        
-        # Préparer le contexte pour le template email
-        # Vous pouvez ajouter d'autres variables utiles ici
-        # frontend_login_url = f"{getattr(settings, 'FRONTEND_SITE_URL', 'http://localhost:3000')}/login" # Exemple
-        # activation_token = ... # Si vous avez un processus d'activation
-        
-        context = {
-            'user': instance, # L'instance User complète
-            'user_name': instance.full_name or instance.username,
-            # 'login_url': frontend_login_url, 
-            # 'activation_url': ... # Si applicable
-            # 'site_name' et 'site_url' sont ajoutés par send_templated_email
-        }
-
-        try:
-            if send_templated_email is None:
-                logger.error("send_templated_email n'est pas disponible. Assurez-vous que le module notifications est installé.")
-                return
+        send_welcome_email(instance)
+
+
+def send_welcome_email(instance):
+    """Met en file l'email de bienvenue de `instance`."""
+    if send_templated_email is None:
+        logger.error("send_templated_email n'est pas disponible. Assurez-vous que le module notifications est installé.")
+        return
+    if not instance.email:
+        return
+
+    # Préparer le contexte pour le template email
+    # Vous pouvez ajouter d'autres variables utiles ici
+    # frontend_login_url = f"{getattr(settings, 'FRONTEND_SITE_URL', 'http://localhost:3000')}/login" # Exemple
+    # activation_token = ... # Si vous avez un processus d'activation
+
+    context = {
+        'user': instance, # L'instance User complète
+        'user_name': instance.full_name or instance.username,
+        # 'login_url': frontend_login_url, 
+        # 'activation_url': ... # Si applicable
+        # 'site_name' et 'site_url' sont ajoutés par send_templated_email
+    }
+
+    try:
+        # Savepoint : une erreur SQL ici n'interrompt pas la transaction de l'inscription
+        with transaction.atomic():
             send_templated_email(
                 subject_template_name='notifications/email/user_auth/welcome_subject.txt',
                 html_template_name='notifications/email/user_auth/welcome_body.html',
@@ -42,5 +78,5 @@ def send_welcome_email_on_user_creation(sender, instance, created, **kwargs):
                 recipient_user=instance, # Pour lier le log à cet utilisateur
                 related_object=instance # Si vous utilisez GenericForeignKey dans NotificationLog pour l'user
             )
-        except Exception as e:
-            logger.error(f"Erreur lors de l'envoi de l'email de bienvenue à {instance.email}: {e}", exc_info=True)
\ No newline at end of file
+    except Exception as e:
+        logger.error("Erreur lors de la mise en file de l'email de bienvenue pour l'utilisateur %s: %s", instance.pk, e, exc_info=True)
@@ -1,15 +1,52 @@
+import colorsys
+import datetime
+import json
+import os
+import pprint
+import random
+import tempfile
+import time
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
 
-
-from django.urls import reverse
+import jwt
+from cryptography.hazmat.primitives.asymmetric import ed25519, rsa
+from django.conf import settings # Pour accéder aux noms des cookies JWT
+from django.conf import settings as test_runner_settings
 from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import update_last_login
+from django.contrib.contenttypes.models import ContentType
+from django.core import mail
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import IntegrityError, connection, transaction
+from django.test import RequestFactory, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from jwt.algorithms import OKPAlgorithm, RSAAlgorithm
 from rest_framework import status
-from rest_framework.test import APITestCase, APIClient
-from rest_framework_simplejwt.tokens import RefreshToken
-from rest_framework_simplejwt.token_blacklist.models import OutstandingToken, BlacklistedToken
-from django.conf import settings # Pour accéder aux noms des cookies JWT
+from rest_framework.test import APIClient, APITestCase
+from rest_framework_simplejwt import state as simplejwt_state
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, TokenError
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+from rest_framework_simplejwt.tokens import AccessToken, RefreshToken
 
-from django.conf import settings as test_runner_settings
-import pprint
+from notifications.models import EmailOutbox
+from user_auth import blacklist as token_blacklist
+from user_auth import cache as user_cache
+from user_auth import jwks
+from user_auth.authentication import CookieJWTAuthentication, CookieJWTStatelessAuthentication
+from user_auth.backends import EmailOrUsernameModelBackend
+from user_auth.colors import MAX_LUMINANCE, generate_profile_colors, luminance
+from user_auth.hashers import _rehash_password, password_needs_rehash
+from user_auth.models import PasswordResetRequest, PasswordResetToken
+from user_auth.password_reset import process_password_reset_request, process_pending_requests
+from user_auth.retention import purge_in_batches, purgeable_querysets, table_stats
+from user_auth.serializers import UserCreateSerializer, UserProfileSerializer
+from user_auth.tokens import ProfileRefreshToken
 
 print("\n--- DEBUG [test_auth_views.py]: Settings loaded by test runner ---")
 if hasattr(test_runner_settings, 'SIMPLE_JWT'):
@@ -25,6 +62,26 @@ User = get_user_model()
 ACCESS_COOKIE_NAME = settings.SIMPLE_JWT['AUTH_COOKIE']
 REFRESH_COOKIE_NAME = settings.SIMPLE_JWT['AUTH_COOKIE_REFRESH']
 
+
+def create_test_user(username, **fields):
+    """Utilisateur de test ; email `<username>@example.com` et mot de passe `<username>Password123` par défaut."""
+    fields.setdefault('email', f'{username}@example.com')
+    fields.setdefault('password', f'{username}Password123')
+    fields.setdefault('full_name', username.title())
+    return User.objects.create_user(username=username, **fields)
+
+
+class UserTestDataMixin:
+    """`cls.user` créé une fois par classe, avec `create_test_user(username, **user_fields)`."""
+    username = 'tester'
+    user_fields = {}
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.user = create_test_user(cls.username, **cls.user_fields)
+
+
 class AuthIntegrationTests(APITestCase):
     """
     Suite de tests couvrant l'ensemble du flux d'authentification
@@ -411,4 +468,768 @@ class AuthIntegrationTests(APITestCase):
         self.assertIn('detail', verify_response.data)
 
     # Ajouter des tests pour les cas d'access token expiré si vous pouvez facilement manipuler le temps
-    # ou si SIMPLE_JWT['ACCESS_TOKEN_LIFETIME'] est très court pour les tests.
\ No newline at end of file
+    # ou si SIMPLE_JWT['ACCESS_TOKEN_LIFETIME'] est très court pour les tests.
+
+
+class CookieJWTUserCacheTests(UserTestDataMixin, TestCase):
+    """Le cache de résolution utilisateur évite le SELECT User, et les signaux l'invalident."""
+
+    username = 'cached'
+
+    def setUp(self):
+        cache.clear()
+        self.factory = RequestFactory()
+        self.auth = CookieJWTAuthentication()
+        self.token = str(AccessToken.for_user(self.user))
+
+    def _authenticate(self, token=None):
+        request = self.factory.get('/')
+        request.COOKIES[ACCESS_COOKIE_NAME] = token or self.token
+        return self.auth.authenticate(request)
+
+    def test_second_request_skips_user_query(self):
+        with self.assertNumQueries(1):
+            self._authenticate()
+        with self.assertNumQueries(0):
+            user, _ = self._authenticate()
+        self.assertEqual(user.pk, self.user.pk)
+
+    def test_cache_holds_minimal_projection(self):
+        self._authenticate()
+        token = AccessToken(self.token)
+        version = user_cache._get_version(self.user.pk)
+        entry = cache.get(user_cache._user_key(self.user.pk, version, token['jti']))
+        self.assertEqual(set(entry), {'pk', 'version', *user_cache.USER_FIELDS})
+
+        user, _ = self._authenticate()
+        self.assertIsInstance(user, User)
+        self.assertEqual(
+            (user.pk, user.username, user.is_active, user.is_superuser, user.profile_color),
+            (self.user.pk, self.user.username, True, False, self.user.profile_color),
+        )
+        self.assertEqual(user.password, '')
+
+    def test_cache_is_keyed_by_token(self):
+        self._authenticate()
+        other_token = str(AccessToken.for_user(self.user))
+        with self.assertNumQueries(1):
+            self._authenticate(other_token)
+
+    def test_deactivation_invalidates_cache(self):
+        self._authenticate()
+        self.user.is_active = False
+        self.user.save()
+        with self.assertRaises(AuthenticationFailed):
+            self._authenticate()
+
+    def test_last_login_update_keeps_cache(self):
+        self._authenticate()
+        update_last_login(None, self.user)
+        with self.assertNumQueries(0):
+            self._authenticate()
+
+
+class StatelessTokenUserTests(UserTestDataMixin, TestCase):
+    """Le token ne porte que l'identité ; l'authentification sans état n'en lit pas plus."""
+
+    username = 'statelessuser'
+    user_fields = {'birthday': datetime.date(1990, 5, 17)}
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.factory = RequestFactory()
+
+    def _authenticate(self, token):
+        request = self.factory.get('/')
+        request.COOKIES[ACCESS_COOKIE_NAME] = str(token)
+        return CookieJWTStatelessAuthentication().authenticate(request)
+
+    def test_access_token_carries_no_personal_data(self):
+        access = ProfileRefreshToken.for_user(self.user).access_token
+        for claim in ('email', 'full_name', 'birthday', 'gender'):
+            self.assertNotIn(claim, access.payload)
+        self.assertEqual(access['username'], 'statelessuser')
+        self.assertEqual(access['profile_color'], self.user.profile_color)
+        self.assertFalse(access['is_superuser'])
+
+    def test_stateless_authentication_runs_without_queries(self):
+        access = ProfileRefreshToken.for_user(self.user).access_token
+        with self.assertNumQueries(0):
+            user, _ = self._authenticate(access)
+        self.assertEqual(str(user.id), str(self.user.pk))
+        self.assertEqual(user.username, 'statelessuser')
+        self.assertFalse(user.is_superuser)
+
+    def test_token_without_profile_claims_falls_back_to_database(self):
+        access = RefreshToken.for_user(self.user).access_token
+        with self.assertNumQueries(1):
+            user, _ = self._authenticate(access)
+        self.assertEqual(user.email, self.user.email)
+
+    def test_inactive_claim_is_rejected(self):
+        access = ProfileRefreshToken.for_user(self.user).access_token
+        access['is_active'] = False
+        with self.assertRaises(AuthenticationFailed):
+            self._authenticate(access)
+
+    def test_verify_view_runs_without_queries(self):
+        User.objects.filter(pk=self.user.pk).update(is_superuser=True)
+        self.user.refresh_from_db()
+        self.client.cookies[ACCESS_COOKIE_NAME] = str(ProfileRefreshToken.for_user(self.user).access_token)
+        with self.assertNumQueries(0):
+            response = self.client.get(reverse('cookie_token_verify'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['user'], {
+            'id': str(self.user.pk),
+            'username': 'statelessuser',
+            'is_superuser': True,
+            'profile_color': self.user.profile_color,
+        })
+
+    def test_profile_view_reads_full_profile(self):
+        self.client.cookies[ACCESS_COOKIE_NAME] = str(ProfileRefreshToken.for_user(self.user).access_token)
+        self.client.get(reverse('user_profile'))
+        # Utilisateur authentifié depuis le cache, profil relu en base
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse('user_profile'))
+        self.assertEqual(response.data, UserProfileSerializer(self.user).data)
+
+    def test_refresh_rewrites_profile_claims(self):
+        refresh = ProfileRefreshToken.for_user(self.user)
+        self.client.cookies[REFRESH_COOKIE_NAME] = str(refresh)
+        User.objects.filter(pk=self.user.pk).update(username='renameduser')
+
+        response = self.client.post(reverse('token_refresh'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        new_access = AccessToken(response.cookies[ACCESS_COOKIE_NAME].value)
+        self.assertEqual(new_access['username'], 'renameduser')
+
+
+# Seul le backend identifiant/mot de passe intervient dans le login
+@override_settings(AUTHENTICATION_BACKENDS=['user_auth.backends.EmailOrUsernameModelBackend'])
+class LoginQueryCountTests(UserTestDataMixin, TestCase):
+    """Le login réutilise l'utilisateur authentifié : SELECT + INSERT OutstandingToken + UPDATE last_login."""
+
+    username = 'login'
+
+    def test_login_uses_fixed_number_of_queries(self):
+        client = APIClient()
+        with CaptureQueriesContext(connection) as ctx:
+            response = client.post(
+                reverse('token_obtain_pair'),
+                {'identifier': 'login@example.com', 'password': 'loginPassword123'},
+                format='json',
+            )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        # Les SAVEPOINT du TestCase ne sont pas des allers-retours applicatifs
+        statements = [q['sql'] for q in ctx.captured_queries if 'SAVEPOINT' not in q['sql']]
+        self.assertEqual(len(statements), 3, statements)
+
+        self.user.refresh_from_db()
+        self.assertIsNotNone(self.user.last_login)
+        self.assertEqual(OutstandingToken.objects.filter(user=self.user).count(), 1)
+
+
+class EmailOrUsernameBackendTests(UserTestDataMixin, TestCase):
+    """Recherche insensible à la casse via les sondes LOWER(...) indexées."""
+
+    username = 'MixedCase'
+    user_fields = {'email': 'Mixed.Case@Example.com', 'password': 'mixedPassword123'}
+
+    def setUp(self):
+        self.backend = EmailOrUsernameModelBackend()
+
+    def test_email_and_username_are_case_insensitive(self):
+        for identifier in ('mixed.case@example.com', 'MIXED.CASE@EXAMPLE.COM', 'mixedcase', 'MIXEDCASE'):
+            with self.subTest(identifier=identifier), self.assertNumQueries(1):
+                user = self.backend.authenticate(None, username=identifier, password='mixedPassword123')
+            self.assertEqual(user, self.user)
+
+    def test_unknown_identifier_or_wrong_password(self):
+        self.assertIsNone(self.backend.authenticate(None, username='nobody@example.com', password='mixedPassword123'))
+        self.assertIsNone(self.backend.authenticate(None, username='mixedcase', password='wrong'))
+
+    def test_ambiguous_identifier_is_rejected(self):
+        User.objects.create_user(
+            username='mixed.case@example.com', email='other@example.com', password='mixedPassword123', full_name='Other'
+        )
+        self.assertIsNone(self.backend.authenticate(None, username='Mixed.Case@example.com', password='mixedPassword123'))
+
+
+@override_settings(
+    AUTHENTICATION_BACKENDS=['user_auth.backends.EmailOrUsernameModelBackend'],
+    REST_FRAMEWORK={
+        **settings.REST_FRAMEWORK,
+        'DEFAULT_THROTTLE_RATES': {'login': '5/min', 'login_identifier': '3/min'},
+    },
+)
+class LoginProtectionTests(UserTestDataMixin, TestCase):
+    """Hachage factice pour les comptes inconnus et limitation par IP / identifiant."""
+
+    username = 'guarded'
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+
+    def _login(self, identifier, password='wrongPassword', **extra):
+        return self.client.post(
+            reverse('token_obtain_pair'), {'identifier': identifier, 'password': password}, format='json', **extra
+        )
+
+    def test_unknown_identifier_still_hashes_password(self):
+        with mock.patch('user_auth.backends.UserModel.set_password') as set_password:
+            response = self._login('ghost@example.com')
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        set_password.assert_called_once_with('wrongPassword')
+
+    def test_identifier_limit_rejects_before_hashing(self):
+        for index in range(3):
+            # Adresses différentes : seule la limite par identifiant s'applique
+            self._login('Guarded@example.com ', REMOTE_ADDR=f'10.0.0.{index}')
+        with mock.patch('user_auth.backends.EmailOrUsernameModelBackend.authenticate') as backend_authenticate:
+            response = self._login('guarded@example.com', REMOTE_ADDR='10.0.0.99')
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertIn('Retry-After', response)
+        backend_authenticate.assert_not_called()
+
+    def test_successful_login_resets_identifier_limit(self):
+        for _ in range(2):
+            self._login('guarded@example.com', REMOTE_ADDR='10.0.1.1')
+        response = self._login('guarded@example.com', password='guardedPassword123', REMOTE_ADDR='10.0.1.2')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        # Compteur remis à zéro : trois nouveaux échecs sont encore acceptés
+        for index in range(3):
+            response = self._login('guarded@example.com', REMOTE_ADDR=f'10.0.1.{index + 3}')
+            self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_non_object_body_is_rejected_without_error(self):
+        response = self.client.post(reverse('token_obtain_pair'), ['guarded@example.com'], format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_ip_limit_applies_across_identifiers(self):
+        for index in range(5):
+            self._login(f'user{index}@example.com')
+        response = self._login('guarded@example.com', password='guardedPassword123')
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+
+
+@override_settings(
+    PASSWORD_HASHERS=[
+        'django.contrib.auth.hashers.ScryptPasswordHasher',
+        'django.contrib.auth.hashers.MD5PasswordHasher',
+    ],
+    BACKGROUND_TASKS_EAGER=True,
+)
+class PasswordRehashTests(TestCase):
+    """Re-hachage différé vers le hasher préféré après un login réussi."""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='legacy', email='legacy@example.com', full_name='Legacy')
+        User.objects.filter(pk=self.user.pk).update(password=make_password('legacyPassword123', hasher='md5'))
+        self.backend = EmailOrUsernameModelBackend()
+
+    def test_successful_login_rehashes_with_preferred_hasher(self):
+        user = self.backend.authenticate(None, username='legacy', password='legacyPassword123')
+        self.assertEqual(user, self.user)
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.password.startswith('scrypt$'))
+        self.assertFalse(password_needs_rehash(self.user.password))
+        self.assertTrue(self.user.check_password('legacyPassword123'))
+
+    def test_failed_login_does_not_rehash(self):
+        self.assertIsNone(self.backend.authenticate(None, username='legacy', password='wrong'))
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.password.startswith('md5$'))
+
+    def test_concurrent_password_change_wins(self):
+        stale = User.objects.get(pk=self.user.pk).password
+        User.objects.filter(pk=self.user.pk).update(password=make_password('newPassword123', hasher='md5'))
+        self.assertFalse(_rehash_password(self.user.pk, stale, 'legacyPassword123'))
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.check_password('newPassword123'))
+
+
+class UserCreationTests(TestCase):
+    """Création sans second save : couleur attribuée en pre_save, email de bienvenue mis en outbox."""
+
+    def test_create_user_inserts_user_and_outbox_row_only(self):
+        ContentType.objects.get_for_model(User)  # cache des ContentType, chaud en production
+        # INSERT User + INSERT EmailOutbox (dans un savepoint), même transaction, sans envoi SMTP
+        with self.assertNumQueries(4):
+            user = User.objects.create_user(
+                username='newcomer', email='newcomer@example.com', password='newcomerPassword123', full_name='New Comer'
+            )
+        self.assertRegex(user.profile_color, r'^#[0-9A-F]{6}$')
+        self.assertEqual(User.objects.get(pk=user.pk).profile_color, user.profile_color)
+        outbox = EmailOutbox.objects.get(recipient_user=user)
+        self.assertEqual(outbox.to, ['newcomer@example.com'])
+        self.assertEqual(outbox.event_type, 'user_welcome_email')
+
+    def test_explicit_color_is_kept(self):
+        user = User.objects.create_user(
+            username='colored', email='colored@example.com', password='coloredPassword123',
+            full_name='Colored', profile_color='#112233',
+        )
+        self.assertEqual(user.profile_color, '#112233')
+
+    def test_welcome_email_is_not_sent_inline(self):
+        User.objects.create_user(
+            username='welcome', email='welcome@example.com', password='welcomePassword123', full_name='Welcome'
+        )
+        self.assertEqual(mail.outbox, [])
+
+    def test_outbox_failure_does_not_break_the_transaction(self):
+        def failing_insert(**kwargs):
+            with connection.cursor() as cursor:
+                cursor.execute('INSERT INTO table_inexistante VALUES (1)')
+
+        with mock.patch('user_auth.signals.send_templated_email', side_effect=failing_insert), \
+                self.assertLogs('user_auth.signals', 'ERROR'), transaction.atomic():
+            user = User.objects.create_user(
+                username='resilient', email='resilient@example.com', password='resilientPassword123', full_name='R'
+            )
+            # Sans savepoint, PostgreSQL refuserait toute requête suivante de la transaction
+            self.assertTrue(User.objects.filter(pk=user.pk).exists())
+
+
+class ProfileColorTests(TestCase):
+    """Couleurs tirées en HSL : format, plafond de luminance et répartition des teintes."""
+
+    SAMPLES = 6000
+
+    def setUp(self):
+        self.colors = generate_profile_colors(self.SAMPLES, rng=random.Random(42))
+
+    def test_format_and_luminance_cap(self):
+        for color in self.colors:
+            self.assertRegex(color, r'^#[0-9A-F]{6}$')
+            self.assertLessEqual(luminance(color), MAX_LUMINANCE)
+        # Pas de couleurs quasi noires
+        self.assertGreater(min(luminance(color) for color in self.colors), 0.05)
+
+    def test_hues_are_spread_evenly(self):
+        buckets = [0] * 12
+        for color in self.colors:
+            rgb = [int(color[i:i + 2], 16) / 255 for i in (1, 3, 5)]
+            hue = colorsys.rgb_to_hls(*rgb)[0]
+            buckets[min(int(hue * 12), 11)] += 1
+        expected = self.SAMPLES / 12
+        for count in buckets:
+            self.assertGreater(count, expected * 0.7)
+            self.assertLess(count, expected * 1.3)
+
+    def test_luminance_is_not_collapsed_to_the_cap(self):
+        values = sorted(luminance(color) for color in self.colors)
+        spread = values[int(len(values) * 0.9)] - values[int(len(values) * 0.1)]
+        self.assertGreater(spread, 0.15)
+
+    def test_backfill_assigns_colors_to_default_users(self):
+        default_color = User._meta.get_field('profile_color').get_default()
+        User.objects.bulk_create([
+            User(username=f'backfill{i}', email=f'backfill{i}@example.com', full_name='Backfill')
+            for i in range(5)
+        ])
+        call_command('backfill_profile_colors', batch_size=2, stdout=StringIO())
+        self.assertFalse(User.objects.filter(profile_color=default_color).exists())
+
+
+class UserCreateUniquenessTests(UserTestDataMixin, TestCase):
+    """Unicité vérifiée en une requête, puis garantie par les contraintes de la base."""
+
+    username = 'Taken'
+
+    def _payload(self, **overrides):
+        data = {
+            'username': 'fresh', 'email': 'fresh@example.com', 'first_name': 'Fresh',
+            'password': 'freshPassword123!', 'password2': 'freshPassword123!',
+        }
+        data.update(overrides)
+        return data
+
+    def test_uniqueness_checked_in_single_query(self):
+        serializer = UserCreateSerializer(data=self._payload())
+        with self.assertNumQueries(1):
+            self.assertTrue(serializer.is_valid(), serializer.errors)
+
+    def test_duplicates_are_case_insensitive_field_errors(self):
+        serializer = UserCreateSerializer(data=self._payload(username='taken', email='TAKEN@example.com'))
+        self.assertFalse(serializer.is_valid())
+        self.assertEqual(set(serializer.errors), {'username', 'email'})
+
+    def test_integrity_error_becomes_field_error(self):
+        with mock.patch.object(UserCreateSerializer, '_validate_unique'):
+            response = APIClient().post(
+                reverse('register'), self._payload(email='taken@EXAMPLE.com'), format='json'
+            )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data['errors'], {'email': ["Cette adresse email est déjà utilisée."]})
+        self.assertFalse(User.objects.filter(username='fresh').exists())
+
+    def test_integrity_error_is_mapped_on_constraint_name(self):
+        serializer = UserCreateSerializer()
+        cause = Exception()
+        cause.diag = mock.Mock(constraint_name='user_username_lower_uniq')  # comme psycopg2
+        error = IntegrityError('duplicate key value violates unique constraint "user_username_lower_uniq" (email)')
+        error.__cause__ = cause
+        self.assertEqual(serializer._integrity_error_to_field_errors(error), {'username': ["Ce nom d'utilisateur est déjà pris."]})
+
+        cause.diag.constraint_name = 'notifications_emailoutbox_pkey'
+        with self.assertRaises(IntegrityError):
+            serializer._integrity_error_to_field_errors(error)
+
+
+@override_settings(
+    REST_FRAMEWORK={
+        **settings.REST_FRAMEWORK,
+        'DEFAULT_THROTTLE_RATES': {'password_reset': '5/hour', 'password_reset_email': '2/hour'},
+    },
+)
+class PasswordResetRequestTests(UserTestDataMixin, TestCase):
+    """La requête n'enregistre que la demande ; le worker inscrit l'email dans l'outbox ; débit limité."""
+
+    username = 'forgetful'
+    user_fields = {'email': 'Forgetful@example.com'}
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        # Email de bienvenue de l'utilisateur
+        EmailOutbox.objects.all().delete()
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+
+    def _request(self, email, **extra):
+        return self.client.post(reverse('password_reset_request_api'), {'email': email}, format='json', **extra)
+
+    def test_view_only_records_request(self):
+        responses = [self._request(email) for email in ('forgetful@example.com', 'nobody@example.com')]
+        self.assertEqual(responses[0].status_code, status.HTTP_201_CREATED)
+        self.assertEqual(responses[0].data, responses[1].data)
+        # Inscrit de façon durable avant la réponse ; rien d'autre dans la requête
+        self.assertEqual(
+            sorted(PasswordResetRequest.objects.pending().values_list('email', flat=True)),
+            ['forgetful@example.com', 'nobody@example.com'],
+        )
+        self.assertFalse(PasswordResetToken.objects.exists())
+        self.assertFalse(EmailOutbox.objects.exists())
+
+    def test_known_and_unknown_email_run_same_queries(self):
+        counts = []
+        for email in ('forgetful@example.com', 'nobody@example.com'):
+            with CaptureQueriesContext(connection) as ctx:
+                self._request(email)
+            counts.append(len(ctx.captured_queries))
+        self.assertEqual(counts, [1, 1])
+
+    def test_worker_queues_email_for_known_account_only(self):
+        for email in ('FORGETFUL@example.com', 'nobody@example.com'):
+            self._request(email)
+        self.assertEqual(process_pending_requests(), 2)
+        self.assertFalse(PasswordResetRequest.objects.pending().exists())
+        self.assertEqual(process_pending_requests(), 0)
+
+        outbox = EmailOutbox.objects.get(event_type='password_reset_request')
+        self.assertEqual(outbox.to, [self.user.email])
+        token = PasswordResetToken.objects.get(user=self.user)
+        self.assertIn(f'/reset-password-confirm/{token.token}/', outbox.body_html)
+
+    def test_failed_request_does_not_block_queue(self):
+        for email in ('broken@example.com', 'forgetful@example.com'):
+            PasswordResetRequest.objects.create(email=email)
+        real = process_password_reset_request
+
+        def process(email):
+            if email.startswith('broken'):
+                raise RuntimeError("boom")
+            return real(email)
+
+        with mock.patch('user_auth.password_reset.process_password_reset_request', side_effect=process):
+            self.assertEqual(process_pending_requests(), 2)
+        self.assertFalse(PasswordResetRequest.objects.pending().exists())
+        self.assertTrue(EmailOutbox.objects.filter(event_type='password_reset_request').exists())
+
+    def test_email_limit_rejects_before_recording(self):
+        for index in range(2):
+            self._request('Forgetful@example.com', REMOTE_ADDR=f'10.0.0.{index}')
+        with mock.patch('user_auth.views.queue_password_reset_request') as queue:
+            response = self._request('forgetful@example.com ', REMOTE_ADDR='10.0.0.99')
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        queue.assert_not_called()
+        self.assertEqual(PasswordResetRequest.objects.count(), 2)
+
+    def test_ip_limit_applies_across_emails(self):
+        for index in range(5):
+            self._request(f'user{index}@example.com')
+        response = self._request('forgetful@example.com')
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertFalse(PasswordResetRequest.objects.filter(email='forgetful@example.com').exists())
+
+    def test_request_creates_token_and_queues_email(self):
+        ContentType.objects.get_for_model(PasswordResetToken)  # cache des ContentType, chaud en production
+        with self.assertNumQueries(5):
+            # SELECT user, SAVEPOINT, INSERT token, INSERT outbox, RELEASE SAVEPOINT
+            token = process_password_reset_request('FORGETFUL@example.com')
+        self.assertEqual(token.user, self.user)
+        outbox = EmailOutbox.objects.get(event_type='password_reset_request')
+        self.assertEqual(outbox.to, [self.user.email])
+        self.assertIn(f'/reset-password-confirm/{token.token}/', outbox.body_html)
+
+    def test_unknown_or_inactive_account_does_nothing(self):
+        self.assertIsNone(process_password_reset_request('nobody@example.com'))
+        User.objects.filter(pk=self.user.pk).update(is_active=False)
+        self.assertIsNone(process_password_reset_request('forgetful@example.com'))
+        self.assertFalse(PasswordResetToken.objects.exists())
+        self.assertFalse(EmailOutbox.objects.exists())
+
+
+class TokenRetentionTests(UserTestDataMixin, TestCase):
+    """Purge par lots des tokens de réinitialisation et des tokens JWT expirés."""
+
+    username = 'retention'
+
+    def test_valid_queryset_matches_is_valid(self):
+        now = timezone.now()
+        fresh = PasswordResetToken.objects.create(user=self.user)
+        PasswordResetToken.objects.create(user=self.user, expires_at=now - timedelta(minutes=1))
+        PasswordResetToken.objects.create(user=self.user, used_at=now)
+        self.assertEqual(list(PasswordResetToken.objects.valid()), [fresh])
+
+    def test_purge_removes_only_old_rows_in_batches(self):
+        old = timezone.now() - timedelta(days=30)
+        PasswordResetToken.objects.bulk_create(
+            [PasswordResetToken(user=self.user, expires_at=old) for _ in range(5)]
+            + [PasswordResetToken(user=self.user, used_at=old) for _ in range(2)]
+        )
+        kept = PasswordResetToken.objects.create(user=self.user)
+
+        expired = ProfileRefreshToken.for_user(self.user)
+        OutstandingToken.objects.filter(jti=expired['jti']).update(expires_at=old)
+        BlacklistedToken.objects.create(token=OutstandingToken.objects.get(jti=expired['jti']))
+        live = ProfileRefreshToken.for_user(self.user)
+
+        querysets = purgeable_querysets()
+        # 7 tokens par lots de 3 : 3 DELETE suffisent
+        self.assertEqual(purge_in_batches(querysets['user_auth_passwordresettoken'], batch_size=3), 7)
+        self.assertEqual(purge_in_batches(querysets['token_blacklist_outstandingtoken'], batch_size=3), 1)
+
+        self.assertEqual(list(PasswordResetToken.objects.all()), [kept])
+        self.assertEqual(list(OutstandingToken.objects.values_list('jti', flat=True)), [live['jti']])
+        self.assertFalse(BlacklistedToken.objects.exists())
+
+    def test_purge_removes_old_processed_reset_requests(self):
+        old = timezone.now() - timedelta(days=30)
+        PasswordResetRequest.objects.bulk_create([
+            PasswordResetRequest(email='old@example.com', processed_at=old),
+            PasswordResetRequest(email='recent@example.com', processed_at=timezone.now()),
+            PasswordResetRequest(email='pending@example.com'),
+        ])
+        self.assertEqual(purge_in_batches(purgeable_querysets()['user_auth_passwordresetrequest']), 1)
+        self.assertEqual(
+            sorted(PasswordResetRequest.objects.values_list('email', flat=True)),
+            ['pending@example.com', 'recent@example.com'],
+        )
+
+    def test_command_reports_table_sizes(self):
+        PasswordResetToken.objects.create(user=self.user)
+        out = StringIO()
+        call_command('purge_expired_tokens', '--dry-run', stdout=out)
+        self.assertIn('user_auth_passwordresettoken: 0 ligne(s) à supprimer', out.getvalue())
+        self.assertEqual(table_stats()['user_auth_passwordresettoken']['rows'], 1)
+
+
+@override_settings(
+    SIMPLE_JWT={**settings.SIMPLE_JWT, 'BLACKLIST_CACHE_ENABLED': True, 'BLACKLIST_WRITE_BATCH_SIZE': 1000},
+    BACKGROUND_TASKS_EAGER=True,
+)
+class CachedBlacklistTests(UserTestDataMixin, TestCase):
+    """Liste noire lue dans le cache, révocations écrites en base, OutstandingToken groupés."""
+
+    username = 'blacklist'
+
+    def setUp(self):
+        cache.clear()
+        # Le LocMem des tests tient lieu de Redis
+        patcher = mock.patch.object(token_blacklist, 'cache_is_shared', return_value=True)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        token_blacklist.load_blacklist()
+        self.addCleanup(token_blacklist._buffer.drain)
+
+    def test_refresh_revokes_in_database_within_the_request(self):
+        token = ProfileRefreshToken.for_user(self.user)
+        self.client.cookies[REFRESH_COOKIE_NAME] = str(token)
+
+        response = self.client.post(reverse('token_refresh'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        # Révocation en base sans attendre le tampon : elle survit à un arrêt du processus
+        self.assertTrue(BlacklistedToken.objects.filter(token__jti=token['jti']).exists())
+        self.assertEqual(len(token_blacklist._buffer), 2)  # tokens émis seulement (initial et rotation)
+
+        # Cache vidé : l'ancien token reste refusé
+        cache.clear()
+        self.client.cookies[REFRESH_COOKIE_NAME] = str(token)
+        response = self.client.post(reverse('token_refresh'))
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_flush_writes_rows_in_one_batch(self):
+        tokens = [ProfileRefreshToken.for_user(self.user) for _ in range(5)]
+        self.assertFalse(OutstandingToken.objects.exists())
+
+        with self.assertNumQueries(4):  # SAVEPOINT/RELEASE + users + 1 INSERT
+            self.assertEqual(token_blacklist.flush_pending_writes(), 5)
+        self.assertEqual(OutstandingToken.objects.count(), 5)
+
+        for token in tokens[:3]:
+            token.blacklist()
+        self.assertEqual(
+            set(BlacklistedToken.objects.values_list('token__jti', flat=True)),
+            {token['jti'] for token in tokens[:3]},
+        )
+        # Rejouable sans doublon
+        token_blacklist.write_tokens([], [token_blacklist.pending_from_token(tokens[0])])
+        self.assertEqual(BlacklistedToken.objects.count(), 3)
+
+    def test_empty_cache_is_reloaded_from_database(self):
+        token = ProfileRefreshToken.for_user(self.user)
+        token.blacklist()
+        cache.clear()
+
+        self.assertTrue(token_blacklist.is_blacklisted(token['jti']))
+        self.assertFalse(token_blacklist.is_blacklisted(ProfileRefreshToken.for_user(self.user)['jti']))
+
+    def test_unavailable_cache_falls_back_to_database(self):
+        token = ProfileRefreshToken.for_user(self.user)
+        with mock.patch.object(token_blacklist, '_cache', side_effect=ConnectionError):
+            token.blacklist()
+            self.assertTrue(token_blacklist.is_blacklisted(token['jti']))
+        self.assertFalse(token_blacklist.is_blacklisted(ProfileRefreshToken.for_user(self.user)['jti']))
+
+    @override_settings(SIMPLE_JWT={
+        **settings.SIMPLE_JWT, 'BLACKLIST_CACHE_ENABLED': True, 'BLACKLIST_WRITE_FLUSH_SECONDS': 0.05,
+    })
+    def test_outstanding_tokens_are_flushed_without_further_activity(self):
+        ProfileRefreshToken.for_user(self.user)
+        with mock.patch.object(token_blacklist, 'run_in_background') as run:
+            time.sleep(0.2)
+        run.assert_called_once_with(token_blacklist._buffer.flush)
+
+    def test_local_cache_falls_back_to_database(self):
+        with mock.patch.object(token_blacklist, 'cache_is_shared', return_value=False):
+            self.assertFalse(token_blacklist.is_enabled())
+            token = ProfileRefreshToken.for_user(self.user)
+            token.blacklist()
+            # Clés évincées ou écrites par un autre processus : la base fait foi
+            cache.clear()
+            with self.assertRaises(TokenError):
+                ProfileRefreshToken(str(token))
+        self.assertTrue(BlacklistedToken.objects.filter(token__jti=token['jti']).exists())
+
+    def test_concurrent_reload_reads_database(self):
+        token = ProfileRefreshToken.for_user(self.user)
+        token.blacklist()
+        cache.clear()
+        cache.add(token_blacklist.LOAD_LOCK_KEY, True)
+        with mock.patch.object(token_blacklist, 'load_blacklist') as load:
+            self.assertTrue(token_blacklist.is_blacklisted(token['jti']))
+            self.assertFalse(token_blacklist.is_blacklisted(ProfileRefreshToken.for_user(self.user)['jti']))
+        load.assert_not_called()
+
+        cache.delete(token_blacklist.LOAD_LOCK_KEY)
+        self.assertTrue(token_blacklist.is_blacklisted(token['jti']))
+        self.assertIsNone(cache.get(token_blacklist.LOAD_LOCK_KEY))
+        self.assertTrue(cache.get(token_blacklist.LOADED_KEY))
+
+    def test_logout_revokes_through_cache(self):
+        token = ProfileRefreshToken.for_user(self.user)
+        self.client.cookies[REFRESH_COOKIE_NAME] = str(token)
+        self.client.post(reverse('logout'))
+        self.assertTrue(token_blacklist.is_blacklisted(token['jti']))
+
+
+def _private_jwk(kid, algorithm='RS256'):
+    if algorithm == 'EdDSA':
+        jwk = OKPAlgorithm.to_jwk(ed25519.Ed25519PrivateKey.generate(), as_dict=True)
+    else:
+        jwk = RSAAlgorithm.to_jwk(rsa.generate_private_key(public_exponent=65537, key_size=2048), as_dict=True)
+    return {**jwk, 'kid': kid, 'alg': algorithm}
+
+
+class AsymmetricSigningTests(UserTestDataMixin, TestCase):
+    """Signature RS256/EdDSA depuis un JWKS local et publication des clés publiques."""
+
+    username = 'jwks'
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+        self.path = os.path.join(self.tmpdir.name, 'jwks.json')
+        jwks._key_sets.clear()
+        self.addCleanup(jwks._key_sets.clear)
+
+    def _write(self, keys, active=None):
+        with open(self.path, 'w') as handle:
+            json.dump({'active': active, 'keys': keys}, handle)
+        # Garantit une date de modification différente à chaque écriture
+        stamp = time.time() + len(keys)
+        os.utime(self.path, (stamp, stamp))
+
+    def _configure(self, algorithm='RS256'):
+        overrides = override_settings(SIMPLE_JWT={
+            **settings.SIMPLE_JWT, 'ALGORITHM': algorithm, 'JWKS_FILE': self.path, 'JWKS_RELOAD_INTERVAL': 0,
+        })
+        overrides.enable()
+        self.addCleanup(overrides.disable)
+        patcher = mock.patch.object(simplejwt_state, 'token_backend', jwks.build_token_backend())
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_other_services_verify_with_published_keys(self):
+        self._write([_private_jwk('k1')])
+        self._configure()
+        access = str(ProfileRefreshToken.for_user(self.user).access_token)
+        self.assertEqual(jwt.get_unverified_header(access)['kid'], 'k1')
+        self.assertEqual(AccessToken(access)['user_id'], str(self.user.pk))
+
+        response = self.client.get('/.well-known/jwks.json')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('max-age=', response['Cache-Control'])
+        published = response.json()['keys']
+        self.assertNotIn('d', published[0])
+
+        # Vérification locale par un autre service, sans appel à ce backend
+        public_key = jwt.PyJWK(published[0]).key
+        self.assertEqual(jwt.decode(access, public_key, algorithms=['RS256'])['user_id'], str(self.user.pk))
+
+        response = self.client.get('/.well-known/jwks.json', HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 304)
+
+    def test_rotation_keeps_old_tokens_valid(self):
+        old_key = _private_jwk('old')
+        self._write([old_key])
+        self._configure()
+        old_access = str(ProfileRefreshToken.for_user(self.user).access_token)
+
+        self._write([old_key, _private_jwk('new')], active='new')
+        new_access = str(ProfileRefreshToken.for_user(self.user).access_token)
+        self.assertEqual(jwt.get_unverified_header(new_access)['kid'], 'new')
+        AccessToken(old_access)
+        AccessToken(new_access)
+
+        # Clé retirée du JWKS : ses tokens sont refusés
+        self._write([_private_jwk('newer')])
+        with self.assertRaises(TokenError):
+            AccessToken(old_access)
+
+    def test_eddsa(self):
+        self._write([_private_jwk('ed', 'EdDSA')])
+        self._configure('EdDSA')
+        access = str(ProfileRefreshToken.for_user(self.user).access_token)
+        self.assertEqual(jwt.get_unverified_header(access)['alg'], 'EdDSA')
+        self.assertEqual(AccessToken(access)['user_id'], str(self.user.pk))
+
+    def test_no_jwks_with_hs256(self):
+        self.assertEqual(self.client.get('/.well-known/jwks.json').status_code, 404)
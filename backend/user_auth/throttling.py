@@ -0,0 +1,77 @@
+"""
+Limitation du débit des endpoints d'authentification anonymes.
+
+Deux fenêtres glissantes (historique horodaté de DRF `SimpleRateThrottle`)
+sont appliquées à LoginView avant tout appel au hasher :
+
+- `LoginIPRateThrottle` (scope `login`) : par adresse IP ;
+- `LoginIdentifierRateThrottle` (scope `login_identifier`) : par identifiant
+  saisi, normalisé et haché (pas d'email en clair dans le cache). Une
+  connexion réussie remet son compteur à zéro (`reset`) : seuls les échecs
+  consécutifs finissent par bloquer le compte.
+
+PasswordResetRequestView a les mêmes deux limites (scopes `password_reset` et
+`password_reset_email`) : elles bornent les emails envoyés à une adresse et
+le sondage des comptes existants.
+
+Les taux viennent de `REST_FRAMEWORK['DEFAULT_THROTTLE_RATES']` (un scope
+absent ou à None désactive la limite). Le stockage est le cache Django
+désigné par `LOGIN_THROTTLE_CACHE_ALIAS` : LocMem convient à un seul
+processus, un cache partagé (Redis) est nécessaire dès qu'il y a plusieurs
+workers ou serveurs.
+"""
+import hashlib
+from collections.abc import Mapping
+
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework.settings import api_settings
+from rest_framework.throttling import SimpleRateThrottle
+
+
+class LoginRateThrottle(SimpleRateThrottle):
+    """Base commune : taux lus à chaque requête et cache configurable."""
+
+    @property
+    def cache(self):
+        return caches[getattr(settings, 'LOGIN_THROTTLE_CACHE_ALIAS', 'default')]
+
+    def get_rate(self):
+        return api_settings.DEFAULT_THROTTLE_RATES.get(self.scope)
+
+
+class LoginIPRateThrottle(LoginRateThrottle):
+    scope = 'login'
+
+    def get_cache_key(self, request, view):
+        return self.cache_format % {'scope': self.scope, 'ident': self.get_ident(request)}
+
+
+class LoginIdentifierRateThrottle(LoginRateThrottle):
+    scope = 'login_identifier'
+    identifier_field = 'identifier'
+
+    def get_cache_key(self, request, view):
+        # Corps JSON non objet (liste, chaîne) : pas d'identifiant, la vue répondra 400
+        if not isinstance(request.data, Mapping):
+            return None
+        identifier = request.data.get(self.identifier_field)
+        if not identifier or not isinstance(identifier, str):
+            return None
+        digest = hashlib.sha256(identifier.strip().lower().encode()).hexdigest()
+        return self.cache_format % {'scope': self.scope, 'ident': digest}
+
+    def reset(self, request, view):
+        """Oublie les tentatives de cet identifiant (après une connexion réussie)."""
+        key = self.get_cache_key(request, view)
+        if key is not None:
+            self.cache.delete(key)
+
+
+class PasswordResetIPRateThrottle(LoginIPRateThrottle):
+    scope = 'password_reset'
+
+
+class PasswordResetEmailRateThrottle(LoginIdentifierRateThrottle):
+    scope = 'password_reset_email'
+    identifier_field = 'email'
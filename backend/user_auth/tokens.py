@@ -0,0 +1,139 @@
+"""
+Tokens JWT portant les claims lus par `ProfileTokenUser`.
+
+Les tokens émis par `ProfileRefreshToken.for_user` (et leurs tokens d'accès
+dérivés) embarquent l'identité (`username`, `is_active`, `is_superuser`,
+`profile_color`) : le payload d'un JWT est lisible par quiconque détient le
+token, aucune donnée personnelle (email, date de naissance, genre, nom) n'y
+est copiée. Les vues qui utilisent `CookieJWTStatelessAuthentication`
+(ex. `CookieTokenVerifyView`) reçoivent un `ProfileTokenUser` construit à
+partir du token, sans requête SQL ; celles qui ont besoin du profil complet
+passent par `CookieJWTAuthentication` (utilisateur en cache).
+
+Les claims sont réécrits à chaque login et à chaque refresh (voir
+`ProfileTokenRefreshSerializer`) : au plus ACCESS_TOKEN_LIFETIME de retard.
+
+La liste noire passe par user_auth/blacklist.py quand
+`SIMPLE_JWT['BLACKLIST_CACHE_ENABLED']` est actif : vérification dans le
+cache, écritures en base groupées.
+"""
+from typing import Any
+
+from django.contrib.auth import get_user_model
+from django.utils.functional import cached_property
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, TokenError
+from rest_framework_simplejwt.models import TokenUser
+from rest_framework_simplejwt.serializers import TokenRefreshSerializer
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import BlacklistMixin, RefreshToken
+
+from user_auth import blacklist as token_blacklist
+
+# Claims copiés depuis le modèle User : uniquement ce que lit ProfileTokenUser
+# (is_superuser est lu par TokenUser ; is_staff absent, lu avec False par défaut).
+PROFILE_CLAIMS = ('username', 'is_active', 'is_superuser', 'profile_color')
+
+
+def add_profile_claims(token, user) -> None:
+    """Écrit les claims de profil de `user` dans `token`."""
+    for claim in PROFILE_CLAIMS:
+        token[claim] = getattr(user, claim, None)
+
+
+def has_profile_claims(token) -> bool:
+    """Les tokens émis avant l'ajout des claims n'en portent aucun."""
+    return all(claim in token for claim in PROFILE_CLAIMS)
+
+
+class ProfileRefreshToken(RefreshToken):
+    """RefreshToken dont le payload (et celui du token d'accès dérivé) porte les claims de profil."""
+
+    @classmethod
+    def for_user(cls, user):
+        if not token_blacklist.is_enabled():
+            token = super().for_user(user)
+            add_profile_claims(token, user)
+            return token
+        # Saute l'INSERT immédiat de BlacklistMixin.for_user : l'OutstandingToken
+        # est mis en tampon, avec les claims déjà ajoutés
+        token = super(BlacklistMixin, cls).for_user(user)
+        add_profile_claims(token, user)
+        token_blacklist.outstand(token_blacklist.pending_from_token(token, user_id=user.pk))
+        return token
+
+    def check_blacklist(self) -> None:
+        if not token_blacklist.is_enabled():
+            return super().check_blacklist()
+        if token_blacklist.is_blacklisted(self.payload[api_settings.JTI_CLAIM]):
+            raise TokenError(_("Token is blacklisted"))
+
+    def blacklist(self):
+        """Avec le cache, la révocation est immédiate mais la ligne est écrite plus tard (retourne None)."""
+        if not token_blacklist.is_enabled():
+            return super().blacklist()
+        token_blacklist.blacklist(token_blacklist.pending_from_token(self))
+        return None
+
+    def outstand(self):
+        if not token_blacklist.is_enabled():
+            return super().outstand()
+        token_blacklist.outstand(token_blacklist.pending_from_token(self))
+        return None
+
+
+class ProfileTokenRefreshSerializer(TokenRefreshSerializer):
+    """
+    Comme `TokenRefreshSerializer`, mais réécrit les claims de profil à partir
+    de l'utilisateur déjà chargé pour vérifier qu'il est toujours actif :
+    le refresh n'ajoute donc aucune requête et les claims ne vieillissent pas
+    au fil des rotations.
+    """
+    token_class = ProfileRefreshToken
+
+    def validate(self, attrs: dict[str, Any]) -> dict[str, str]:
+        refresh = self.token_class(attrs['refresh'])
+
+        user_id = refresh.payload.get(api_settings.USER_ID_CLAIM, None)
+        user = get_user_model().objects.filter(**{api_settings.USER_ID_FIELD: user_id}).first()
+        if user is None or not api_settings.USER_AUTHENTICATION_RULE(user):
+            raise AuthenticationFailed(
+                self.error_messages['no_active_account'],
+                'no_active_account',
+            )
+        add_profile_claims(refresh, user)
+
+        data = {'access': str(refresh.access_token)}
+
+        if api_settings.ROTATE_REFRESH_TOKENS:
+            if api_settings.BLACKLIST_AFTER_ROTATION:
+                try:
+                    refresh.blacklist()
+                except AttributeError:
+                    # Application token_blacklist non installée
+                    pass
+
+            refresh.set_jti()
+            refresh.set_exp()
+            refresh.set_iat()
+            refresh.outstand()
+
+            data['refresh'] = str(refresh)
+
+        return data
+
+
+class ProfileTokenUser(TokenUser):
+    """
+    TokenUser dont `is_active` (refusé par l'authentification s'il est faux)
+    et `profile_color` viennent du token. Aucun accès base : `save()`/`delete()`
+    lèvent NotImplementedError comme dans la classe parente.
+    """
+
+    @cached_property
+    def is_active(self) -> bool:
+        return bool(self.token.get('is_active', True))
+
+    @cached_property
+    def profile_color(self) -> str:
+        return self.token.get('profile_color') or ''
@@ -1,12 +1,13 @@
 from django.urls import path
 from rest_framework_simplejwt.views import TokenVerifyView
-from user_auth.views import LoginView, LogoutView, UserProfileView, UserCreateView, GetCSRFToken, CookieTokenRefreshView, LoginFormView, PasswordResetRequestView, PasswordResetConfirmView
+from user_auth.views import LoginView, LogoutView, UserProfileView, UserCreateView, GetCSRFToken, CookieTokenRefreshView, CookieTokenVerifyView, LoginFormView, PasswordResetRequestView, PasswordResetConfirmView
 
 urlpatterns = [
     path('login/', LoginView.as_view(), name='token_obtain_pair'),
     path('logout/', LogoutView.as_view(), name='logout'),
     path('refresh/', CookieTokenRefreshView.as_view(), name='token_refresh'),
     path('verify/', TokenVerifyView.as_view(), name='token_verify'),
+    path('verify-cookie/', CookieTokenVerifyView.as_view(), name='cookie_token_verify'),
     path('user/', UserProfileView.as_view(), name='user_profile'),
     path('register/', UserCreateView.as_view(), name='register'),
     path('csrf/', GetCSRFToken.as_view(), name='get_csrf'),
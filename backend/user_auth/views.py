@@ -6,20 +6,27 @@ from rest_framework import status
 from django.conf import settings
 from dynamic_forms.views import DynamicFormView
 from django.middleware.csrf import get_token
-from rest_framework_simplejwt.tokens import RefreshToken
 from rest_framework_simplejwt.settings import api_settings as simple_jwt_settings
 from django.contrib.auth import authenticate
-from django.contrib.auth.models import update_last_login 
+from django.db import transaction
+from django.utils import timezone
 from rest_framework_simplejwt.exceptions import  TokenError, InvalidToken
 from rest_framework_simplejwt.views import TokenRefreshView
-from user_auth.authentication import CookieJWTAuthentication 
-from user_auth.serializers import PasswordResetRequestSerializer, UserProfileSerializer, UserCreateSerializer, LoginSerializer, PasswordResetConfirmSerializer
+from user_auth.authentication import CookieJWTAuthentication, CookieJWTStatelessAuthentication
+from user_auth.tokens import ProfileRefreshToken, ProfileTokenRefreshSerializer
+from user_auth.throttling import (
+    LoginIPRateThrottle, LoginIdentifierRateThrottle, PasswordResetEmailRateThrottle, PasswordResetIPRateThrottle,
+)
+from user_auth.password_reset import queue_password_reset_request
+from user_auth.serializers import PasswordResetRequestSerializer, TokenIdentitySerializer, UserProfileSerializer, UserCreateSerializer, LoginSerializer, PasswordResetConfirmSerializer
 from django.contrib.auth import get_user_model
 from django.utils.translation import gettext_lazy as _
 from django.core.exceptions import PermissionDenied
+import logging
+from collections.abc import Mapping
 
 UserModel = get_user_model()
-send_templated_email = None
+logger = logging.getLogger(__name__)
 
 
 class UserCreateView(DynamicFormView):
@@ -46,17 +53,28 @@ class GetCSRFToken(APIView):
         return Response({'csrfToken': csrf_token})
     
 
+def _update_last_login(user):
+    """
+    Équivalent de `update_last_login` sans passer par `Model.save()` :
+    un UPDATE ciblé, sans signaux post_save (last_login n'invalide rien).
+    """
+    user.last_login = timezone.now()
+    UserModel.objects.filter(pk=user.pk).update(last_login=user.last_login)
+
+
 class LoginView(APIView):
     permission_classes = (AllowAny,)
     authentication_classes = []
-    throttle_scope = 'login'
+    # Vérifiés avant le handler : les tentatives en excès n'atteignent pas le hasher
+    throttle_classes = [LoginIPRateThrottle, LoginIdentifierRateThrottle]
 
     def post(self, request, *args, **kwargs):
 
         # Utilise UserModel.USERNAME_FIELD pour être flexible (email ou username)
         identifier_field = "identifier"
-        identifier = request.data.get(identifier_field)
-        password = request.data.get('password')
+        data = request.data if isinstance(request.data, Mapping) else {}
+        identifier = data.get(identifier_field)
+        password = data.get('password')
 
         if not identifier or not password:
             return Response(
@@ -76,13 +94,20 @@ class LoginView(APIView):
             if not user.is_active:
                  return Response({'detail': ('Le compte utilisateur est désactivé.')}, status=status.HTTP_401_UNAUTHORIZED)
 
-            refresh = RefreshToken.for_user(user)
+            # Seuls les échecs consécutifs comptent pour la limite par identifiant
+            LoginIdentifierRateThrottle().reset(request, self)
+
+            # Une seule transaction pour l'OutstandingToken (INSERT) et last_login (UPDATE) :
+            # un seul commit, et la connexion ne coûte jamais plus de 3 requêtes.
+            with transaction.atomic():
+                refresh = ProfileRefreshToken.for_user(user)
+                if simple_jwt_config.get('UPDATE_LAST_LOGIN', False):
+                    _update_last_login(user)
             access_token = str(refresh.access_token)
             refresh_token = str(refresh)
 
-
-            
-            user_serializer = UserProfileSerializer(User.objects.get(id=user.id))
+            # Réutilise l'instance retournée par authenticate() (pas de nouveau SELECT)
+            user_serializer = UserProfileSerializer(user)
             response = Response({
                 'user': user_serializer.data,
                 'success':True
@@ -128,9 +153,6 @@ class LoginView(APIView):
                 domain=auth_cookie_domain,
             )
 
-            if simple_jwt_config.get('UPDATE_LAST_LOGIN', False):
-                 update_last_login(None, user)
-
             return response
 
         else:
@@ -183,7 +205,7 @@ class LogoutView(APIView):
                 refresh_token_value = request.COOKIES.get(auth_cookie_refresh_name)
 
                 if refresh_token_value:
-                    token = RefreshToken(refresh_token_value)
+                    token = ProfileRefreshToken(refresh_token_value)
                     token.blacklist()
 
             except (TokenError, InvalidToken, KeyError, AttributeError, Exception) as e:
@@ -197,7 +219,8 @@ class UserProfileView(APIView):
     authentication_classes = [CookieJWTAuthentication]
 
     def get(self, request, format=None):
-        serializer = UserProfileSerializer(request.user)
+        # Profil complet relu en base : ni le token ni le cache d'authentification ne portent ces champs
+        serializer = UserProfileSerializer(User.objects.get(pk=request.user.pk))
         return Response(serializer.data)
 
 
@@ -210,6 +233,8 @@ class CookieTokenRefreshView(TokenRefreshView):
     """
     permission_classes = (AllowAny,) # No authentication needed, refresh token is the credential
     authentication_classes = []
+    # Rewrites the profile claims carried by the new access token
+    serializer_class = ProfileTokenRefreshSerializer
 
     def post(self, request, *args, **kwargs):
         simple_jwt_config = settings.SIMPLE_JWT
@@ -293,15 +318,19 @@ class CookieTokenVerifyView(APIView):
     Si le code de la méthode get() ou post() est atteint, cela signifie que
     l'authentification a réussi et que le token est considéré comme valide
     (non expiré, signature correcte, utilisateur actif).
+
+    L'authentification est sans état : aucune requête SQL, l'identité
+    renvoyée est lue dans les claims du token (le profil complet est servi
+    par UserProfileView).
     """
     permission_classes = (IsAuthenticated,) # Crucial !
+    authentication_classes = [CookieJWTStatelessAuthentication]
 
     def get(self, request, *args, **kwargs):
         """
         Gère les requêtes GET. Si on arrive ici, le token est valide.
         """
-        user = request.user
-        serialized_data = UserProfileSerializer(user)
+        serialized_data = TokenIdentitySerializer(request.user)
         return Response({"detail": "Token is valid.", "user": serialized_data.data}, status=status.HTTP_200_OK)
 
     def post(self, request, *args, **kwargs):
@@ -309,10 +338,7 @@ class CookieTokenVerifyView(APIView):
         Gère les requêtes POST (alternative si préféré par le frontend).
         Si on arrive ici, le token est valide.
         """
-        user = request.user
-        serialized_data = UserProfileSerializer(user)
-
-        return Response({"detail": "Token is valid.", "user": serialized_data.data}, status=status.HTTP_200_OK)
+        return self.get(request, *args, **kwargs)
 
 
 
@@ -320,6 +346,7 @@ class PasswordResetRequestView(DynamicFormView):
     serializer_class = PasswordResetRequestSerializer
     permission_classes = (AllowAny,)
     authentication_classes = []
+    throttle_classes = [PasswordResetIPRateThrottle, PasswordResetEmailRateThrottle]
     success_message = _("Si un compte correspond à cet e-mail, un lien de réinitialisation a été envoyé.")
     # `success_url` n'est pas très pertinent ici car on n'effectue pas de redirection serveur.
 
@@ -333,48 +360,11 @@ class PasswordResetRequestView(DynamicFormView):
 
     def perform_action(self, serializer, request, *args, **kwargs):
         email = serializer.validated_data['email']
-        active_users = UserModel.objects.filter(email__iexact=email, is_active=True)
-
-        # Important : Boucler même s'il ne devrait y avoir qu'un seul utilisateur actif par email
-        # pour éviter de confirmer si un email est enregistré. Toujours envoyer le même message de succès.
-        for user in active_users: # En pratique, on s'attend à 0 ou 1 user
-            # Utilisation du PasswordResetTokenGenerator de Django
-            # uid = urlsafe_base64_encode(force_bytes(user.pk))
-            # token = default_token_generator.make_token(user)
-            # reset_path = reverse('password_reset_confirm_frontend', kwargs={'uidb64': uid, 'token': token}) # Nom de route frontend
-
-            # Ou avec votre modèle PasswordResetToken personnalisé
-            reset_token_obj = PasswordResetToken.objects.create(user=user)
-            token_value = str(reset_token_obj.token) # L'UUID en string
-
-            # L'URL que l'utilisateur recevra doit pointer vers VOTRE PAGE FRONTEND
-            # qui gérera ensuite la confirmation avec le token.
-            frontend_reset_url = f"{getattr(settings, 'FRONTEND_URL', 'https://cicaw.pythonanywhere.com')}" \
-                                 f"/reset-password-confirm/{token_value}/" # Adaptez le chemin frontend
-            
-            context = {
-                'user': user,
-                'user_name': user.get_full_name() or user.username,
-                'reset_password_url': frontend_reset_url,
-            }
-            try:
-                if send_templated_email is None:
-                    print("send_templated_email n'est pas disponible. Assurez-vous que le module notifications est installé.")
-                    return {"email_sent": False} # Indiquer l'échec de l'envoi
-                send_templated_email(
-                    subject_template_name='notifications/email/user_auth/password_reset_subject.txt',
-                    html_template_name='notifications/email/user_auth/password_reset_body.html',
-                    context=context,
-                    recipient_list=[user.email],
-                    event_type='password_reset_request',
-                    recipient_user=user,
-                    related_object=user # ou reset_token_obj
-                )
-                print(f"Email de réinitialisation envoyé à {user.email} avec token {token_value}")
-            except Exception as e:
-                print(f"ERREUR envoi email de réinitialisation pour {user.email}: {e}")
-                # Ne pas faire échouer la réponse pour l'utilisateur, l'erreur est loggée.
-        
+        # Un seul INSERT, que le compte existe ou non : le temps de réponse ne
+        # révèle rien. Recherche, token et email sont faits par
+        # `process_password_reset_requests`, hors de la requête.
+        queue_password_reset_request(email)
+
         # Toujours retourner un succès pour ne pas révéler si l'email existe
         # Le message de succès est défini dans `success_message` de la classe.
         # Le retour de `perform_action` est mis dans `data` par DynamicFormView
@@ -420,23 +410,23 @@ class PasswordResetConfirmView(DynamicFormView):
 
         try:
             # Valider avec votre modèle PasswordResetToken
-            self._valid_token_obj = PasswordResetToken.objects.get(token=token_from_url)
+            self._valid_token_obj = PasswordResetToken.objects.select_related('user').get(token=token_from_url)
             if not self._valid_token_obj.is_valid():
                 self._valid_token_obj = None # Marquer comme invalide pour le reste de la logique
                 # On affichera un message via `get` au lieu de lever une exception ici
                 # pour que le `DynamicFormView.get` puisse construire la réponse de métadonnées
                 # avec un message d'erreur approprié.
-                print(f"Token {token_from_url} invalide (expiré ou utilisé).")
+                logger.debug("Token de réinitialisation invalide (expiré ou utilisé).")
             else:
                 self._user_to_reset = self._valid_token_obj.user
-                print(f"Token {token_from_url} valide pour l'utilisateur {self._user_to_reset.username}.")
+                logger.debug("Token de réinitialisation valide pour l'utilisateur %s.", self._user_to_reset.pk)
         
         except PasswordResetToken.DoesNotExist:
             self._valid_token_obj = None
-            print(f"Token {token_from_url} non trouvé.")
+            logger.debug("Token de réinitialisation non trouvé.")
         except Exception as e:
             self._valid_token_obj = None
-            print(f"Erreur validation token {token_from_url}: {e}")
+            logger.exception("Erreur validation token de réinitialisation: %s", e)
 
 
         # La validation du token est cruciale ici. Si invalide, `get` devrait le gérer.
@@ -483,7 +473,7 @@ class PasswordResetConfirmView(DynamicFormView):
         self._user_to_reset.save(update_fields=['password']) # Sauvegarder uniquement le mot de passe
         
         self._valid_token_obj.mark_as_used() # Marquer le token comme utilisé
-        print(f"Mot de passe réinitialisé pour {self._user_to_reset.username}. Token {self._valid_token_obj.token} marqué comme utilisé.")
+        logger.info("Mot de passe réinitialisé pour l'utilisateur %s. Token marqué comme utilisé.", self._user_to_reset.pk)
         
         # Optionnel: Invalider toutes les sessions actives de l'utilisateur (pour la sécurité)
         # from django.contrib.auth import update_session_auth_hash